@@ -0,0 +1,62 @@
+"""
+Benchmark: EasyChair CFP extraction backends.
+
+Runs every available backend in utils.cfp_extractors over the saved fixture
+(benchmarks/data/easychair_cfp_sample.html) and over larger synthetic listings,
+checks that each produces exactly the reference (bs4) output, and prints the
+best-of-N parse time and rows/second.
+
+One listing leaves out the optional </td> and </tr> end tags. It is checked against
+bs4's output for the same listing with them: bs4's html.parser builder doesn't close
+rows implicitly, so bs4 itself reports a MISMATCH there.
+
+    cd backend && python -m benchmarks.cfp_extractors --rows 500 3000 --repeat 5
+"""
+import argparse
+import logging
+import os
+import time
+
+from benchmarks.fixtures import make_cfp_html
+from utils.cfp_extractors import EXTRACTORS
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "data", "easychair_cfp_sample.html")
+
+
+def best_of(fn, html, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="*", default=[500, 3000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("utils.cfp_extractors").setLevel(logging.ERROR)
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        fixture = f.read()
+    # (label, page, page whose bs4 output is the expected result)
+    pages = [("fixture", fixture, fixture)]
+    pages += [(f"synthetic-{rows}", make_cfp_html(rows), make_cfp_html(rows)) for rows in args.rows]
+    rows = args.rows[0]
+    pages.append((f"synthetic-{rows}-no-end-tags", make_cfp_html(rows, omit_end_tags=True), make_cfp_html(rows)))
+
+    for label, html, reference_html in pages:
+        print(f"\n{label}: {len(html) / 1024:.0f} KB")
+        reference = EXTRACTORS["bs4"](reference_html)
+        baseline_time, _ = best_of(EXTRACTORS["bs4"], html, args.repeat)
+        for name, extractor in EXTRACTORS.items():
+            elapsed, result = best_of(extractor, html, args.repeat)
+            status = "ok" if result == reference else "MISMATCH"
+            print(f"  {name:<8} {elapsed * 1000:9.1f} ms  {len(result) / elapsed:10.0f} rows/s  "
+                  f"{baseline_time / elapsed:5.1f}x vs bs4  [{status}]")
+
+
+if __name__ == "__main__":
+    main()
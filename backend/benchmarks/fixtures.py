@@ -0,0 +1,185 @@
+"""Synthetic inputs for offline benchmarks: EasyChair CFP pages shaped like the live listing, and generated papers."""
+import random
+
+_TOPICS = [
+    "artificial intelligence", "machine learning", "blockchain", "cybersecurity",
+    "cloud computing", "data science", "internet of things", "computer vision",
+    "natural language processing", "quantum computing", "bioinformatics",
+    "software engineering", "web development", "mobile computing", "robotics",
+    "deep learning", "databases", "information retrieval", "education", "healthcare",
+]
+_CITIES = ["Paris, France", "Tokyo, Japan", "Pune, India", "Boston, United States", "Online"]
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def _date(rng: random.Random) -> str:
+    return f"{_MONTHS[rng.randrange(12)]} {rng.randint(1, 28)}, {rng.randint(2025, 2027)}"
+
+
+def make_cfp_html(rows: int = 2000, seed: int = 7, omit_end_tags: bool = False) -> str:
+    """
+    Build a CFP listing with `rows` conference rows plus some non-conference noise rows;
+    omit_end_tags leaves out the optional </td> and </tr>, as hand-written HTML may
+    """
+    rng = random.Random(seed)
+    parts = [
+        "<!DOCTYPE html><html><head><title>EasyChair CFP</title></head><body>",
+        "<div class='menu'><a href='/cfp/new.cgi'>New CFPs</a> <a href='/cfp/area.cgi'>By area</a></div>",
+        "<table id='ec:table1' class='ct_table'><thead><tr><th>Acronym</th><th>Name</th>"
+        "<th>Location</th><th>Submission deadline</th><th>Start date</th><th>Topics</th></tr></thead><tbody>",
+    ]
+    for i in range(rows):
+        if i % 50 == 0:
+            parts.append("<tr class='yellow'><td colspan='6'>Sponsored</td></tr>")
+        topics = "".join(
+            f"<a href='/cfp/topic.cgi?tid={rng.randrange(999)}'><span class='tag'>{topic}</span></a> "
+            for topic in rng.sample(_TOPICS, rng.randint(1, 5))
+        )
+        deadline = f"<span class='cfp_date'>{_date(rng)}</span>" if rng.random() > 0.05 else ""
+        if i % 97 == 13:
+            # Edge cases seen on the live page: truncated rows, unlinked acronyms, untagged topic links
+            parts.append(f"<tr class='green'><td>CONF{i}</td><td>Withdrawn</td></tr>")
+            parts.append(
+                f"<tr class='green highlight'><td><b>CONF{i}b</b></td><td> Workshop &lt;{i}&gt; </td>"
+                f"<td>\n Online </td><td>TBA</td><td><span class='cfp_date'>{_date(rng)}</span></td>"
+                f"<td><a href='https://example.org/{i}'>external</a>{topics}</td></tr>"
+            )
+            continue
+        parts.append(
+            f"<tr class='green'><td><a href='/cfp/CONF{i}'>CONF{i}-{2025 + i % 3}</a></td>"
+            f"<td>International Conference on Topic &amp; Systems {i}</td>"
+            f"<td>{rng.choice(_CITIES)}</td>"
+            f"<td>{deadline}</td>"
+            f"<td><span class='cfp_date'>{_date(rng)}</span></td>"
+            f"<td>{topics}</td></tr>"
+        )
+    parts.append("</tbody></table></body></html>")
+    html = "".join(parts)
+    if omit_end_tags:
+        # Only inside the conference table; the header row keeps its tags
+        head, body = html.split("<tbody>", 1)
+        html = head + "<tbody>" + body.replace("</td>", "").replace("</tr>", "")
+    return html
+
+
+_WORDS = (
+    "model data results approach network training evaluation baseline proposed method "
+    "performance analysis framework dataset accuracy learning system significant robust "
+    "experiments demonstrate improvement compared existing state-of-the-art novel efficient"
+).split()
+_PAPER_SECTIONS = ["Abstract", "Introduction", "Related Work", "Methodology", "Results",
+                   "Discussion", "Conclusion", "References"]
+_HEADER_STYLES = ["**{}**", "## {}", "**{n}. {}**", "{n}. {}", "### {n}. {}:"]
+
+
+def make_paper_text(size: int = 50_000, seed: int = 7, mixed_headers: bool = True) -> str:
+    """Model-style paper text of about `size` characters with every section header"""
+    rng = random.Random(seed)
+    per_section = size // len(_PAPER_SECTIONS)
+    parts = ["Federated Learning for Privacy-Preserving Clinical Prediction\n\n"]
+    for n, title in enumerate(_PAPER_SECTIONS, 1):
+        style = rng.choice(_HEADER_STYLES) if mixed_headers else "**{}**"
+        parts.append(style.format(title, n=n) + "\n")
+        written = 0
+        while written < per_section:
+            if title == "References":
+                line = f"[{written // 80 + 1}] A. Author, \"{' '.join(rng.choices(_WORDS, k=8))},\" Proc. Conf., 2024.\n"
+            else:
+                sentence = " ".join(rng.choices(_WORDS, k=rng.randint(8, 20))).capitalize()
+                line = sentence + (". " if rng.random() > 0.15 else ".\n\n")
+            parts.append(line)
+            written += len(line)
+        parts.append("\n")
+    return "".join(parts)
+
+
+def make_section_text(size: int = 1500, seed: int = 7) -> str:
+    """Body of one section (no header) of about `size` characters"""
+    rng = random.Random(seed)
+    parts, written = [], 0
+    while written < size:
+        sentence = " ".join(rng.choices(_WORDS, k=rng.randint(8, 20))).capitalize()
+        line = sentence + (". " if rng.random() > 0.15 else ".\n\n")
+        parts.append(line)
+        written += len(line)
+    return "".join(parts).strip()
+
+
+def make_outline_text(seed: int = 7) -> str:
+    """An outline in the shape the sectioned-generation prompt asks for"""
+    rng = random.Random(seed)
+    lines = ["Title: Federated Learning for Privacy-Preserving Clinical Prediction", ""]
+    for title in _PAPER_SECTIONS:
+        lines.append(f"{title}")
+        lines.extend(f"- {' '.join(rng.choices(_WORDS, k=rng.randint(6, 12))).capitalize()}" for _ in range(3))
+    return "\n".join(lines)
+
+
+def make_arxiv_feed(query: str, entries: int = 6, seed: int = 7) -> str:
+    """An arXiv API Atom response with `entries` results whose titles and abstracts mention the query"""
+    rng = random.Random(f"{seed}:{query}")
+    subject = query.replace("+", " ").replace('"', "") or "research"
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n'
+             f"<title>arXiv Query: {subject}</title>\n"]
+    for i in range(entries):
+        words = " ".join(rng.choices(_WORDS, k=6))
+        summary = " ".join(
+            f"{' '.join(rng.choices(_WORDS, k=rng.randint(10, 18))).capitalize()} {subject}." for _ in range(6)
+        )
+        parts.append(
+            f"<entry><id>http://arxiv.org/abs/2401.{rng.randint(10000, 99999)}v1</id>"
+            f"<published>2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00Z</published>"
+            f"<title>{subject.title()}: {words}</title><summary>{summary}</summary></entry>\n"
+        )
+    parts.append("</feed>\n")
+    return "".join(parts)
+
+
+_METHODS = [
+    "machine learning", "deep learning", "reinforcement learning", "federated learning", "transfer learning",
+    "graph neural networks", "transformers", "large language models", "computer vision", "natural language processing",
+    "bayesian optimization", "evolutionary algorithms", "blockchain", "edge computing", "quantum computing",
+    "digital twins", "knowledge graphs", "contrastive learning", "diffusion models", "causal inference",
+    "active learning", "few-shot learning", "self-supervised learning", "anomaly detection", "time series forecasting",
+    "explainable ai", "generative adversarial networks", "spiking neural networks", "swarm intelligence",
+    "fuzzy logic", "random forests", "support vector machines", "recurrent neural networks", "autoencoders",
+    "multi-agent systems", "semantic segmentation", "object detection", "speech recognition", "topic modeling",
+    "sparse coding", "graph mining", "federated analytics", "neuro-symbolic reasoning", "meta-learning",
+    "probabilistic programming", "vision transformers", "gradient boosting", "genetic programming",
+    "differential privacy", "homomorphic encryption",
+]
+_TASKS = [
+    "prediction", "early diagnosis", "risk assessment", "fraud detection", "resource allocation",
+    "energy optimization", "traffic forecasting", "crop yield estimation", "intrusion detection", "drug discovery",
+    "demand forecasting", "fault detection", "image reconstruction", "route planning", "sentiment analysis",
+    "recommendation", "question answering", "summarization", "scheduling", "quality control",
+    "predictive maintenance", "load balancing", "malware classification", "protein folding", "weather nowcasting",
+    "customer churn", "credit scoring", "emotion recognition", "pose estimation", "document retrieval",
+    "code generation", "bug localization", "test prioritization", "power grid stability", "water quality monitoring",
+    "air pollution estimation", "wildfire detection", "flood mapping", "student performance", "plagiarism detection",
+    "supply chain optimization", "inventory management", "portfolio optimization", "patient triage",
+    "tumor segmentation", "gene expression analysis", "fake news detection", "hate speech detection",
+    "autonomous navigation", "smart contracts auditing",
+]
+_DOMAINS = [
+    "climate change", "healthcare", "smart cities", "agriculture", "finance", "cybersecurity", "education",
+    "manufacturing", "renewable energy", "transportation", "retail", "telecommunications", "robotics",
+    "bioinformatics", "social media", "e-commerce", "oncology", "cardiology", "mental health", "genomics",
+    "aviation", "maritime logistics", "mining", "construction", "insurance", "public policy", "legal documents",
+    "software engineering", "cloud infrastructure", "internet of things", "autonomous vehicles", "space exploration",
+    "oceanography", "wildlife conservation", "urban planning", "sports analytics", "video games", "music",
+    "journalism", "humanitarian aid", "pharmaceuticals", "banking", "textiles", "food safety", "hospitality",
+    "real estate", "elections", "smart homes", "wearable devices", "rural development",
+]
+
+
+def make_research_topics(count: int = 100_000, seed: int = 7) -> list:
+    """Up to len(_METHODS) * len(_TASKS) * len(_DOMAINS) distinct "<method> for <task> in <domain>" topics"""
+    rng = random.Random(seed)
+    combinations = len(_METHODS) * len(_TASKS) * len(_DOMAINS)
+    topics = []
+    for n in rng.sample(range(combinations), min(count, combinations)):
+        n, d = divmod(n, len(_DOMAINS))
+        m, t = divmod(n, len(_TASKS))
+        topics.append(f"{_METHODS[m]} for {_TASKS[t]} in {_DOMAINS[d]}")
+    return topics
@@ -0,0 +1,67 @@
+"""
+Benchmark: venue rendering in utils.formatter.
+
+Renders synthetic papers (parsed with split_into_sections) for every venue and
+output format and prints best-of-N time per KB of paper text, single-call
+throughput, the streaming writer into a file, and render_batch over many papers
+(a convenience wrapper, so it should match a render() loop).
+
+    cd backend && python -m benchmarks.formatter --sizes 20000 100000 --batch 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fixtures import make_paper_text
+from utils.formatter import OUTPUTS, render, render_batch, render_to
+from utils.parser import split_into_sections
+
+VENUES = ("ieee", "springer", "elsevier")
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[20_000, 100_000])
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        paper = split_into_sections(make_paper_text(size))
+        kb = sum(len(v) for v in paper.values()) / 1024
+        print(f"\npaper: {kb:.1f} KB of section text")
+        print(f"  {'venue':<10}{'output':<10}{'ms':>9}{'us/KB':>9}{'out KB':>9}")
+        for venue in VENUES:
+            for output in OUTPUTS:
+                elapsed, document = best_of(lambda: render(paper, venue, output), args.repeat)
+                print(f"  {venue:<10}{output:<10}{elapsed * 1000:9.3f}{elapsed * 1e6 / kb:9.1f}{len(document) / 1024:9.1f}")
+
+        path = os.path.join(tempfile.mkdtemp(), "paper.tex")
+
+        def stream_to_file():
+            with open(path, "w", encoding="utf-8") as f:
+                return render_to(paper, "ieee", "latex", f.write)
+
+        elapsed, written = best_of(stream_to_file, args.repeat)
+        print(f"  streaming writer ieee/latex -> file: {elapsed * 1000:.3f} ms ({written / 1024:.1f} KB)")
+
+    papers = [split_into_sections(make_paper_text(20_000, seed=i)) for i in range(args.batch)]
+    total_kb = sum(len(v) for p in papers for v in p.values()) / 1024
+    one_by_one, _ = best_of(lambda: [render(p, "springer", "html") for p in papers], 3)
+    batched, documents = best_of(lambda: render_batch(papers, "springer", "html"), 3)
+    print(f"\nbatch of {len(documents)} papers ({total_kb:.0f} KB): render() loop {one_by_one * 1000:.1f} ms, "
+          f"render_batch {batched * 1000:.1f} ms ({batched * 1e6 / total_kb:.1f} us/KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Load test: /health latency while EasyChair scrapes run.
+
+Serves a synthetic CFP page from a local HTTP server, then hammers /health through
+the ASGI app while the conference refresher scrapes it back-to-back. Prints /health
+p50/p99 for an idle baseline, for the non-blocking scrape pipeline, and for the old
+blocking behaviour (fetch + parse on the event loop) for comparison.
+
+    cd backend && python -m benchmarks.health_under_scrape --rows 3000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import requests
+
+from benchmarks.fixtures import make_cfp_html
+from services.conference_index import ConferenceRefresher
+from services.easychair import close_scraper_resources, parse_easychair_html, scrape_easychair_conferences
+from services.http_clients import http_clients
+
+
+def _serve(html: str, port_queue):
+    body = html.encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real upstream
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def serve_fixture(html: str):
+    """Run the fake EasyChair in its own process so it doesn't compete for our GIL"""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(html, port_queue), daemon=True)
+    process.start()
+    return process, port_queue.get()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+async def probe_health(client: httpx.AsyncClient, duration: float, concurrency: int):
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            # Measure from when the probe was due, so a stalled loop counts against latency
+            due = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            response = await client.get("/health")
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - due) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def scrape_forever(refresher: ConferenceRefresher, stop: asyncio.Event):
+    while not stop.is_set():
+        await refresher.refresh(force=True)
+
+
+async def run_phase(name, app, duration, concurrency, scrape=None):
+    refresher = ConferenceRefresher(scrape=scrape) if scrape else None
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        background = asyncio.create_task(scrape_forever(refresher, stop)) if refresher else None
+        latencies = await probe_health(client, duration, concurrency)
+        stop.set()
+        if background:
+            await background
+    fetches = refresher.upstream_fetches if refresher else 0
+    print(f"{name:<22} n={len(latencies):>6}  p50={statistics.median(latencies):7.2f} ms  "
+          f"p99={percentile(latencies, 99):8.2f} ms  max={max(latencies):8.2f} ms  scrapes={fetches}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    server, port = serve_fixture(make_cfp_html(args.rows))
+    url = f"http://127.0.0.1:{port}/cfp/"
+
+    from main import app
+
+    async def non_blocking():
+        return await scrape_easychair_conferences(url, delay_range=(0, 0))
+
+    async def blocking():
+        # What the endpoint used to do: synchronous requests + parse on the loop thread
+        return parse_easychair_html(requests.get(url, timeout=30).text)
+
+    print(f"/health under scrape load ({args.rows} rows, {args.concurrency} probes, {args.duration}s each)")
+    await run_phase("idle", app, args.duration, args.concurrency)
+    await run_phase("non-blocking scrape", app, args.duration, args.concurrency, non_blocking)
+    await run_phase("blocking scrape", app, args.duration, args.concurrency, blocking)
+
+    await close_scraper_resources()
+    await http_clients.aclose()
+    server.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
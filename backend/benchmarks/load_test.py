@@ -0,0 +1,242 @@
+"""
+End-to-end load test: /generate-paper/, /generate-questions, /generate-questions/batch
+(BATCH_TITLES titles per request) and /scrape/easychair against a local mock of
+OpenRouter, arXiv and EasyChair (benchmarks.mock_upstream).
+
+Starts the mock in its own process, points the backend's upstream URLs and caches
+at it and at a temp directory, then drives each scenario through the ASGI app at
+the given concurrency. Prints throughput, p50/p95/p99 latency and the upstream
+calls each scenario caused. Requests cycle over --distinct topics/titles, so the
+share of repeats (and thus cache and coalescing hits) is controlled; --distinct 0
+makes every request unique.
+
+The models' client-side requests_per_minute is raised to --model-rpm so the mock's
+latency, not the free-tier pacing, is what gets measured; pass --model-rpm 0 to
+keep the production limits.
+
+--json writes the results; --baseline compares against an earlier --json file and
+exits with status 1 when p95 or throughput is more than --tolerance worse, or a
+scenario makes more upstream calls per request.
+
+    cd backend && python -m benchmarks.load_test --concurrency 20 --requests 200
+    cd backend && python -m benchmarks.load_test --scenarios paper --distinct 0 --rate-429 0.1 --json base.json
+    cd backend && python -m benchmarks.load_test --baseline base.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.fixtures import _TOPICS
+from benchmarks.mock_upstream import add_mock_arguments, start_mock_upstream
+
+SCENARIOS = ("paper", "questions", "questions_batch", "scrape")
+BATCH_TITLES = 20
+_ROLES = ["Backend Engineer", "Data Scientist", "Product Manager", "DevOps Engineer", "UX Designer",
+          "Security Analyst", "Mobile Developer", "QA Engineer", "Solutions Architect", "ML Engineer"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def _paper_request(i: int) -> Tuple[str, str, Dict]:
+    topic = f"{_TOPICS[i % len(_TOPICS)]} for {_ROLES[i % len(_ROLES)].lower()} workflows {i}"
+    return "POST", "/generate-paper/", {"json": {"topic": topic, "paper_type": "Research Paper",
+                                                 "paper_format": "IEEE"}}
+
+
+def _questions_request(i: int) -> Tuple[str, str, Dict]:
+    return "POST", "/generate-questions", {"json": {"job_title": f"{_ROLES[i % len(_ROLES)]} level {i}"}}
+
+
+def _questions_batch_request(i: int) -> Tuple[str, str, Dict]:
+    titles = [f"{_ROLES[n % len(_ROLES)]} level {n}" for n in range(i * BATCH_TITLES, (i + 1) * BATCH_TITLES)]
+    return "POST", "/generate-questions/batch", {"json": {"job_titles": titles}}
+
+
+def _scrape_request(i: int) -> Tuple[str, str, Dict]:
+    params = {"domain": _TOPICS[i % len(_TOPICS)], "sort": "submission_deadline", "limit": 50, "offset": i % 3 * 50}
+    return "GET", "/scrape/easychair", {"params": params}
+
+
+REQUEST_BUILDERS: Dict[str, Callable[[int], Tuple[str, str, Dict]]] = {
+    "paper": _paper_request,
+    "questions": _questions_request,
+    "questions_batch": _questions_batch_request,
+    "scrape": _scrape_request,
+}
+
+
+def _configure_environment(mock_url: str, workdir: str):
+    """Upstreams point at the mock and caches/stores at workdir; must run before the app is imported"""
+    os.environ.update({
+        "OPENROUTER_API_KEY": "load-test",
+        "OPENROUTER_BASE_URL": f"{mock_url}/api/v1",
+        "ARXIV_BASE_URL": mock_url,
+        "EASYCHAIR_CFP_URL": f"{mock_url}/cfp/",
+        "ARXIV_CACHE_PATH": os.path.join(workdir, "arxiv_cache.json"),
+        "PAPER_CACHE_PATH": os.path.join(workdir, "paper_cache.json"),
+        "SIMILAR_TOPIC_INDEX_PATH": os.path.join(workdir, "paper_topics.json"),
+        "QUESTION_CACHE_PATH": os.path.join(workdir, "question_cache.json"),
+        "CONFERENCE_STORE_PATH": os.path.join(workdir, "conferences.sqlite3"),
+        "JOB_STORE_PATH": "memory",
+    })
+    # The mock is local, so arXiv's politeness pacing would only measure itself
+    os.environ.setdefault("ARXIV_REQUESTS_PER_SECOND", "1000")
+
+
+async def upstream_counts(mock: httpx.AsyncClient) -> Counter:
+    return Counter((await mock.get("/__stats")).json())
+
+
+async def run_scenario(client: httpx.AsyncClient, mock: httpx.AsyncClient, name: str, total: int,
+                       concurrency: int, distinct: int) -> Dict:
+    build = REQUEST_BUILDERS[name]
+    latencies: List[float] = []
+    statuses = Counter()
+    indexes = itertools.count()
+    before = await upstream_counts(mock)
+
+    async def worker():
+        while (i := next(indexes)) < total:
+            method, url, kwargs = build(i % distinct if distinct else i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    upstream = await upstream_counts(mock) - before
+
+    return {
+        "requests": total,
+        "ok": statuses[200],
+        "errors": total - statuses[200],
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(max(latencies), 1),
+        "upstream": dict(upstream),
+    }
+
+
+def print_result(name: str, result: Dict):
+    upstream = ", ".join(f"{key}={value}" for key, value in sorted(result["upstream"].items())) or "none"
+    print(f"{name:<10} n={result['requests']:>5}  ok={result['ok']:>5}  {result['throughput_rps']:8.2f} req/s  "
+          f"p50={result['p50_ms']:8.1f} ms  p95={result['p95_ms']:8.1f} ms  p99={result['p99_ms']:8.1f} ms  "
+          f"upstream: {upstream}")
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of results against baseline"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {result['p95_ms']} ms")
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {result['throughput_rps']} req/s")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {result['errors']}")
+        for key in ("chat", "arxiv", "cfp"):
+            # Per request, so runs of different sizes compare
+            was = base["upstream"].get(key, 0) / base["requests"]
+            now = result["upstream"].get(key, 0) / result["requests"]
+            if now > was:
+                regressions.append(f"{name}: upstream {key} calls per request {was:.2f} -> {now:.2f}")
+    return regressions
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    mock_process, mock_url = start_mock_upstream(args)
+    _configure_environment(mock_url, tempfile.mkdtemp(prefix="load-test-"))
+
+    from main import app
+    from routes.generatequestion import QUESTION_MODEL_INFO
+    from services.easychair import close_scraper_resources
+    from services.generator import get_paper_generator
+    from services.http_clients import http_clients
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+    if args.model_rpm:
+        for model in [*get_paper_generator().models, QUESTION_MODEL_INFO]:
+            model["requests_per_minute"] = args.model_rpm
+            model["burst"] = max(model["burst"], args.concurrency)
+
+    results = {}
+    print(f"Load test against mock upstream {mock_url} (concurrency {args.concurrency}, "
+          f"{args.requests} requests per scenario, distinct={args.distinct or 'all'})")
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test",
+                                     timeout=args.timeout) as client, \
+                httpx.AsyncClient(base_url=mock_url) as mock:
+            for name in args.scenarios:
+                results[name] = await run_scenario(client, mock, name, args.requests, args.concurrency, args.distinct)
+                print_result(name, results[name])
+    finally:
+        await close_scraper_resources()
+        await http_clients.aclose()
+        mock_process.terminate()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+                       "results": results}, f, indent=2)
+        print(f"Results written to {args.json}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", type=lambda s: s.split(","), default=list(SCENARIOS),
+                        help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--distinct", type=int, default=20, help="Distinct topics/titles per scenario (0 = all unique)")
+    parser.add_argument("--model-rpm", type=int, default=6000)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against results from an earlier --json run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true", help="Keep the app's INFO logging")
+    add_mock_arguments(parser)
+    parser.set_defaults(port=0)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
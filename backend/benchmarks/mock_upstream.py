@@ -0,0 +1,329 @@
+"""
+Local stand-in for the upstreams the backend calls: OpenRouter chat completions,
+the arXiv Atom API and the EasyChair CFP page.
+
+Chat completions answer with a synthetic paper (or interview questions, a JSON batch
+of them, an outline or a single section when the prompt asks for one), cut to the request's max_tokens,
+as JSON or as an SSE stream when the request sets "stream": true. Latency is drawn from a configurable distribution, and a share of
+calls can be failed with 429 + Retry-After or a 5xx, or answered with a degenerate
+completion (a looping paragraph or a refusal). With --rpm the server also
+enforces a per-model requests-per-minute window and sends X-RateLimit-* headers on
+every completion, the way OpenRouter does.
+
+Latency specs: "fixed:MS", "uniform:LO_MS:HI_MS", "lognormal:MEDIAN_MS:SIGMA" or
+"exp:MEAN_MS". GET /__stats returns call counts, POST /__reset clears them.
+
+    cd backend && python -m benchmarks.mock_upstream --port 8900 --chat-latency lognormal:800:0.5 --rate-429 0.05
+
+Then point the backend at it:
+
+    OPENROUTER_BASE_URL=http://127.0.0.1:8900/api/v1 ARXIV_BASE_URL=http://127.0.0.1:8900 \
+    EASYCHAIR_CFP_URL=http://127.0.0.1:8900/cfp/ uvicorn main:app
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, unquote_plus, urlsplit
+
+from benchmarks.fixtures import make_arxiv_feed, make_cfp_html, make_outline_text, make_paper_text, make_section_text
+
+_QUERY_SYNTAX = re.compile(r"\b(?:all|ti|abs|au|cat):|\b(?:AND|OR|ANDNOT)\b|[^\w\s]")
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Turn a latency spec into a sampler returning seconds"""
+    kind, _, rest = spec.partition(":")
+    values = [float(v) for v in rest.split(":") if v]
+    try:
+        if kind == "fixed":
+            (ms,) = values
+            return lambda rng: ms / 1000
+        if kind == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high) / 1000
+        if kind == "lognormal":
+            median, sigma = values
+            return lambda rng: rng.lognormvariate(math.log(median), sigma) / 1000
+        if kind == "exp":
+            (mean,) = values
+            return lambda rng: rng.expovariate(1 / mean) / 1000
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"Bad latency spec {spec!r}; expected fixed:MS, uniform:LO:HI, "
+                                     "lognormal:MEDIAN:SIGMA or exp:MEAN")
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    """Mock server options, shared with the load test so it can start one itself"""
+    group = parser.add_argument_group("mock upstream")
+    group.add_argument("--chat-latency", default="lognormal:800:0.5",
+                       help="Time to first byte of a chat completion")
+    group.add_argument("--chunk-latency", default="fixed:5", help="Gap between streamed chunks")
+    group.add_argument("--chunk-chars", type=int, default=200, help="Characters per streamed chunk")
+    group.add_argument("--token-ms", type=float, default=0.0,
+                       help="Generation time per output token (~4 chars), spread over a stream's chunks")
+    group.add_argument("--arxiv-latency", default="lognormal:300:0.4")
+    group.add_argument("--cfp-latency", default="fixed:200")
+    group.add_argument("--paper-chars", type=int, default=12_000, help="Size of generated papers")
+    group.add_argument("--cfp-rows", type=int, default=2000)
+    group.add_argument("--rate-429", type=float, default=0.0, help="Share of chat calls failed with 429")
+    group.add_argument("--retry-after", type=float, default=2.0, help="Retry-After seconds sent with a 429")
+    group.add_argument("--rate-5xx", type=float, default=0.0, help="Share of chat calls failed with a 502/503")
+    group.add_argument("--rate-degenerate", type=float, default=0.0,
+                       help="Share of chat completions that loop or refuse instead of answering")
+    group.add_argument("--rpm", type=int, default=0, help="Per-model requests per minute (0 = unlimited)")
+    group.add_argument("--seed", type=int, default=7)
+
+
+class MockState:
+    """Counters, the per-model rate window and the seeded RNG, shared by the handler threads"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.chat_latency = parse_latency(args.chat_latency)
+        self.chunk_latency = parse_latency(args.chunk_latency)
+        self.arxiv_latency = parse_latency(args.arxiv_latency)
+        self.cfp_latency = parse_latency(args.cfp_latency)
+        self.cfp_html = make_cfp_html(args.cfp_rows, args.seed).encode("utf-8")
+        self.counts = Counter()
+        self._windows: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self._rng = random.Random(args.seed)
+
+    def sample(self, sampler: Callable[[random.Random], float]) -> float:
+        with self._lock:
+            return sampler(self._rng)
+
+    def roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def count(self, *names: str):
+        with self._lock:
+            self.counts.update(names)
+
+    def take_slot(self, model: str) -> Dict[str, str]:
+        """Record a call against the model's one-minute window; returns rate-limit headers"""
+        limit = self.args.rpm
+        if not limit:
+            return {}
+        now = time.time()
+        with self._lock:
+            window = self._windows[model]
+            while window and window[0] <= now - 60:
+                window.popleft()
+            reset = (window[0] + 60) if window else now + 60
+            allowed = len(window) < limit
+            if allowed:
+                window.append(now)
+            headers = {
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(max(limit - len(window), 0)),
+                "X-RateLimit-Reset": str(int(reset * 1000)),  # epoch ms, like OpenRouter
+            }
+        if not allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(reset - now)))
+        return headers
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self._windows.clear()
+
+
+_SECTION_REQUEST = re.compile(r"Write only the \*\*(?P<header>[^*]+)\*\* section")
+_BATCH_ROLE = re.compile(r"^\s*(\d+)\. (.+)$", re.MULTILINE)
+
+
+def _questions(role: str) -> list:
+    return [f"Describe a situation where you had to handle challenge number {n} as a {role}." for n in range(1, 6)]
+
+
+def _completion_text(prompt: str, args: argparse.Namespace, max_tokens: Optional[int] = None) -> str:
+    seed = zlib.crc32(prompt.encode("utf-8"))
+    if "Job roles:" in prompt:
+        roles = _BATCH_ROLE.findall(prompt.split("Job roles:", 1)[1])
+        text = json.dumps({"results": [{"id": int(number), "questions": _questions(role)} for number, role in roles]})
+    elif "interview questions" in prompt.lower():
+        text = "\n".join(f"{n}. {question}" for n, question in enumerate(_questions("candidate in this role"), 1))
+    elif "Write a concise outline" in prompt:
+        text = make_outline_text(seed=seed)
+    elif _SECTION_REQUEST.search(prompt):
+        text = make_section_text(args.paper_chars // 8, seed=seed)
+    else:
+        text = make_paper_text(args.paper_chars, seed=seed, mixed_headers=False)
+    # Like a real model, stop at max_tokens
+    return text[:max_tokens * 4] if max_tokens else text
+
+
+def _degenerate_text(text: str, roll: float) -> str:
+    """A completion gone wrong: half the time a short refusal, otherwise its opening paragraph on a loop"""
+    if roll < 0.5:
+        return "I'm sorry, but I can't help with writing this paper. Please consult published sources instead."
+    paragraph = text[:600]
+    return (paragraph * (len(text) // max(len(paragraph), 1) + 1))[:len(text)]
+
+
+def make_handler(state: MockState):
+    args = state.args
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+            self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/__stats":
+                self._send_json(200, state.snapshot())
+            elif url.path == "/api/query":
+                state.count("arxiv")
+                time.sleep(state.sample(state.arxiv_latency))
+                params = parse_qs(url.query)
+                query = _QUERY_SYNTAX.sub(" ", unquote_plus(params.get("search_query", [""])[0]))
+                entries = int(params.get("max_results", ["6"])[0])
+                feed = make_arxiv_feed(" ".join(query.split()), entries, args.seed)
+                self._send(200, feed.encode("utf-8"), "application/atom+xml; charset=utf-8")
+            elif url.path.startswith("/cfp"):
+                state.count("cfp")
+                time.sleep(state.sample(state.cfp_latency))
+                self._send(200, state.cfp_html, "text/html; charset=utf-8")
+            else:
+                self._send_json(404, {"error": {"message": f"No mock for {url.path}"}})
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if url.path == "/__reset":
+                state.reset()
+                self._send_json(200, {"reset": True})
+            elif url.path.endswith("/chat/completions"):
+                self._chat(json.loads(body or b"{}"))
+            else:
+                self._send_json(404, {"error": {"message": f"No mock for {url.path}"}})
+
+        def _chat(self, request: Dict):
+            model = request.get("model", "unknown")
+            stream = bool(request.get("stream"))
+            state.count("chat", "chat_stream" if stream else "chat_json")
+            time.sleep(state.sample(state.chat_latency))
+
+            headers = state.take_slot(model)
+            roll = state.roll()
+            if "Retry-After" in headers or roll < args.rate_429:
+                state.count("status_429")
+                headers.setdefault("Retry-After", str(args.retry_after))
+                self._send_json(429, {"error": {"code": 429, "message": "Rate limit exceeded: free-models-per-min"}},
+                                headers)
+                return
+            if roll < args.rate_429 + args.rate_5xx:
+                status = 502 if roll < args.rate_429 + args.rate_5xx / 2 else 503
+                state.count(f"status_{status}")
+                self._send_json(status, {"error": {"code": status, "message": "Upstream provider unavailable"}},
+                                headers)
+                return
+
+            prompt = " ".join(m.get("content", "") for m in request.get("messages", []))
+            text = _completion_text(prompt, args, request.get("max_tokens"))
+            if args.rate_degenerate:
+                roll = state.roll()
+                if roll < args.rate_degenerate:
+                    state.count("degenerate")
+                    text = _degenerate_text(text, roll / args.rate_degenerate)
+            if stream:
+                self._stream(model, text, headers)
+                return
+            time.sleep(len(text) / 4 * args.token_ms / 1000)
+            self._send_json(200, {
+                "id": f"gen-{time.time_ns()}",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4},
+            }, headers)
+
+        def _stream(self, model: str, text: str, headers: Dict[str, str]):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self._write_chunk(": OPENROUTER PROCESSING\n\n")
+            size = max(args.chunk_chars, 1)
+            for pos in range(0, len(text), size):
+                delta = {"choices": [{"index": 0, "delta": {"content": text[pos:pos + size]}}], "model": model}
+                try:
+                    self._write_chunk(f"data: {json.dumps(delta)}\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    state.count("stream_cancelled")  # the client gave up on the completion
+                    self.close_connection = True
+                    return
+                time.sleep(state.sample(state.chunk_latency) + size / 4 * args.token_ms / 1000)
+            finish = {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "model": model}
+            self._write_chunk(f"data: {json.dumps(finish)}\n\ndata: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, text: str):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(args: argparse.Namespace, port_queue=None):
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(MockState(args)))
+    server.daemon_threads = True
+    if port_queue is not None:
+        port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def start_mock_upstream(args: argparse.Namespace):
+    """Run the mock in its own process so it doesn't compete for the caller's GIL; returns (process, base url)"""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(args, port_queue), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{port_queue.get()}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8900)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    print(f"Mock upstream on http://127.0.0.1:{args.port}")
+    print(f"  OPENROUTER_BASE_URL=http://127.0.0.1:{args.port}/api/v1")
+    print(f"  ARXIV_BASE_URL=http://127.0.0.1:{args.port}")
+    print(f"  EASYCHAIR_CFP_URL=http://127.0.0.1:{args.port}/cfp/")
+    serve(args)
+
+
+if __name__ == "__main__":
+    main()
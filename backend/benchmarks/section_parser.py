@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: section parsing of generated papers.
+
+Parses ~50 KB synthetic papers (mixed bold / markdown / numbered headers) with
+utils.parser.split_into_sections and with SectionStreamParser fed in SSE-sized
+deltas, and compares against the previous implementation (regex rebuilt on every
+call, bold headers only, print on the hot path). Prints best-of-N times and MB/s.
+
+    cd backend && python -m benchmarks.section_parser --size 50000 --repeat 20
+"""
+import argparse
+import contextlib
+import io
+import re
+import time
+
+from benchmarks.fixtures import make_paper_text
+from utils.parser import SectionStreamParser, split_into_sections
+
+
+def legacy_split_into_sections(paper: str) -> dict:
+    """The parser as it was before the compiled grammar, kept for comparison"""
+    section_titles = ["Abstract", "Introduction", "Related Work", "Methodology", "Results", "Conclusion", "References"]
+    pattern = r"(?m)^\*\*(" + "|".join(section_titles) + r")\*\*\s*[:\-]?\s*\n"
+    matches = list(re.finditer(pattern, paper))
+    result = {key: "" for key in ["title", "abstract", "introduction", "related_work", "methodology",
+                                  "results", "conclusion", "references"]}
+    first_header_start = matches[0].start() if matches else len(paper)
+    potential_title_content = paper[0:first_header_start].strip()
+    if potential_title_content and len(potential_title_content) < 200:
+        first_line_match = re.match(r"^(.*?)\n", potential_title_content)
+        result["title"] = first_line_match.group(1).strip() if first_line_match else potential_title_content
+    else:
+        result["title"] = "Generated Research Paper"
+    if not matches:
+        print("❌ No explicit section headers matched. Assigning ALL content to abstract as fallback.")
+        result["abstract"] = paper.strip()
+        return result
+    for i, match in enumerate(matches):
+        title_key = match.group(1).lower().replace(" ", "_").replace("-", "_")
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(paper)
+        result[title_key] = paper[match.end():end].strip()
+    print("✅ Parsed Sections:", [key for key, value in result.items() if value])
+    return result
+
+
+def stream_parse(paper: str, chunk_size: int) -> dict:
+    parser = SectionStreamParser()
+    for i in range(0, len(paper), chunk_size):
+        parser.feed(paper[i:i + chunk_size])
+    parser.close()
+    return parser.result()
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, paper in [("bold headers", make_paper_text(args.size, mixed_headers=False)),
+                         ("mixed headers", make_paper_text(args.size))]:
+        print(f"\n{label}: {len(paper) / 1024:.1f} KB")
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy_time, legacy = best_of(lambda: legacy_split_into_sections(paper), args.repeat)
+        batch_time, reference = best_of(lambda: split_into_sections(paper), args.repeat)
+        found = sum(1 for key, value in reference.items() if value and key != "title")
+        print(f"  {'legacy':<18}{legacy_time * 1000:8.3f} ms  {len(paper) / legacy_time / 1e6:8.1f} MB/s  "
+              f"({sum(1 for k, v in legacy.items() if v and k != 'title')} sections)")
+        print(f"  {'split_into_sections':<18}{batch_time * 1000:8.3f} ms  {len(paper) / batch_time / 1e6:8.1f} MB/s  "
+              f"({found} sections)")
+        for chunk_size in (16, 256, 4096):
+            elapsed, result = best_of(lambda: stream_parse(paper, chunk_size), args.repeat)
+            status = "ok" if result == reference else "MISMATCH"
+            print(f"  {f'stream/{chunk_size}B':<18}{elapsed * 1000:8.3f} ms  {len(paper) / elapsed / 1e6:8.1f} MB/s  [{status}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Concurrency benchmark: upstream calls under N concurrent identical requests.
+
+Fires N identical requests at once through the ASGI app for /generate-paper/ (with
+the model call replaced by a slow counting stub) and /scrape/easychair (with a slow
+counting scrape), cancels a few of the callers mid-flight to simulate disconnects,
+and reports how many upstream calls were made. Expected: 1 per endpoint.
+
+It then checks that coalesced callers keep their own deadlines: a caller with a 1s
+budget and one with none (a queued job) share a 2s computation; only the first may
+fail with DeadlineExceeded, and the shared work must not see its deadline.
+
+    cd backend && python -m benchmarks.singleflight --requests 100
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+_workdir = tempfile.mkdtemp()
+os.environ.setdefault("PAPER_CACHE_PATH", os.path.join(_workdir, "paper_cache.json"))
+os.environ.setdefault("SIMILAR_TOPIC_INDEX_PATH", os.path.join(_workdir, "paper_topics.json"))
+
+import httpx
+
+import main
+from services.conference_index import conference_refresher
+from services.deadline import DeadlineExceeded, check_deadline, deadline_scope
+from services.generator import get_paper_generator, paper_cache
+from services.singleflight import SingleFlight
+from utils.cfp_extractors import _conference
+
+UPSTREAM_LATENCY = 0.5
+
+logging.getLogger("routes.easychair_scraper").setLevel(logging.WARNING)
+
+
+async def _fire(client: httpx.AsyncClient, method: str, url: str, n: int, disconnects: int, **kwargs):
+    tasks = [asyncio.create_task(client.request(method, url, **kwargs)) for _ in range(n)]
+    await asyncio.sleep(UPSTREAM_LATENCY / 5)
+    for task in tasks[:disconnects]:
+        task.cancel()
+    started = time.perf_counter()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    responses = [r for r in results if isinstance(r, httpx.Response)]
+    ok = sum(1 for r in responses if r.status_code == 200)
+    return ok, len(results) - len(responses), time.perf_counter() - started
+
+
+async def main_async(n: int, disconnects: int):
+    calls = {"generate": 0, "scrape": 0}
+
+    async def fake_generation(topic, paper_type, paper_format, hedged=None):
+        calls["generate"] += 1
+        await asyncio.sleep(UPSTREAM_LATENCY)
+        return {"abstract": f"Abstract about {topic}", "_metadata": {"status": "success"}}
+
+    async def fake_scrape():
+        calls["scrape"] += 1
+        await asyncio.sleep(UPSTREAM_LATENCY)
+        return [_conference(f"CONF{i}", f"/cfp/CONF{i}", f"Conference {i}", "Online",
+                            "Jan 1, 2030", "Feb 1, 2030", ["machine learning"]) for i in range(50)]
+
+    get_paper_generator().generate_paper_with_fallback = fake_generation
+    conference_refresher._scrape = fake_scrape
+    conference_refresher.store = None
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+        payload = {"topic": "Federated learning for hospitals", "paper_type": "research", "paper_format": "ieee"}
+        rows = [
+            ("POST /generate-paper/", calls, "generate",
+             await _fire(client, "POST", "/generate-paper/", n, disconnects, json=payload)),
+            ("GET /scrape/easychair", calls, "scrape",
+             await _fire(client, "GET", "/scrape/easychair", n, disconnects)),
+        ]
+
+    print(f"{n} concurrent identical requests, {disconnects} cancelled mid-flight, upstream latency {UPSTREAM_LATENCY}s")
+    print(f"{'endpoint':<24}{'upstream calls':>16}{'200 OK':>9}{'cancelled':>11}{'wall (s)':>10}")
+    for label, counts, key, (ok, cancelled, wall) in rows:
+        print(f"{label:<24}{counts[key]:>16}{ok:>9}{cancelled:>11}{wall:>10.2f}")
+    print(f"paper cache: {paper_cache.stats()}")
+
+
+async def check_coalesced_deadlines() -> bool:
+    """A short-deadline caller must not fail a coalesced caller without one, nor the shared work"""
+    flight = SingleFlight("deadline_check")
+
+    async def work():
+        for _ in range(20):
+            check_deadline("deadline_check")  # raised here if the shared task ran under the 1s budget
+            await asyncio.sleep(0.1)
+        return "done"
+
+    async def short_caller():
+        with deadline_scope(1.0):
+            try:
+                return await flight.do("key", work)
+            finally:
+                elapsed["short"] = time.perf_counter() - started
+
+    async def job_caller():
+        await asyncio.sleep(0.05)  # coalesces onto the flight the short caller started
+        return await flight.do("key", work)
+
+    started, elapsed = time.perf_counter(), {}
+    short, job = await asyncio.gather(short_caller(), job_caller(), return_exceptions=True)
+    ok = isinstance(short, DeadlineExceeded) and job == ("done", True)
+    print(f"coalesced deadlines: short caller -> {type(short).__name__} "
+          f"after {elapsed['short']:.1f}s, no-deadline caller -> {job!r}: {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--disconnects", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests, args.disconnects))
+    if not asyncio.run(check_coalesced_deadlines()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark: near-duplicate topic lookups in utils.topic_similarity.SimilarTopicIndex.
+
+Indexes --entries synthetic "<method> for <task> in <domain>" topics, then looks up
+rewordings of indexed topics (abbreviations, other stopwords, plurals, reordering),
+which should match the original, and unindexed topics with one part swapped for
+another, which mostly should not (a few land on a genuinely close indexed topic, e.g.
+"transformers" vs "vision transformers" with the same task and domain). Prints build time, index memory (tracemalloc, measured
+on a second build), lookup latency percentiles and match rates at --threshold.
+
+    cd backend && python -m benchmarks.topic_similarity --entries 100000 --queries 2000
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.fixtures import _DOMAINS, _TASKS, make_research_topics
+from utils.topic_index import SYNONYMS
+from utils.topic_similarity import SimilarTopicIndex
+
+_ABBREVIATIONS = {long: short for short, longs in SYNONYMS.items() for long in longs}
+_TEMPLATES = ["{method} for {task} in {domain}", "{method} in {domain} {task}", "{task} in {domain} using {method}",
+              "applying {method} to {domain} {task}", "{domain}: {task} with {method}"]
+
+
+def reword(topic: str, rng: random.Random) -> str:
+    method, rest = topic.split(" for ", 1)
+    task, domain = rest.split(" in ", 1)
+    for long, short in _ABBREVIATIONS.items():
+        if long in method and rng.random() < 0.7:
+            method = method.replace(long, short.upper())
+    if rng.random() < 0.5:
+        task = task + "s" if not task.endswith("s") else task
+    text = rng.choice(_TEMPLATES).format(method=method, task=task, domain=domain)
+    return text.title() if rng.random() < 0.5 else text
+
+
+def swap_part(topic: str, rng: random.Random, indexed: set) -> str:
+    method, rest = topic.split(" for ", 1)
+    task, domain = rest.split(" in ", 1)
+    while True:
+        if rng.random() < 0.5:
+            candidate = f"{method} for {rng.choice(_TASKS)} in {domain}"
+        else:
+            candidate = f"{method} for {task} in {rng.choice(_DOMAINS)}"
+        if candidate not in indexed:
+            return candidate
+
+
+def build(topics):
+    index = SimilarTopicIndex(max_entries=len(topics))
+    for i, topic in enumerate(topics):
+        index.add("paper", topic, f"key-{i}")
+    return index
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    topics = make_research_topics(args.entries)
+    indexed = set(topics)
+
+    start = time.perf_counter()
+    index = build(topics)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    measured = build(topics)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+    print(f"indexed {len(index)} topics in {elapsed:.2f}s ({elapsed / len(topics) * 1e6:.1f} µs/add), "
+          f"{index.stats()['buckets']} buckets, {memory / 1e6:.1f} MB")
+
+    rng = random.Random(11)
+    sample = rng.sample(range(len(topics)), min(args.queries, len(topics)))
+    queries = [
+        ("reworded", lambda topic: reword(topic, rng), True),
+        ("one part swapped", lambda topic: swap_part(topic, rng, indexed), False),
+    ]
+    for label, make_query, expect_match in queries:
+        latencies, correct = [], 0
+        for i in sample:
+            query = make_query(topics[i])
+            start = time.perf_counter()
+            match = index.find("paper", query, args.threshold)
+            latencies.append(time.perf_counter() - start)
+            if expect_match:
+                correct += match is not None and match.key == f"key-{i}"
+            else:
+                correct += match is None
+        rate = correct / len(sample)
+        print(f"  {label:<18} p50={percentile(latencies, 50) * 1e6:7.1f} µs  p99={percentile(latencies, 99) * 1e6:7.1f} µs  "
+              f"mean={statistics.mean(latencies) * 1e6:7.1f} µs  "
+              f"{'matched original' if expect_match else 'no match'}: {rate:.1%}")
+
+
+if __name__ == "__main__":
+    main()
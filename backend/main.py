@@ -4,6 +4,14 @@ from fastapi.responses import JSONResponse
 from routes import generate # Assuming this is your existing router
 from routes import easychair_scraper # Import the new scraper router
 from routes import generatequestion
+from routes import metrics
+from services.conference_index import conference_refresher
+from services.easychair import close_scraper_resources
+from services.http_clients import http_clients
+from services.jobs import job_queue
+from services.deadline import DeadlineMiddleware
+from services.tracing import ObservabilityMiddleware
+from contextlib import asynccontextmanager
 import traceback
 import os # For creating data directory if not exists
 import logging
@@ -17,8 +25,20 @@ if not os.path.exists("data"):
     os.makedirs("data")
     logger.info("Created 'data/' directory.")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the EasyChair conference index warm in the background
+    conference_refresher.start()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await conference_refresher.stop()
+    await close_scraper_resources()
+    await http_clients.aclose()
+
 app = FastAPI(title="Conference Finder API", version="1.0.0",
-              description="API for discovering academic and tech conferences.")
+              description="API for discovering academic and tech conferences.",
+              lifespan=lifespan)
 
 # CORS Setup
 app.add_middleware(
@@ -27,8 +47,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
+# Per-request deadline (X-Request-Timeout) and cancellation when the client disconnects
+app.add_middleware(DeadlineMiddleware)
+
+# Request durations for /metrics and opt-in span traces (X-Trace: 1)
+app.add_middleware(ObservabilityMiddleware)
+
 # Global Exception Handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -43,11 +70,16 @@ async def global_exception_handler(request: Request, exc: Exception):
 app.include_router(generate.router)
 app.include_router(easychair_scraper.router) # Include the new EasyChair scraper router
 app.include_router(generatequestion.router) # Assuming this is your existing question generation router
+app.include_router(metrics.router)
 # Health Check Endpoint
 @app.get("/health", summary="Health check endpoint")
 async def health_check():
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/health/http-clients", summary="Connection reuse for the pooled upstream HTTP clients")
+async def http_client_stats():
+    return {"http2": http_clients.http2, "clients": http_clients.connection_stats()}
+
 # Run app if executed directly
 if __name__ == "__main__":
     import uvicorn
@@ -1,22 +1,37 @@
 from fastapi import APIRouter, HTTPException
-from schemas.paper import PaperRequest
-from services.generator import generate_paper_with_llama
+from fastapi.responses import JSONResponse, StreamingResponse
+from schemas.paper import BatchRenderRequest, PaperJobRequest, PaperRequest, RenderRequest
+from services.deadline import DeadlineExceeded
+from services.generator import get_paper_generator, paper_cache, paper_topics
+from services.jobs import QueueFullError, job_queue
+from utils.formatter import MEDIA_TYPES, OUTPUTS, iter_render, render, render_batch
+import asyncio
 import traceback
+import json
 
 router = APIRouter()
 
+def _validate_request(request: PaperRequest):
+    if not request.topic.strip():
+        raise HTTPException(status_code=400, detail="Topic cannot be empty")
+    if len(request.topic.strip()) < 10:
+        raise HTTPException(status_code=400, detail="Topic must be at least 10 characters long")
+    if request.output is not None:
+        _validate_output(request.output)
+
+def _validate_output(output: str):
+    if output not in OUTPUTS:
+        raise HTTPException(status_code=400, detail=f"Output must be one of {', '.join(OUTPUTS)}")
+
 @router.post("/generate-paper/")
 async def generate_paper(request: PaperRequest):
     try:
         print(f"🚀 Received request: {request.topic}, {request.paper_type}, {request.paper_format}")
         
         # Validate request
-        if not request.topic.strip():
-            raise HTTPException(status_code=400, detail="Topic cannot be empty")
-        if len(request.topic.strip()) < 10:
-            raise HTTPException(status_code=400, detail="Topic must be at least 10 characters long")
+        _validate_request(request)
         
-        generated = await generate_paper_with_llama(
+        generated, cached = await get_paper_generator().generate_paper_cached(
             topic=request.topic,
             paper_type=request.paper_type,
             paper_format=request.paper_format
@@ -26,17 +41,148 @@ async def generate_paper(request: PaperRequest):
         if not generated or not any(generated.values()):
             raise HTTPException(status_code=500, detail="Failed to generate paper content")
         
-        print("✅ Paper generated successfully")
-        return {"paper": generated, "status": "success"}
+        print("✅ Paper served from cache" if cached else "✅ Paper generated successfully")
+        response = {"paper": generated, "status": "success", "cached": cached}
+        if request.output:
+            response["rendered"] = render(generated, request.paper_format, request.output)
+        return response
         
     except HTTPException:
         raise
+    except DeadlineExceeded as e:
+        print(f"⌛ {str(e)}")
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print(f"❌ Error in generate_paper: {str(e)}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to generate paper: {str(e)}")
 
+@router.post("/generate-paper/stream")
+async def generate_paper_stream(request: PaperRequest):
+    """
+    Streams generation progress as NDJSON, one event per line: "status", "token",
+    "section" (as soon as its **Header** boundary closes), "reset" (drop what was
+    streamed so far) and a final "done" carrying the same paper dict as /generate-paper/
+    plus a "cached" flag (a cache hit skips straight to "done").
+    """
+    print(f"🚀 Received streaming request: {request.topic}, {request.paper_type}, {request.paper_format}")
+    _validate_request(request)
+
+    async def events():
+        # First byte goes out before any upstream work starts
+        yield json.dumps({"event": "status", "stage": "accepted"}) + "\n"
+        try:
+            async for event in get_paper_generator().generate_paper_stream(
+                topic=request.topic,
+                paper_type=request.paper_type,
+                paper_format=request.paper_format
+            ):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            print(f"❌ Error in generate_paper_stream: {str(e)}")
+            traceback.print_exc()
+            yield json.dumps({"event": "error", "detail": f"Failed to generate paper: {str(e)}"}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/generate-paper/latency")
+async def model_latency():
+    """Per-model latency percentiles of successful generations and the hedge delay derived from them"""
+    return get_paper_generator().latency_tracker.snapshot()
+
+@router.get("/generate-paper/limits")
+async def model_rate_limits():
+    """Per-model request rates learned from 429s and rate-limit headers, and any active pause"""
+    return get_paper_generator().rate_limit_manager.limiter.snapshot()
+
+@router.get("/generate-paper/cache")
+async def paper_cache_stats():
+    return {**paper_cache.stats(), "similar_topics": paper_topics.stats()}
+
+async def _run_paper_job(params: dict) -> dict:
+    paper, cached = await get_paper_generator().generate_paper_cached(
+        topic=params["topic"],
+        paper_type=params["paper_type"],
+        paper_format=params["paper_format"]
+    )
+    result = {"paper": paper, "cached": cached}
+    if params.get("output"):
+        result["rendered"] = render(paper, params["paper_format"], params["output"])
+    return result
+
+job_queue.register("paper", _run_paper_job)
+
+@router.post("/generate-paper/jobs", status_code=202)
+async def submit_paper_job(request: PaperJobRequest):
+    """
+    Queue a paper generation and return immediately with a job id. Poll
+    GET /generate-paper/jobs/{id} or stream GET /generate-paper/jobs/{id}/events
+    for the result instead of holding the connection open for the whole generation.
+    """
+    _validate_request(request)
+    try:
+        job = await job_queue.submit(
+            "paper",
+            {"topic": request.topic, "paper_type": request.paper_type, "paper_format": request.paper_format,
+             "output": request.output},
+            priority=request.priority,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after) + 1)})
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return JSONResponse(status_code=202, content=job,
+                        headers={"Location": f"/generate-paper/jobs/{job['id']}"})
+
+@router.get("/generate-paper/jobs/metrics")
+async def paper_job_metrics():
+    """Queue depth, admission rejections, outcomes and wait/run time percentiles"""
+    return job_queue.metrics()
+
+@router.get("/generate-paper/jobs/{job_id}")
+async def get_paper_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/generate-paper/jobs/{job_id}/events")
+async def watch_paper_job(job_id: str):
+    """NDJSON stream of the job, one line per status change, ending when it finishes"""
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for job in job_queue.watch(job_id):
+            yield json.dumps(job) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.delete("/generate-paper/jobs/{job_id}")
+async def cancel_paper_job(job_id: str):
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/generate-paper/render")
+async def render_paper(request: RenderRequest):
+    """Render a generated section dict in the venue's layout, streamed as LaTeX, HTML or Markdown"""
+    _validate_output(request.output)
+    chunks = iter_render(request.paper, request.paper_format, request.output, request.authors)
+    return StreamingResponse(chunks, media_type=f"{MEDIA_TYPES[request.output]}; charset=utf-8")
+
+@router.post("/generate-paper/render/batch")
+async def render_papers(request: BatchRenderRequest):
+    _validate_output(request.output)
+    documents = await asyncio.to_thread(render_batch, request.papers, request.paper_format, request.output)
+    return {"documents": documents}
+
 # Test endpoint
 @router.get("/test")
 async def test_endpoint():
-    return {"message": "Generate router is working", "status": "ok"}
\ No newline at end of file
+    return {"message": "Generate router is working", "status": "ok"}
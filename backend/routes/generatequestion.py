@@ -1,55 +1,286 @@
-
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import aiohttp
+from pydantic import BaseModel, ValidationError
+from services.adaptive_limiter import model_limiter
+from services.cache import GenerationCache, content_key
+from services.deadline import DeadlineExceeded, bound_to_deadline
+from services.http_clients import http_clients
+from services.metrics import MODEL_ATTEMPT_SECONDS, QUESTION_TITLES
+from services.tracing import span
+from services.upstream_errors import BadResponse, RateLimited, UpstreamError, error_from_response, rate_limit_info
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import math
 import os
+import re
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")  # store this in .env
+QUESTION_MODEL = "google/gemma-2-9b-it:free"  # OpenRouter Gemini free model
+QUESTION_PROMPT_VERSION = "questions-v1"  # bump when the prompt changes
+QUESTION_MODEL_INFO = {"name": QUESTION_MODEL, "max_tokens": 4000, "requests_per_minute": 20, "burst": 2}
+QUESTIONS_PER_TITLE = 5
+
+# /generate-questions/batch packs many titles into one JSON prompt; a title's five questions
+# take ~QUESTION_BATCH_TOKENS_PER_TITLE output tokens, so the model's max_tokens bounds a batch
+QUESTION_BATCH_MAX_TITLES = int(os.getenv("QUESTION_BATCH_MAX_TITLES", "20"))
+QUESTION_BATCH_TOKENS_PER_TITLE = int(os.getenv("QUESTION_BATCH_TOKENS_PER_TITLE", "180"))
+QUESTION_BATCH_MAX_REQUEST_TITLES = int(os.getenv("QUESTION_BATCH_MAX_REQUEST_TITLES", "100"))
+MAX_JOB_TITLE_CHARS = 200
+
+question_cache = GenerationCache(
+    "questions",
+    max_entries=int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", "1000")),
+    ttl=float(os.getenv("QUESTION_CACHE_TTL", str(7 * 86400))),
+    path=os.getenv("QUESTION_CACHE_PATH") or os.path.join("data", "question_cache.json"),
+    cancel_when_abandoned=os.getenv("CANCEL_ABANDONED_GENERATIONS", "true").lower() == "true",
+)
 
 class JobRequest(BaseModel):
     job_title: str
 
 class QuestionResponse(BaseModel):
     questions: list[str]
+    cached: bool = False
+
+class BatchJobRequest(BaseModel):
+    job_titles: list[str]
+
+class BatchQuestionResult(BaseModel):
+    job_title: str
+    questions: list[str] = []
+    cached: bool = False
+    error: Optional[str] = None
+
+class BatchQuestionResponse(BaseModel):
+    results: list[BatchQuestionResult]  # one per requested title, in request order
+    upstream_calls: int
+
+# Shape the batch prompt asks for; answers are matched to titles by id, not by echoed title
+class _BatchAnswer(BaseModel):
+    id: int
+    questions: list[str]
+
+class _BatchAnswers(BaseModel):
+    results: list[_BatchAnswer]
+
+_ANSWER_ENTRY = re.compile(r'\{\s*"id"\s*:\s*\d+\s*,\s*"questions"\s*:\s*\[(?:[^\]"]|"(?:[^"\\]|\\.)*")*\]\s*\}')
+
+def _normalize_title(job_title: str) -> str:
+    return " ".join(job_title.lower().split())
+
+def _question_key(job_title: str) -> str:
+    return content_key(QUESTION_PROMPT_VERSION, QUESTION_MODEL, _normalize_title(job_title))
+
+def _http_error(e: Exception) -> HTTPException:
+    if isinstance(e, DeadlineExceeded):
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, RateLimited):
+        headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after else None
+        return HTTPException(status_code=429, detail=f"Upstream rate limited: {e}", headers=headers)
+    if isinstance(e, UpstreamError):
+        return HTTPException(status_code=502, detail=f"Upstream error ({e.kind}): {e}")
+    return HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
 
 @router.post("/generate-questions", response_model=QuestionResponse, tags=["Interview AI"])
 async def generate_interview_questions(payload: JobRequest):
     if not payload.job_title:
         raise HTTPException(status_code=400, detail="Job title is required.")
 
-    prompt = f"""
-    Generate 5 diverse interview questions for the job role: {payload.job_title}.
+    try:
+        questions, cached = await question_cache.get_or_compute(
+            _question_key(payload.job_title), lambda: _generate_questions(payload.job_title))
+    except Exception as e:
+        raise _http_error(e)
+    QUESTION_TITLES.inc(source="cache" if cached else "single")
+
+    return {"questions": questions, "cached": cached}
+
+@router.post("/generate-questions/batch", response_model=BatchQuestionResponse, tags=["Interview AI"])
+async def generate_interview_questions_batch(payload: BatchJobRequest):
+    """
+    Interview questions for many job titles at once. Cached titles are answered without
+    calling the model; the rest are packed into as few JSON prompts as the model's output
+    budget allows, which run concurrently. A title the model leaves out or answers badly
+    is retried in a smaller batch, and on its own as a last resort. Titles that still fail
+    carry an "error"; the request only fails when no title could be answered.
+    """
+    titles = [title.strip() for title in payload.job_titles]
+    if not titles or not all(titles):
+        raise HTTPException(status_code=400, detail="Job titles are required.")
+    if len(titles) > QUESTION_BATCH_MAX_REQUEST_TITLES:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {QUESTION_BATCH_MAX_REQUEST_TITLES} job titles per request.")
+    if any(len(title) > MAX_JOB_TITLE_CHARS for title in titles):
+        raise HTTPException(status_code=400, detail=f"Job titles must be at most {MAX_JOB_TITLE_CHARS} characters.")
+
+    answers: Dict[str, list] = {}
+    errors: Dict[str, Exception] = {}
+    cached_keys = set()
+    pending: Dict[str, str] = {}  # key -> title; repeats of a title share its key
+    for title in titles:
+        key = _question_key(title)
+        if key in answers or key in pending:
+            continue
+        questions = question_cache.store.get(key)
+        if questions is not None:
+            answers[key] = questions
+            cached_keys.add(key)
+        else:
+            pending[key] = title
+    QUESTION_TITLES.inc(len(cached_keys), source="cache")
+
+    calls = 0
+    if pending:
+        batches = _pack_titles(list(pending.items()))
+        logger.info(f"📦 {len(pending)} job titles in {len(batches)} batches ({len(cached_keys)} cached)")
+        calls = sum(await asyncio.gather(*(_answer_batch(batch, answers, errors) for batch in batches)))
+        if not answers:
+            raise _http_error(next(iter(errors.values())))
+
+    results = []
+    for title in titles:
+        key = _question_key(title)
+        error = errors.get(key)
+        results.append({"job_title": title, "questions": answers.get(key, []), "cached": key in cached_keys,
+                        "error": str(error) if error and key not in answers else None})
+    return {"results": results, "upstream_calls": calls}
+
+@router.get("/generate-questions/cache", tags=["Interview AI"])
+async def question_cache_stats():
+    return question_cache.stats()
+
+def _pack_titles(items: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    """As few batches as the output budget allows, evenly sized so the concurrent calls finish together"""
+    capacity = max(1, min(QUESTION_BATCH_MAX_TITLES,
+                          QUESTION_MODEL_INFO["max_tokens"] // QUESTION_BATCH_TOKENS_PER_TITLE))
+    size = math.ceil(len(items) / math.ceil(len(items) / capacity))
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+def _batch_prompt(titles: List[str]) -> str:
+    roles = "\n".join(f"{number}. {title}" for number, title in enumerate(titles, 1))
+    return f"""
+    Generate {QUESTIONS_PER_TITLE} diverse interview questions for each of these job roles.
     Include technical, behavioral, and situational questions.
-    Return them as a list.
+
+    Job roles:
+    {roles}
+
+    Reply with JSON only, no prose or code fences, with one entry per role id:
+    {{"results": [{{"id": 1, "questions": ["...", "..."]}}]}}
     """
 
+def _parse_batch(content: str) -> Dict[int, list]:
+    """Role id -> questions, for each answer that has at least three usable questions"""
+    start, end = content.find("{"), content.rfind("}")
+    try:
+        entries = _BatchAnswers.model_validate_json(content[start:end + 1] if start >= 0 else content).results
+    except ValidationError as e:
+        # An answer cut off at max_tokens still holds complete entries; keep those
+        entries = []
+        for match in _ANSWER_ENTRY.finditer(content):
+            try:
+                entries.append(_BatchAnswer.model_validate_json(match.group(0)))
+            except ValidationError:
+                continue
+        if not entries:
+            raise BadResponse(f"Batch answer does not match the schema: {e}")
+    answered = {}
+    for answer in entries:
+        questions = [q.strip(" -•\n") for q in answer.questions if len(q.strip()) > 10]
+        if len(questions) >= 3:
+            answered[answer.id] = questions
+    return answered
+
+async def _answer_batch(batch: List[Tuple[str, str]], answers: Dict[str, list], errors: Dict[str, Exception]) -> int:
+    """Answer a batch of (key, title) into `answers`/`errors`; returns the upstream calls it took"""
+    if len(batch) == 1:
+        key, title = batch[0]
+        try:
+            answers[key], _ = await question_cache.get_or_compute(key, lambda: _generate_questions(title))
+            QUESTION_TITLES.inc(source="single")
+        except Exception as e:
+            errors[key] = e
+        return 1
+
+    max_tokens = min(QUESTION_MODEL_INFO["max_tokens"], len(batch) * QUESTION_BATCH_TOKENS_PER_TITLE + 100)
+    try:
+        content = await _complete(_batch_prompt([title for _, title in batch]), max_tokens=max_tokens, json_mode=True)
+        answered = _parse_batch(content)
+    except BadResponse as e:
+        logger.warning(f"⚠️ Unusable batch answer for {len(batch)} job titles: {e}")
+        answered = {}
+    except Exception as e:
+        # Rate limits and outages hit every title alike; splitting would only multiply the calls
+        errors.update((key, e) for key, _ in batch)
+        return 1
+
+    found = {key: answered[number] for number, (key, _) in enumerate(batch, 1) if number in answered}
+    await question_cache.put_many(found)
+    answers.update(found)
+    QUESTION_TITLES.inc(len(found), source="batch")
+    missing = [item for number, item in enumerate(batch, 1) if number not in answered]
+    if not missing:
+        return 1
+
+    # Retry what was left out as one smaller batch, or in halves when nothing came back
+    logger.warning(f"🔁 Retrying {len(missing)} of {len(batch)} job titles the batch answer missed")
+    middle = len(missing) // 2
+    retries = [missing] if found else [missing[:middle], missing[middle:]]
+    return 1 + sum(await asyncio.gather(*(_answer_batch(retry, answers, errors) for retry in retries)))
+
+async def _complete(prompt: str, max_tokens: Optional[int] = None, json_mode: bool = False) -> str:
     headers = {
         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
         "Content-Type": "application/json",
     }
 
     body = {
-        "model": "google/gemma-2-9b-it:free",  # OpenRouter Gemini free model
+        "model": QUESTION_MODEL,
         "messages": [{"role": "user", "content": prompt}],
     }
+    if max_tokens:
+        body["max_tokens"] = max_tokens
+    if json_mode:
+        body["response_format"] = {"type": "json_object"}  # honoured where the provider supports it
 
+    await model_limiter.acquire(QUESTION_MODEL_INFO)
+    with span("model_attempt", MODEL_ATTEMPT_SECONDS, model=QUESTION_MODEL, outcome="error") as labels:
+        client = http_clients.get("openrouter")
+        response = await client.post("/chat/completions", headers=headers, json=body,
+                                     timeout=bound_to_deadline(client.timeout.read))
+        if response.status_code != 200:
+            error = error_from_response(response)
+            labels["outcome"] = error.kind
+            if isinstance(error, RateLimited):
+                model_limiter.on_rate_limited(QUESTION_MODEL_INFO, error.limits)
+            raise error
+        labels["outcome"] = "ok"
+    model_limiter.on_success(QUESTION_MODEL_INFO, rate_limit_info(response.headers))
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=body) as response:
-                data = await response.json()
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        data = response.json()
+    except ValueError:
+        raise BadResponse("Invalid JSON response from model")
+    return data.get("choices", [{}])[0].get("message", {}).get("content", "")
 
-                # Clean and split into question list
-                questions = [q.strip(" -•\n") for q in content.split("\n") if len(q.strip()) > 10]
+async def _generate_questions(job_title: str) -> list[str]:
+    prompt = f"""
+    Generate {QUESTIONS_PER_TITLE} diverse interview questions for the job role: {job_title}.
+    Include technical, behavioral, and situational questions.
+    Return them as a list.
+    """
 
-                if not questions:
-                    raise ValueError("No valid questions returned from model")
+    content = await _complete(prompt)
 
-                return {"questions": questions}
+    # Clean and split into question list
+    questions = [q.strip(" -•\n") for q in content.split("\n") if len(q.strip()) > 10]
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+    if not questions:
+        raise ValueError("No valid questions returned from model")
+
+    return questions
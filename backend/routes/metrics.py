@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from services.metrics import registry
+from services.tracing import trace_buffer
+from typing import Optional
+import os
+
+router = APIRouter()
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, tags=["Observability"],
+            summary="Pipeline metrics in the Prometheus text format")
+async def metrics():
+    """
+    Stage histograms (arXiv fetch, prompt build, model attempts, parse, total), retry,
+    wait and circuit-breaker counters, cache hit counts, EasyChair scrape rows and
+    per-route request durations.
+    """
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _require_admin(x_admin_token: Optional[str]):
+    # Traces carry request topics; keep them behind the admin token when one is configured
+    if ADMIN_API_TOKEN and x_admin_token != ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/debug/traces", tags=["Observability"], summary="Most recent request traces")
+async def list_traces(limit: int = Query(20, ge=1, le=200), x_admin_token: Optional[str] = Header(None)):
+    """
+    Requests are traced when they send `X-Trace: 1` (or are picked by `TRACE_SAMPLE_RATE`);
+    their `X-Trace-Id` response header names the trace.
+    """
+    _require_admin(x_admin_token)
+    return trace_buffer.recent(limit)
+
+
+@router.get("/debug/traces/{trace_id}", tags=["Observability"], summary="Spans of one request trace")
+async def get_trace(trace_id: str, x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (it may have been evicted)")
+    return trace
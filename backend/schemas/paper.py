@@ -1,6 +1,22 @@
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 
 class PaperRequest(BaseModel):
     topic: str
     paper_type: str
-    paper_format: str
\ No newline at end of file
+    paper_format: str
+    output: Optional[str] = None  # also return the paper rendered as latex | html | markdown
+
+class PaperJobRequest(PaperRequest):
+    priority: str = "normal"  # high | normal | low
+
+class RenderRequest(BaseModel):
+    paper: Dict
+    paper_format: str
+    output: str = "latex"
+    authors: Optional[List[str]] = None
+
+class BatchRenderRequest(BaseModel):
+    papers: List[Dict]
+    paper_format: str
+    output: str = "latex"
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from services.deadline import check_deadline
+from services.limiter_state import call_state, create_limiter_state
+from services.metrics import MODEL_WAIT_SECONDS, MetricFamily, registry
+from services.tracing import span
+from services.upstream_errors import RateLimitInfo
+
+logger = logging.getLogger(__name__)
+
+# AIMD: add ADAPTIVE_INCREASE_RPM after each success, multiply by ADAPTIVE_DECREASE_FACTOR on a 429
+ADAPTIVE_INCREASE_RPM = float(os.getenv("ADAPTIVE_INCREASE_RPM", "1"))
+ADAPTIVE_DECREASE_FACTOR = float(os.getenv("ADAPTIVE_DECREASE_FACTOR", "0.5"))
+ADAPTIVE_MIN_RPM = float(os.getenv("ADAPTIVE_MIN_RPM", "1"))
+# Used when a 429 carries no Retry-After or reset time
+DEFAULT_RATE_LIMIT_PAUSE = float(os.getenv("DEFAULT_RATE_LIMIT_PAUSE", "5"))
+MAX_RATE_LIMIT_PAUSE = float(os.getenv("MAX_RATE_LIMIT_PAUSE", "120"))
+
+
+async def wait_for_model(model_name: str, reason: str, seconds: float):
+    """
+    Sleep before a model call, counted in model_wait_seconds so waits can be told apart
+    from model time. A wait the request's deadline can't cover fails now instead.
+    """
+    if seconds <= 0:
+        return
+    check_deadline("model_wait", needed=seconds)
+    MODEL_WAIT_SECONDS.inc(seconds, model=model_name, reason=reason)
+    with span("wait", model=model_name, reason=reason, seconds=round(seconds, 2)):
+        await asyncio.sleep(seconds)
+
+
+class ModelRate:
+    """Learned request rate for one model, between ADAPTIVE_MIN_RPM and the ceiling"""
+
+    def __init__(self, rpm: float, burst: int):
+        self.rpm = rpm
+        self.ceiling_rpm = rpm
+        self.burst = burst
+        self.paused_until = 0.0  # time.time(); comparable with the upstream's reset timestamps
+        self.pause_reason = "backoff"
+        self.increases = 0
+        self.decreases = 0
+        self.last_limits: Optional[RateLimitInfo] = None
+
+
+class AdaptiveLimiter:
+    """
+    Per-model AIMD request rate fed by the upstream's own signals.
+
+    Each model starts at its configured requests_per_minute. Successes add
+    ADAPTIVE_INCREASE_RPM up to the ceiling (the configured rate, or
+    X-RateLimit-Limit once the upstream has sent one); a 429 halves the rate and
+    pauses the model until Retry-After / X-RateLimit-Reset. When headers show the
+    window is running out, the rate is clamped to what remains of it, so requests
+    are spaced out before the upstream has to refuse them. Calls are paced by the
+    shared token bucket in the limiter state at the learned rate.
+    """
+
+    def __init__(self, state=None):
+        self.state = state or create_limiter_state()
+        self._rates: Dict[str, ModelRate] = {}
+        self._lock = threading.Lock()
+
+    def rate(self, model_info: Dict) -> ModelRate:
+        name = model_info["name"]
+        rate = self._rates.get(name)
+        if rate is None:
+            with self._lock:
+                rate = self._rates.setdefault(
+                    name, ModelRate(model_info.get("requests_per_minute", 20), model_info.get("burst", 2)))
+        return rate
+
+    async def acquire(self, model_info: Dict):
+        """Wait until the model is neither paused nor out of tokens"""
+        name = model_info["name"]
+        rate = self.rate(model_info)
+        while True:
+            paused = rate.paused_until - time.time()
+            if paused > 0:
+                logger.info(f"⏸️ {name} paused for {paused:.1f}s ({rate.pause_reason})")
+                await wait_for_model(name, rate.pause_reason, paused)
+                continue
+            wait = await call_state(self.state, "take_token", name, rate.rpm / 60.0, rate.burst)
+            if wait <= 0:
+                return
+            logger.info(f"🪣 Token bucket empty for {name} at {rate.rpm:.1f} rpm, waiting {wait:.1f}s")
+            await wait_for_model(name, "token_bucket", wait)
+
+    def _learn(self, rate: ModelRate, limits: Optional[RateLimitInfo], now: float):
+        if limits is None:
+            return
+        rate.last_limits = limits
+        if limits.limit:
+            # OpenRouter's limits are per minute; never climb past what it says we have
+            rate.ceiling_rpm = float(limits.limit)
+            rate.rpm = min(rate.rpm, rate.ceiling_rpm)
+        if limits.remaining is not None and limits.reset_at and limits.reset_at > now:
+            window = limits.reset_at - now
+            if limits.remaining <= 0:
+                self._pause(rate, limits.reset_at, "window_exhausted")
+            else:
+                # Spread what is left of the window over the time left in it
+                rate.rpm = max(ADAPTIVE_MIN_RPM, min(rate.rpm, limits.remaining * 60.0 / window))
+
+    def on_success(self, model_info: Dict, limits: Optional[RateLimitInfo] = None):
+        rate = self.rate(model_info)
+        with self._lock:
+            if rate.rpm < rate.ceiling_rpm:
+                rate.rpm = min(rate.ceiling_rpm, rate.rpm + ADAPTIVE_INCREASE_RPM)
+                rate.increases += 1
+            self._learn(rate, limits, time.time())
+
+    def on_rate_limited(self, model_info: Dict, limits: Optional[RateLimitInfo] = None) -> float:
+        """Back off after a 429; returns how long the model is paused"""
+        rate = self.rate(model_info)
+        now = time.time()
+        with self._lock:
+            # Calls already in flight when the first 429 paused the model report the same
+            # congestion; decrease once per event rather than once per refused call
+            if rate.paused_until <= now or rate.pause_reason != "retry_after":
+                rate.rpm = max(ADAPTIVE_MIN_RPM, rate.rpm * ADAPTIVE_DECREASE_FACTOR)
+                rate.decreases += 1
+            self._learn(rate, limits, now)
+            if limits is not None and limits.retry_after is not None:
+                pause = limits.retry_after
+            elif limits is not None and limits.reset_at and limits.reset_at > now:
+                pause = limits.reset_at - now
+            else:
+                pause = DEFAULT_RATE_LIMIT_PAUSE
+            self._pause(rate, now + min(pause, MAX_RATE_LIMIT_PAUSE), "retry_after")
+            paused = rate.paused_until - now
+        logger.warning(f"📉 {model_info['name']} rate limited: {rate.rpm:.1f} rpm, paused {paused:.1f}s")
+        return paused
+
+    def pause(self, model_info: Dict, seconds: float):
+        """Hold off a model after a non-rate-limit failure (server error, timeout) without changing its rate"""
+        rate = self.rate(model_info)
+        with self._lock:
+            self._pause(rate, time.time() + seconds, "backoff")
+
+    @staticmethod
+    def _pause(rate: ModelRate, until: float, reason: str):
+        if until > rate.paused_until:
+            rate.paused_until = until
+            rate.pause_reason = reason
+
+    def snapshot(self) -> Dict[str, Dict]:
+        now = time.time()
+        return {
+            name: {
+                "requests_per_minute": round(rate.rpm, 2),
+                "ceiling_rpm": rate.ceiling_rpm,
+                "burst": rate.burst,
+                "paused_for": round(max(rate.paused_until - now, 0.0), 1),
+                "increases": rate.increases,
+                "decreases": rate.decreases,
+                "last_limits": rate.last_limits._asdict() if rate.last_limits else None,
+            }
+            for name, rate in list(self._rates.items())
+        }
+
+    def collect(self):
+        rates = list(self._rates.items())
+        yield MetricFamily("model_rate_limit_rpm", "gauge", "Learned requests per minute per model",
+                           [("", {"model": name}, rate.rpm) for name, rate in rates])
+        yield MetricFamily("model_rate_decreases", "counter", "Multiplicative rate decreases after 429s",
+                           [("_total", {"model": name}, rate.decreases) for name, rate in rates])
+
+
+model_limiter = AdaptiveLimiter()
+registry.register_collector(model_limiter.collect)
@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from services.metrics import MetricFamily, registry
+from services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Named caches and flights, read by the metrics collector at scrape time
+_named_caches: Dict[str, "TTLCache"] = {}
+_named_flights: Dict[str, SingleFlight] = {}
+
+
+def _collect_cache_metrics():
+    caches = list(_named_caches.items())
+    yield MetricFamily("cache_hits", "counter", "Cache lookups served from the cache",
+                       [("_total", {"cache": name}, cache.hits) for name, cache in caches])
+    yield MetricFamily("cache_misses", "counter", "Cache lookups that missed",
+                       [("_total", {"cache": name}, cache.misses) for name, cache in caches])
+    yield MetricFamily("cache_entries", "gauge", "Live entries per cache",
+                       [("", {"cache": name}, len(cache)) for name, cache in caches])
+    flights = list(_named_flights.items())
+    yield MetricFamily("cache_coalesced", "counter", "Cache misses that joined an in-flight computation",
+                       [("_total", {"cache": name}, flight.coalesced) for name, flight in flights])
+    yield MetricFamily("cache_abandoned", "counter", "In-flight computations whose every waiter left (e.g. disconnected)",
+                       [("_total", {"cache": name}, flight.abandoned) for name, flight in flights])
+
+
+registry.register_collector(_collect_cache_metrics)
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after `ttl` seconds.
+
+    With a `path`, entries are loaded from a JSON file on construction and written back
+    by save(), so the cache survives restarts. Values must be JSON-serializable.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 86400, path: Optional[str] = None,
+                 name: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self._load()
+        if name:
+            _named_caches[name] = self  # exported as cache_hits_total{cache=name} etc.
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable cache file {self.path}: {e}")
+            return
+        now = time.time()
+        for key, expires_at, value in stored[-self.max_entries:]:
+            if expires_at > now:
+                self._entries[key] = (expires_at, value)
+
+    def save(self):
+        """Write live entries to disk atomically (LRU order, oldest first); blocking, so call via to_thread"""
+        if not self.path:
+            return
+        with self._lock:
+            now = time.time()
+            rows = [[key, expires_at, value] for key, (expires_at, value) in self._entries.items() if expires_at > now]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._save_lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(rows, f)
+            os.replace(tmp_path, self.path)
+
+
+def content_key(*parts: Any) -> str:
+    """Stable hash of JSON-serializable request parts (normalize them before calling)"""
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """
+    Content-addressed cache for expensive generations with stampede protection.
+
+    Misses go through a SingleFlight, so concurrent get_or_compute() calls for the same
+    key share one generation and a caller that disconnects does not cancel it for the others.
+    With cancel_when_abandoned=True the generation is cancelled once every caller has left.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float, path: Optional[str] = None,
+                 cancel_when_abandoned: bool = False):
+        self.name = name
+        self.store = TTLCache(max_entries=max_entries, ttl=ttl, path=path, name=name)
+        self.flight = SingleFlight(name, cancel_when_abandoned=cancel_when_abandoned)
+        _named_flights[name] = self.flight
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             should_cache: Callable[[Any], bool] = lambda value: bool(value)) -> Tuple[Any, bool]:
+        """Return (value, served_from_cache)"""
+        cached = self.store.get(key)
+        if cached is not None:
+            return cached, True
+        value, _ = await self.flight.do(key, lambda: self._compute(key, compute, should_cache))
+        return value, False
+
+    async def _compute(self, key: str, compute, should_cache) -> Any:
+        value = await compute()
+        if should_cache(value):
+            self.store.set(key, value)
+            if self.store.path:
+                await asyncio.to_thread(self.store.save)
+        return value
+
+    async def put_many(self, values: Dict[str, Any]):
+        """Store values computed outside get_or_compute (e.g. one batched call), saving once"""
+        for key, value in values.items():
+            self.store.set(key, value)
+        if values and self.store.path:
+            await asyncio.to_thread(self.store.save)
+
+    def stats(self) -> Dict:
+        return {**self.store.stats(), **self.flight.stats()}
@@ -0,0 +1,277 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from datetime import date, datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from services.easychair import parse_cfp_date, scrape_easychair_conferences
+from services.metrics import SCRAPE_LAST_ROWS, SCRAPE_ROWS, SCRAPE_STAGE_SECONDS, SCRAPES
+from services.singleflight import SingleFlight
+from services.snapshot_store import ConferenceSnapshotStore
+from services.tracing import span
+from utils.topic_index import TopicIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = float(os.getenv("EASYCHAIR_REFRESH_INTERVAL", "900"))  # 15 minutes
+# After a failed scrape, retry after this many seconds, doubling per failure up to the maximum (jittered)
+ERROR_BACKOFF_SECONDS = float(os.getenv("EASYCHAIR_ERROR_BACKOFF", "5"))
+MAX_ERROR_BACKOFF_SECONDS = float(os.getenv("EASYCHAIR_MAX_ERROR_BACKOFF", "120"))
+
+CONFERENCE_FIELDS = ("acronym", "name", "link", "location", "submission_deadline", "start_date", "topics")
+DATE_FIELDS = ("submission_deadline", "start_date")
+SORT_KEYS = ("relevance",) + DATE_FIELDS
+
+
+class ConferenceSnapshot:
+    """Immutable, versioned view of the scraped conference list"""
+
+    def __init__(self, conferences: List[Dict], version: int, refreshed_at: Optional[float]):
+        self.conferences = tuple(conferences)
+        self.version = version
+        self.refreshed_at = refreshed_at  # wall-clock epoch seconds, None until first scrape
+        self.fingerprint = hashlib.sha1(
+            json.dumps(conferences, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        self.topic_index = TopicIndex(self.conferences)
+
+        # Dates are parsed once here; undated rows ("N/A", "TBA") sort last in either direction
+        self.dates: Dict[str, List[Optional[date]]] = {
+            field: [parse_cfp_date(conf[field]) for conf in self.conferences] for field in DATE_FIELDS
+        }
+        self._orderings: Dict[str, List[int]] = {}
+        self._dated_counts: Dict[str, int] = {}
+        self._ranks: Dict[str, List[int]] = {}
+        for field, values in self.dates.items():
+            ordering = sorted(range(len(values)), key=lambda i: (values[i] is None, values[i] or date.min, i))
+            ranks = [0] * len(ordering)
+            for rank, conf_id in enumerate(ordering):
+                ranks[conf_id] = rank
+            self._orderings[field] = ordering
+            self._dated_counts[field] = sum(value is not None for value in values)
+            self._ranks[field] = ranks
+
+    def _sorted_ids(self, field: str, descending: bool, ids: Optional[Sequence[int]]) -> Sequence[int]:
+        dated = self._dated_counts[field]
+        if ids is None:
+            ordering = self._orderings[field]
+        else:
+            # Cost follows the number of matches, not the catalog size
+            ranks = self._ranks[field]
+            ordering = sorted(ids, key=ranks.__getitem__)
+            dated = sum(1 for conf_id in ordering if self.dates[field][conf_id] is not None)
+        if descending:
+            return ordering[:dated][::-1] + ordering[dated:]
+        return ordering
+
+    def query(self, domain: Optional[str] = None, sort: Optional[str] = None, descending: bool = False,
+              offset: int = 0, limit: Optional[int] = None) -> Tuple[int, List[int]]:
+        """Return (total matches, conference ids for the requested page)"""
+        ids: Optional[Sequence[int]] = self.topic_index.search(domain) if domain else None
+        if sort in DATE_FIELDS:
+            ids = self._sorted_ids(sort, descending, ids)
+        elif ids is None:
+            ids = range(len(self.conferences))
+        end = None if limit is None else offset + limit
+        return len(ids), list(ids[offset:end])
+
+    def serialize(self, conf_id: int, fields: Sequence[str] = CONFERENCE_FIELDS) -> Dict:
+        """Project one conference; dates come out as ISO strings (or null when unknown)"""
+        conference = self.conferences[conf_id]
+        item = {}
+        for field in fields:
+            if field in DATE_FIELDS:
+                value = self.dates[field][conf_id]
+                item[field] = value.isoformat() if value else None
+            else:
+                item[field] = conference[field]
+        return item
+
+    def age(self) -> Optional[float]:
+        if self.refreshed_at is None:
+            return None
+        return max(time.time() - self.refreshed_at, 0.0)
+
+
+class ConferenceIndex:
+    """In-memory conference index; readers always see one complete snapshot"""
+
+    def __init__(self):
+        self._snapshot = ConferenceSnapshot([], version=0, refreshed_at=None)
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+
+    @property
+    def snapshot(self) -> ConferenceSnapshot:
+        return self._snapshot
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot.refreshed_at is not None
+
+    def publish(self, conferences: List[Dict], refreshed_at: Optional[float] = None,
+                version: Optional[int] = None) -> ConferenceSnapshot:
+        """Swap in a new snapshot; the version only moves when the content changes"""
+        current = self._snapshot
+        candidate = ConferenceSnapshot(conferences, version or current.version + 1, refreshed_at or time.time())
+        if current.refreshed_at is not None and candidate.fingerprint == current.fingerprint:
+            candidate.version = current.version
+        self._snapshot = candidate
+        self.last_error = None
+        return candidate
+
+    def record_error(self, error: str):
+        self.last_error = error
+        self.last_error_at = time.time()
+
+
+class ConferenceRefresher:
+    """
+    Keeps a ConferenceIndex fresh by scraping EasyChair on a fixed interval.
+
+    All scrapes go through a SingleFlight, so concurrent callers attach to the in-flight
+    fetch instead of issuing their own (and a disconnecting caller does not abort it for
+    the rest), and a non-forced refresh is skipped while the current snapshot is younger
+    than the refresh interval. A failed scrape only holds off the next one for a short,
+    jittered backoff, so one transient error doesn't leave an empty index for the interval.
+    """
+
+    def __init__(self, scrape: Callable[[], Awaitable[List[Dict]]] = scrape_easychair_conferences,
+                 interval: float = DEFAULT_REFRESH_INTERVAL,
+                 store: Optional[ConferenceSnapshotStore] = None,
+                 error_backoff: float = ERROR_BACKOFF_SECONDS, max_error_backoff: float = MAX_ERROR_BACKOFF_SECONDS):
+        self.index = ConferenceIndex()
+        self.interval = interval
+        self.error_backoff = error_backoff
+        self.max_error_backoff = max_error_backoff
+        self.store = store
+        self._scrape = scrape
+        self._flight = SingleFlight("conference-refresh")
+        self._task: Optional[asyncio.Task] = None
+        self._next_refresh_monotonic: Optional[float] = None  # earliest non-forced scrape
+        self._failures = 0  # consecutive failed scrapes
+        self.upstream_fetches = 0
+
+    def is_stale(self) -> bool:
+        age = self.index.snapshot.age()
+        return age is None or age >= self.interval
+
+    async def refresh(self, force: bool = False) -> ConferenceSnapshot:
+        """Scrape and publish a new snapshot unless one is already fresh (or in flight)"""
+        # At most one upstream fetch per refresh window (or error backoff) unless explicitly forced
+        if not force and not self._flight.in_flight("refresh") and self.retry_after() > 0:
+            return self.index.snapshot
+        snapshot, _ = await self._flight.do("refresh", self._scrape_and_publish)
+        return snapshot
+
+    def retry_after(self) -> float:
+        """Seconds until a non-forced refresh may scrape again (0 if it may now)"""
+        if self._next_refresh_monotonic is None:
+            return 0.0
+        return max(self._next_refresh_monotonic - time.monotonic(), 0.0)
+
+    def _error_backoff(self) -> float:
+        backoff = min(self.error_backoff * 2 ** (self._failures - 1), self.max_error_backoff)
+        return backoff * random.uniform(0.5, 1.0)
+
+    async def _scrape_and_publish(self) -> ConferenceSnapshot:
+        self.upstream_fetches += 1
+        try:
+            conferences = await self._scrape()
+        except Exception as e:
+            SCRAPES.inc(outcome="error")
+            self.index.record_error(str(e))
+            self._failures += 1
+            backoff = self._error_backoff()
+            self._next_refresh_monotonic = time.monotonic() + backoff
+            logger.error(f"❌ Conference index refresh failed (retrying in {backoff:.1f}s): {e}")
+            raise
+        SCRAPES.inc(outcome="ok")
+        SCRAPE_ROWS.inc(len(conferences))
+        SCRAPE_LAST_ROWS.set(len(conferences))
+
+        # Building the topic index is CPU work too; publish from the worker thread
+        with span("conference_publish", SCRAPE_STAGE_SECONDS, stage="publish"):
+            snapshot = await asyncio.to_thread(self.index.publish, conferences)
+        self._failures = 0
+        self._next_refresh_monotonic = time.monotonic() + self.interval
+        logger.info(f"✅ Conference index refreshed: version {snapshot.version}, {len(snapshot.conferences)} conferences")
+
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(self.store.record_scrape, conferences, snapshot.refreshed_at)
+            except Exception as e:
+                logger.error(f"❌ Failed to record conference snapshot: {e}")
+        return snapshot
+
+    async def restore(self):
+        """Seed the index from the snapshot store so a restart serves immediately"""
+        if self.store is None or self.index.is_loaded:
+            return
+        try:
+            conferences, taken_at, scrape_id = await asyncio.to_thread(self.store.load_latest)
+        except Exception as e:
+            logger.error(f"❌ Failed to load conference snapshot store: {e}")
+            return
+        # A live scrape may have landed while the store was loading; never publish over it
+        if taken_at is None or self.index.is_loaded or self._flight.in_flight("refresh"):
+            return
+        snapshot = await asyncio.to_thread(self.index.publish, conferences, taken_at, scrape_id)
+        # Count the stored scrape against the refresh window as if it had just happened here
+        self._next_refresh_monotonic = time.monotonic() - snapshot.age() + self.interval
+        logger.info(f"💾 Restored {len(conferences)} conferences from scrape {scrape_id} ({snapshot.age():.0f}s old)")
+
+    async def ensure_loaded(self) -> ConferenceSnapshot:
+        """Return the current snapshot, scraping once if nothing has been loaded yet"""
+        if self.index.is_loaded:
+            return self.index.snapshot
+        return await self.refresh()
+
+    async def _run(self):
+        await self.restore()
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass  # already logged; keep serving the last good snapshot
+            await asyncio.sleep(max(self.retry_after(), 1.0))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🔄 Conference refresher started (interval {self.interval:.0f}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict:
+        snapshot = self.index.snapshot
+        age = snapshot.age()
+        return {
+            "version": snapshot.version,
+            "fingerprint": snapshot.fingerprint,
+            "conference_count": len(snapshot.conferences),
+            "refreshed_at": datetime.fromtimestamp(snapshot.refreshed_at, timezone.utc).isoformat()
+            if snapshot.refreshed_at is not None else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "refresh_interval_seconds": self.interval,
+            "stale": self.is_stale(),
+            "refreshing": self._flight.in_flight("refresh"),
+            "upstream_fetches": self.upstream_fetches,
+            "last_error": self.index.last_error,
+        }
+
+
+conference_refresher = ConferenceRefresher(store=ConferenceSnapshotStore())
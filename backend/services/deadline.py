@@ -0,0 +1,186 @@
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from services.metrics import CANCELLED_WORK
+
+logger = logging.getLogger(__name__)
+
+# Time a request may take end to end; clients ask for less (or more, up to the maximum) with
+# X-Request-Timeout: <seconds>. A relative budget, so client and server clocks needn't agree.
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "300"))
+MAX_REQUEST_TIMEOUT_SECONDS = float(os.getenv("MAX_REQUEST_TIMEOUT_SECONDS", "600"))
+TIMEOUT_HEADER = b"x-request-timeout"
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out, or what is left of it can't fit the next step"""
+
+    def __init__(self, stage: str, remaining: float):
+        super().__init__(f"Request deadline exceeded at {stage} ({remaining:.1f}s left)")
+        self.stage = stage
+        self.remaining = remaining
+
+
+class Deadline:
+    """A request's deadline (monotonic clock) and whether its client has gone away"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.at = time.monotonic() + seconds
+        self.disconnected = False
+
+    def remaining(self) -> float:
+        return max(self.at - time.monotonic(), 0.0)
+
+
+class SharedDeadline(Deadline):
+    """
+    Deadline of work several requests wait on (a coalesced generation): the latest of its
+    current waiters' deadlines, and none while any waiter has none (a background job). One
+    waiter's short budget or disconnect must not fail the others, so it is never marked
+    disconnected; with no waiters left it keeps the last deadline it had.
+    """
+
+    def __init__(self):
+        self.seconds = None
+        self.disconnected = False
+        self._waiters: List[Optional[Deadline]] = []
+        self._at: Optional[float] = None
+
+    def join(self, deadline: Optional[Deadline]):
+        self._waiters.append(deadline)
+
+    def leave(self, deadline: Optional[Deadline]):
+        self._waiters.remove(deadline)
+
+    @property
+    def at(self) -> Optional[float]:
+        if self._waiters:
+            ats = [deadline.at if deadline is not None else None for deadline in self._waiters]
+            self._at = None if None in ats else max(ats)
+        return self._at
+
+    def remaining(self) -> Optional[float]:
+        at = self.at
+        return None if at is None else max(at - time.monotonic(), 0.0)
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("request_deadline",
+                                                                                        default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def deadline_remaining() -> Optional[float]:
+    """Seconds left for the current request; None outside a request (background jobs)"""
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline is not None else None
+
+
+def shared_context(deadline: SharedDeadline) -> contextvars.Context:
+    """A copy of the current context (trace and all) whose deadline is `deadline`, to run shared work in"""
+    context = contextvars.copy_context()
+    context.run(_current_deadline.set, deadline)
+    return context
+
+
+def bound_to_deadline(seconds: float) -> float:
+    """A timeout or wait cut to what is left of the deadline"""
+    left = deadline_remaining()
+    return seconds if left is None else min(seconds, left)
+
+
+def check_deadline(stage: str, needed: float = 0.0):
+    """Raise DeadlineExceeded unless more than `needed` seconds are left, so hopeless work isn't started"""
+    left = deadline_remaining()
+    if left is not None and (left <= 0 or left < needed):
+        CANCELLED_WORK.inc(stage=stage, reason="deadline")
+        logger.warning(f"⌛ Deadline: {left:.1f}s left at {stage}, {needed:.1f}s needed - giving up")
+        raise DeadlineExceeded(stage, left)
+
+
+def cancellation_reason() -> str:
+    """Label for work cancelled under the current request: its client left, or a caller cancelled it (a hedge loser)"""
+    deadline = _current_deadline.get()
+    return "disconnect" if deadline is not None and deadline.disconnected else "cancelled"
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[Deadline]:
+    deadline = Deadline(seconds)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def _requested_timeout(scope) -> float:
+    for name, value in scope.get("headers") or ():
+        if name == TIMEOUT_HEADER:
+            try:
+                return min(max(float(value), 1.0), MAX_REQUEST_TIMEOUT_SECONDS)
+            except ValueError:
+                break
+    return REQUEST_TIMEOUT_SECONDS
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware giving every HTTP request a deadline (X-Request-Timeout or
+    REQUEST_TIMEOUT_SECONDS) that the generation pipeline reads via this module, and
+    cancelling the request's handler as soon as the client disconnects, so retries,
+    backoff sleeps and upstream calls stop instead of finishing for nobody.
+
+    The handler runs in its own task while this one reads the ASGI receive channel
+    and hands messages on, so a disconnect is noticed even while the handler is busy.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        messages: asyncio.Queue = asyncio.Queue()
+        response_sent = False
+
+        async def send_tracking(message):
+            nonlocal response_sent
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_sent = True  # later work (background tasks) isn't the client's to cancel
+
+        with deadline_scope(_requested_timeout(scope)) as deadline:
+            handler = asyncio.create_task(self.app(scope, messages.get, send_tracking))
+
+        async def watch_disconnect():
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    break
+            if not handler.done() and not response_sent:
+                deadline.disconnected = True
+                CANCELLED_WORK.inc(stage="request", reason="disconnect")
+                logger.info(f"🔌 Client disconnected from {scope['path']} - cancelling its work")
+                handler.cancel()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not deadline.disconnected:
+                handler.cancel()
+                raise  # the server is cancelling us, not the client
+        finally:
+            watcher.cancel()
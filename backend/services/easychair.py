@@ -0,0 +1,112 @@
+import httpx
+import asyncio
+import os
+import random
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from services.http_clients import http_clients
+from services.metrics import SCRAPE_STAGE_SECONDS
+from services.tracing import span
+from utils.cfp_extractors import get_extractor
+
+logger = logging.getLogger(__name__)
+
+EASYCHAIR_CFP_URL = os.getenv("EASYCHAIR_CFP_URL", "https://easychair.org/cfp/")
+SCRAPER_HEADERS = {
+    'User-Agent': 'ConferenceFinderAPI/1.0 (contact: your_email@example.com; purpose: academic research)'
+}
+
+
+# EasyChair renders dates like "Mar 8, 2026"; the others are defensive
+_CFP_DATE_FORMATS = ("%b %d, %Y", "%B %d, %Y", "%Y-%m-%d")
+
+
+def parse_cfp_date(value: Optional[str]) -> Optional[date]:
+    """Parse a CFP listing date; returns None for "N/A", "TBA" or anything unrecognised"""
+    if not value:
+        return None
+    value = " ".join(value.split())
+    for fmt in _CFP_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+class ScrapeError(Exception):
+    """Raised when the EasyChair CFP page cannot be fetched"""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+_parse_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_parse_executor() -> ProcessPoolExecutor:
+    # A separate process keeps HTML parsing off the event loop and out of its GIL
+    global _parse_executor
+    if _parse_executor is None:
+        _parse_executor = ProcessPoolExecutor(max_workers=1)
+    return _parse_executor
+
+
+async def close_scraper_resources():
+    """Release the parser process (called on app shutdown)"""
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
+
+
+async def fetch_easychair_html(url: str = EASYCHAIR_CFP_URL, timeout: float = 30,
+                               delay_range: Tuple[float, float] = (1, 3)) -> str:
+    """Fetch the raw CFP listing page, politely delayed to avoid hammering EasyChair"""
+    logger.info(f"Attempting to scrape EasyChair CFP from: {url}")
+    try:
+        # Introduce a small random delay before making the HTTP request
+        delay = random.uniform(*delay_range)  # 1-3 seconds by default, to be polite
+        logger.info(f"Waiting for {delay:.2f} seconds before making the request...")
+        await asyncio.sleep(delay)
+
+        with span("easychair_fetch", SCRAPE_STAGE_SECONDS, stage="fetch"):
+            response = await http_clients.get("easychair").get(url, headers=SCRAPER_HEADERS, timeout=timeout)
+        logger.info(f"Received HTTP response from EasyChair with status code: {response.status_code}")
+
+        # Raise an HTTPStatusError for bad responses (4xx or 5xx client/server errors)
+        response.raise_for_status()
+    except httpx.TimeoutException:
+        logger.error(f"Timeout occurred while fetching {url} after {timeout} seconds.")
+        raise ScrapeError("Request to EasyChair timed out. The server might be slow to respond.", status_code=504)
+    except httpx.HTTPError as e:
+        logger.error(f"An error occurred while fetching EasyChair CFP page: {e}")
+        raise ScrapeError(f"Failed to fetch EasyChair CFP page due to a network or request error: {e}")
+
+    return response.text
+
+
+def parse_easychair_html(html: str, extractor: Optional[str] = None) -> List[Dict]:
+    """
+    Extract conference rows (acronym, name, link, location, submission_deadline,
+    start_date, topics) from the EasyChair CFP listing page.
+
+    `extractor` picks a backend from utils.cfp_extractors (defaults to EASYCHAIR_EXTRACTOR).
+    """
+    conferences = get_extractor(extractor)(html)
+    if not conferences:
+        logger.warning("No conference entries found with the specified selector. The HTML structure of EasyChair might have changed or the page is empty.")
+    return conferences
+
+
+async def scrape_easychair_conferences(url: str = EASYCHAIR_CFP_URL,
+                                       delay_range: Tuple[float, float] = (1, 3)) -> List[Dict]:
+    """Fetch the CFP listing without blocking and parse it in the worker process"""
+    html = await fetch_easychair_html(url, delay_range=delay_range)
+    logger.info("Parsing CFP listing HTML...")
+    loop = asyncio.get_running_loop()
+    with span("easychair_parse", SCRAPE_STAGE_SECONDS, stage="parse"):
+        return await loop.run_in_executor(_get_parse_executor(), parse_easychair_html, html)
@@ -1,21 +1,92 @@
 import httpx
 import os
 from dotenv import load_dotenv
-from utils.parser import split_into_sections
+from services.http_clients import http_clients
+from services.limiter_state import call_state, create_limiter_state
+from services.cache import GenerationCache, TTLCache, content_key
+from services.deadline import DeadlineExceeded, bound_to_deadline, cancellation_reason, check_deadline
+from services.adaptive_limiter import model_limiter, wait_for_model
+from services.metrics import (CANCELLED_WORK, CIRCUIT_BREAKER_TRIPS, GUARD_ABORTS, GUARD_SECONDS_SAVED, GUARD_TOKENS_SAVED,
+                              MODEL_ATTEMPT_SECONDS, MODEL_RETRIES, PAPER_STAGE_SECONDS)
+from services.tracing import span
+from services.upstream_errors import (BadResponse, DegenerateOutput, RateLimited, UpstreamError, error_from_payload,
+                                      error_from_response, error_from_transport, rate_limit_info)
+from utils.output_guard import OutputGuard
+from utils.parser import SECTION_KEYS, SectionStreamParser, extract_section, outline_title, split_into_sections
+from utils.prompt_builder import OUTLINE_MAX_TOKENS, SECTION_GUIDES, BuiltPrompt, PromptBuilder
+from utils.topic_similarity import SimilarTopicIndex
 from utils.formatter import apply_formatting
 import urllib.parse
 import feedparser
 import asyncio
 import json
-from typing import Dict, List, Optional, Tuple
+import re
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import time
 import random
 from datetime import datetime, timedelta
+from collections import deque
 import logging
 
 load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
+# Hedged generation: start the next model if the current one is slower than this
+HEDGED_GENERATION = os.getenv("HEDGED_GENERATION", "false").lower() == "true"
+HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", "60"))
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "90"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "5"))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "10"))
+HEDGE_MAX_DELAY_SECONDS = float(os.getenv("HEDGE_MAX_DELAY_SECONDS", "180"))
+# Sectioned generation: a short outline, then each section as its own concurrent completion
+SECTIONED_GENERATION = os.getenv("SECTIONED_GENERATION", "false").lower() == "true"
+# Output guards: stream every completion and cancel it once it loops, refuses or (for whole
+# papers) shows no section header within GUARD_HEADER_WITHIN_TOKENS / GUARD_SECTION_GAP_TOKENS
+OUTPUT_GUARDS = os.getenv("OUTPUT_GUARDS", "true").lower() == "true"
+GUARD_HEADER_WITHIN_TOKENS = int(os.getenv("GUARD_HEADER_WITHIN_TOKENS", "300"))
+GUARD_SECTION_GAP_TOKENS = int(os.getenv("GUARD_SECTION_GAP_TOKENS", "2500"))
+# A model attempt is only started with at least this much of the request's deadline left
+DEADLINE_MIN_ATTEMPT_SECONDS = float(os.getenv("DEADLINE_MIN_ATTEMPT_SECONDS", "10"))
+# Stop generating once every caller has disconnected (or given up at its deadline)
+CANCEL_ABANDONED_GENERATIONS = os.getenv("CANCEL_ABANDONED_GENERATIONS", "true").lower() == "true"
+
+# Parsed arXiv results by normalized topic, persisted so restarts don't re-query arXiv
+arxiv_cache = TTLCache(
+    max_entries=int(os.getenv("ARXIV_CACHE_MAX_ENTRIES", "512")),
+    ttl=float(os.getenv("ARXIV_CACHE_TTL", "86400")),
+    path=os.getenv("ARXIV_CACHE_PATH") or os.path.join("data", "arxiv_cache.json"),
+    name="arxiv",
+)
+
+# Abstracts are kept whole enough for the prompt builder to pick sentences from
+ARXIV_SUMMARY_MAX_CHARS = 1500
+
+# Finished papers keyed by the normalized request; bump PAPER_PROMPT_VERSION whenever the
+# prompt changes so stale generations stop matching
+PAPER_PROMPT_VERSION = "paper-v2"
+paper_cache = GenerationCache(
+    "papers",
+    max_entries=int(os.getenv("PAPER_CACHE_MAX_ENTRIES", "200")),
+    ttl=float(os.getenv("PAPER_CACHE_TTL", str(7 * 86400))),
+    path=os.getenv("PAPER_CACHE_PATH") or os.path.join("data", "paper_cache.json"),
+    cancel_when_abandoned=CANCEL_ABANDONED_GENERATIONS,
+)
+
+# Opt-in: topics that reword one already generated ("ML for climate change prediction" after
+# "Machine Learning in Climate Change Prediction") are served that paper instead of a new
+# generation. Off by default, since a close but different topic would get another topic's paper.
+SIMILAR_TOPIC_CACHE = os.getenv("SIMILAR_TOPIC_CACHE", "false").lower() == "true"
+SIMILAR_TOPIC_THRESHOLD = float(os.getenv("SIMILAR_TOPIC_THRESHOLD", "0.8"))
+paper_topics = SimilarTopicIndex(
+    max_entries=int(os.getenv("SIMILAR_TOPIC_MAX_ENTRIES") or paper_cache.store.max_entries),
+    path=os.getenv("SIMILAR_TOPIC_INDEX_PATH") or os.path.join("data", "paper_topics.json"),
+)
+
+def normalize_topic(topic: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a topic, used as a cache key"""
+    return " ".join(re.findall(r"[a-z0-9]+", topic.lower()))
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,46 +94,47 @@ logger = logging.getLogger(__name__)
 class RateLimitManager:
     """Advanced rate limit and circuit breaker manager"""
     
-    def __init__(self):
-        self.model_status = {}
-        self.last_request_time = {}
-        self.failure_count = {}
-        self.circuit_breaker = {}
-        self.backoff_multiplier = {}
+    def __init__(self, state=None, limiter=None):
+        # Breakers and failure counts live in a state backend so that every request
+        # (and, with SQLite, every worker) shares them; request pacing is the adaptive limiter's
+        self.state = state or create_limiter_state()
+        self.limiter = limiter or model_limiter
+        
+    async def failure_counts(self) -> Dict[str, int]:
+        return await call_state(self.state, "failure_counts")
         
-    def is_model_available(self, model_name: str) -> bool:
+    async def is_model_available(self, model_name: str) -> bool:
         """Check if model is available (not in circuit breaker state)"""
-        if model_name not in self.circuit_breaker:
+        breaker_info = await call_state(self.state, "get_breaker", model_name)
+        if breaker_info is None:
             return True
             
-        breaker_info = self.circuit_breaker[model_name]
         if time.time() > breaker_info['reset_time']:
             # Reset circuit breaker
-            del self.circuit_breaker[model_name]
-            self.failure_count[model_name] = 0
+            await call_state(self.state, "close_breaker", model_name)
             logger.info(f"🔄 Circuit breaker reset for {model_name}")
             return True
             
         return False
     
-    def record_failure(self, model_name: str, error_type: str):
+    async def record_failure(self, model_name: str, error_type: str):
         """Record failure and potentially trigger circuit breaker"""
-        self.failure_count[model_name] = self.failure_count.get(model_name, 0) + 1
+        failures = await call_state(self.state, "increment_failures", model_name)
         
         # Trigger circuit breaker after 3 failures
-        if self.failure_count[model_name] >= 3:
-            reset_time = time.time() + (300 * self.failure_count[model_name])  # 5-25 minutes
-            self.circuit_breaker[model_name] = {
-                'reset_time': reset_time,
-                'reason': error_type
-            }
+        if failures >= 3:
+            reset_time = time.time() + (300 * failures)  # 5-25 minutes
+            await call_state(self.state, "open_breaker", model_name, reset_time, error_type)
+            CIRCUIT_BREAKER_TRIPS.inc(model=model_name, reason=error_type)
             logger.warning(f"⚠️ Circuit breaker triggered for {model_name} - cooldown until {datetime.fromtimestamp(reset_time)}")
     
-    def record_success(self, model_name: str):
+    async def record_success(self, model_name: str):
         """Record successful request"""
-        self.failure_count[model_name] = 0
-        if model_name in self.circuit_breaker:
-            del self.circuit_breaker[model_name]
+        await call_state(self.state, "close_breaker", model_name)
+    
+    async def acquire_request_slot(self, model_info: Dict):
+        """Wait until the adaptive limiter lets another request through to the model"""
+        await self.limiter.acquire(model_info)
     
     def get_backoff_delay(self, model_name: str, attempt: int) -> float:
         """Get exponential backoff delay with jitter"""
@@ -70,18 +142,61 @@ class RateLimitManager:
         jitter = random.uniform(0.5, 1.5)
         return base_delay * jitter
     
-    def should_retry(self, model_name: str, attempt: int, max_retries: int = 3) -> bool:
+    async def should_retry(self, model_name: str, attempt: int, max_retries: int = 3) -> bool:
         """Determine if we should retry with this model"""
-        return attempt < max_retries and self.is_model_available(model_name)
+        return attempt < max_retries and await self.is_model_available(model_name)
+
+class ModelLatencyTracker:
+    """Recent successful generation latencies per model, used to tune the hedge delay"""
+    
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.samples: Dict[str, deque] = {}
+    
+    def record(self, model_name: str, seconds: float):
+        self.samples.setdefault(model_name, deque(maxlen=self.window)).append(seconds)
+    
+    def percentile(self, model_name: str, pct: float) -> Optional[float]:
+        samples = sorted(self.samples.get(model_name, ()))
+        if not samples:
+            return None
+        return samples[min(int(len(samples) * pct / 100), len(samples) - 1)]
+    
+    def hedge_delay(self, model_name: str) -> float:
+        """Default delay until the model has enough history, then its HEDGE_PERCENTILE latency (clamped)"""
+        if len(self.samples.get(model_name, ())) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DELAY_SECONDS
+        delay = self.percentile(model_name, HEDGE_PERCENTILE)
+        return min(max(delay, HEDGE_MIN_DELAY_SECONDS), HEDGE_MAX_DELAY_SECONDS)
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        return {
+            model_name: {
+                "samples": len(samples),
+                "p50": self.percentile(model_name, 50),
+                "p90": self.percentile(model_name, 90),
+                "p95": self.percentile(model_name, 95),
+                "p99": self.percentile(model_name, 99),
+                "hedge_delay": self.hedge_delay(model_name),
+            }
+            for model_name, samples in self.samples.items()
+        }
 
 class PaperGenerator:
     def __init__(self):
         self.rate_limit_manager = RateLimitManager()
+        self.latency_tracker = ModelLatencyTracker()
         self.models = [
             {
                 "name": "meta-llama/llama-4-maverick-17b-128e-instruct:free",
                 "max_tokens": 8000,
                 "description": "Meta Llama 4 Maverick",
+                "context_window": 128000,
+                "chars_per_token": 3.8,
+                "context_budget": 600,  # tokens of arXiv context
+                "prompt_style": "full",
+                "requests_per_minute": 20,  # OpenRouter free-tier limit
+                "burst": 2,
                 "priority": 1,
                 "max_retries": 3,
                 "base_delay": 2
@@ -90,6 +205,12 @@ class PaperGenerator:
                 "name": "google/gemma-2-9b-it:free",
                 "max_tokens": 6000,
                 "description": "Google Gemma 2 9B",
+                "context_window": 8192,
+                "chars_per_token": 4.0,
+                "context_budget": 400,
+                "prompt_style": "full",
+                "requests_per_minute": 20,  # OpenRouter free-tier limit
+                "burst": 2,
                 "priority": 2,
                 "max_retries": 3,
                 "base_delay": 1
@@ -98,21 +219,56 @@ class PaperGenerator:
                 "name": "microsoft/phi-3-mini-128k-instruct:free",
                 "max_tokens": 4000,
                 "description": "Microsoft Phi-3 Mini",
+                "context_window": 128000,
+                "chars_per_token": 3.6,
+                "context_budget": 250,
+                "prompt_style": "compact",
+                "requests_per_minute": 20,  # OpenRouter free-tier limit
+                "burst": 2,
                 "priority": 3,
                 "max_retries": 2,
                 "base_delay": 1
             }
         ]
         
-        # Request queue to manage concurrent requests
-        self.request_semaphore = asyncio.Semaphore(2)  # Max 2 concurrent requests
-        self.global_request_delay = 1.0  # Global minimum delay between requests
+        # Request queue to manage concurrent requests; global because the generator is a singleton
+        self.prompt_builders = {model["name"]: PromptBuilder(model) for model in self.models}
+        
+        self.request_semaphore = asyncio.Semaphore(int(os.getenv("MAX_CONCURRENT_LLM_REQUESTS", "2")))
 
-    async def fetch_enhanced_arxiv(self, topic: str, max_results: int = 5) -> str:
-        """Enhanced arXiv fetching with retry logic"""
+    async def _fetch_arxiv_query(self, query: str, max_results: int) -> List[Dict]:
+        """Run one arXiv search and return its entries; the prompt builder ranks and compresses them"""
+        encoded_query = urllib.parse.quote_plus(query)
+        query_path = f"/api/query?search_query={encoded_query}&start=0&max_results={max_results}&sortBy=submittedDate&sortOrder=descending"
+        
+        await http_clients.acquire("arxiv")  # Rate limiting for arXiv
+        client = http_clients.get("arxiv")
+        response = await client.get(query_path, timeout=bound_to_deadline(client.timeout.read))
+        response.raise_for_status()
+            
+        feed = feedparser.parse(response.text)
+        
+        articles = []
+        for entry in feed.entries:
+            articles.append({
+                "title": " ".join(entry.title.split()),
+                "summary": " ".join(entry.summary.split())[:ARXIV_SUMMARY_MAX_CHARS],
+                "published": entry.published[:10] if hasattr(entry, 'published') else "Recent",
+            })
+        return articles
+
+    async def fetch_enhanced_arxiv(self, topic: str, max_results: int = 5) -> List[Dict]:
+        """Enhanced arXiv fetching with retry logic, concurrent queries and a topic cache"""
+        cache_key = f"v2|{normalize_topic(topic)}|{max_results}"
+        cached = arxiv_cache.get(cache_key)
+        if cached:
+            logger.info(f"📦 arXiv cache hit for '{topic}'")
+            return cached
+        
         max_attempts = 2
         
         for attempt in range(max_attempts):
+            check_deadline("arxiv_fetch")
             try:
                 search_queries = [
                     f"all:{topic}",
@@ -120,115 +276,126 @@ class PaperGenerator:
                     f"abs:{topic}"
                 ]
                 
-                all_articles = []
+                # Issue the queries concurrently; the per-host limiter keeps us polite
+                results = await asyncio.gather(
+                    *(self._fetch_arxiv_query(query, max_results) for query in search_queries),
+                    return_exceptions=True
+                )
                 
-                for query in search_queries:
-                    try:
-                        encoded_query = urllib.parse.quote_plus(query)
-                        base_url = f"https://export.arxiv.org/api/query?search_query={encoded_query}&start=0&max_results={max_results}&sortBy=submittedDate&sortOrder=descending"
-                        
-                        async with httpx.AsyncClient(timeout=20.0) as client:
-                            response = await client.get(base_url)
-                            response.raise_for_status()
-                            
-                        feed = feedparser.parse(response.text)
-                        
-                        for entry in feed.entries[:2]:
-                            title = entry.title.replace('\n', ' ').strip()
-                            summary = entry.summary.replace('\n', ' ').strip()[:300] + "..."
-                            published = entry.published[:10] if hasattr(entry, 'published') else "Recent"
-                            
-                            article_info = f"• **{title}** ({published})\n  {summary}"
-                            if article_info not in all_articles:
-                                all_articles.append(article_info)
-                        
-                        await asyncio.sleep(0.5)  # Rate limiting for arXiv
-                        
-                    except Exception as e:
-                        logger.warning(f"⚠️ Query '{query}' failed: {str(e)}")
+                all_articles = []
+                seen_titles = set()
+                for query, result in zip(search_queries, results):
+                    if isinstance(result, Exception):
+                        logger.warning(f"⚠️ Query '{query}' failed: {str(result)}")
                         continue
+                    for article in result:
+                        if article["title"].lower() not in seen_titles:
+                            seen_titles.add(article["title"].lower())
+                            all_articles.append(article)
                 
                 if all_articles:
                     logger.info(f"✅ Found {len(all_articles)} arXiv papers")
-                    return "\n\n".join(all_articles[:6])
+                    arxiv_cache.set(cache_key, all_articles)
+                    await asyncio.to_thread(arxiv_cache.save)
+                    return all_articles
                 
             except Exception as e:
                 logger.error(f"❌ arXiv attempt {attempt + 1} failed: {str(e)}")
                 if attempt < max_attempts - 1:
+                    check_deadline("arxiv_fetch", needed=2 ** attempt)
                     await asyncio.sleep(2 ** attempt)  # Exponential backoff
         
-        return "No recent papers found on arXiv for this topic."
+        return []
 
-    async def generate_with_model_retry(self, model_info: Dict, prompt: str) -> Optional[str]:
+    async def generate_with_model_retry(self, model_info: Dict, prompt: str, max_tokens: Optional[int] = None,
+                                        min_chars: int = 500, expect_headers: bool = False) -> Optional[str]:
         """Generate content with advanced retry logic"""
         model_name = model_info["name"]
         max_retries = model_info.get("max_retries", 3)
         
         # Check circuit breaker
-        if not self.rate_limit_manager.is_model_available(model_name):
+        if not await self.rate_limit_manager.is_model_available(model_name):
             logger.warning(f"⚠️ {model_info['description']} is in circuit breaker state")
             return None
         
         for attempt in range(max_retries):
+            # The retry budget is whatever of the request's deadline is left, not just max_retries
+            check_deadline("model_attempt", needed=DEADLINE_MIN_ATTEMPT_SECONDS)
             try:
-                # Apply rate limiting
+                # Wait for the adaptive limiter (and any pause a failure left) before taking a concurrency slot
+                await self.rate_limit_manager.acquire_request_slot(model_info)
+                
                 async with self.request_semaphore:
-                    if attempt > 0:
-                        delay = self.rate_limit_manager.get_backoff_delay(model_name, attempt)
-                        logger.info(f"⏰ Waiting {delay:.1f}s before retry {attempt + 1}")
-                        await asyncio.sleep(delay)
-                    
-                    # Global request spacing
-                    await asyncio.sleep(self.global_request_delay)
-                    
-                    result = await self._make_api_request(model_info, prompt, attempt)
+                    check_deadline("model_attempt", needed=DEADLINE_MIN_ATTEMPT_SECONDS)
+                    with span("model_attempt", MODEL_ATTEMPT_SECONDS, model=model_name, outcome="error") as labels:
+                        try:
+                            result = await self._make_api_request(model_info, prompt, attempt, max_tokens, min_chars,
+                                                                  expect_headers)
+                        except UpstreamError as e:
+                            labels["outcome"] = e.kind
+                            raise
+                        labels["outcome"] = "ok" if result else "empty"
                     
                     if result:
-                        self.rate_limit_manager.record_success(model_name)
+                        await self.rate_limit_manager.record_success(model_name)
                         return result
                     
+            except DeadlineExceeded:
+                raise
+            except asyncio.CancelledError:
+                CANCELLED_WORK.inc(stage="model_attempt", reason=cancellation_reason())
+                raise
             except Exception as e:
-                error_msg = str(e).lower()
-                
-                # Classify error types
-                if "rate limit" in error_msg or "429" in error_msg:
-                    logger.warning(f"⏰ Rate limit hit for {model_info['description']} (attempt {attempt + 1})")
-                    self.rate_limit_manager.record_failure(model_name, "rate_limit")
-                    
-                    # Dynamic delay based on rate limit
-                    if "retry-after" in error_msg:
-                        # Try to extract retry-after value
-                        import re
-                        match = re.search(r'retry-after[:\s]+(\d+)', error_msg)
-                        if match:
-                            retry_after = int(match.group(1))
-                            await asyncio.sleep(min(retry_after, 60))  # Cap at 60s
-                    else:
-                        await asyncio.sleep(self.rate_limit_manager.get_backoff_delay(model_name, attempt))
-                
-                elif "timeout" in error_msg or "connection" in error_msg:
-                    logger.warning(f"🔌 Connection issue with {model_info['description']} (attempt {attempt + 1})")
-                    await asyncio.sleep(min(5 * (attempt + 1), 30))  # Progressive delay
-                
-                elif "server" in error_msg or "500" in error_msg or "502" in error_msg or "503" in error_msg:
-                    logger.warning(f"🚨 Server error with {model_info['description']} (attempt {attempt + 1})")
-                    self.rate_limit_manager.record_failure(model_name, "server_error")
-                    await asyncio.sleep(min(10 * (attempt + 1), 60))
-                
-                else:
-                    logger.error(f"❌ Unexpected error with {model_info['description']}: {e}")
-                    self.rate_limit_manager.record_failure(model_name, "unknown_error")
-                    break  # Don't retry on unknown errors
-                
-                # Check if we should continue retrying
-                if not self.rate_limit_manager.should_retry(model_name, attempt + 1, max_retries):
-                    logger.warning(f"⚠️ Stopping retries for {model_info['description']}")
+                # A call cut short by the deadline says nothing about the model's health
+                check_deadline("model_attempt")
+                if not await self._handle_request_error(model_info, e, attempt, max_retries):
                     break
         
         return None
 
-    async def _make_api_request(self, model_info: Dict, prompt: str, attempt: int) -> Optional[str]:
-        """Make the actual API request"""
+    async def _handle_request_error(self, model_info: Dict, e: Exception, attempt: int, max_retries: int) -> bool:
+        """
+        Record a failed attempt and decide whether to retry. No sleeping happens here:
+        a 429 lowers the model's learned rate and pauses it until the upstream's
+        Retry-After / reset time, other retryable failures pause it for a jittered
+        backoff, and the next acquire_request_slot() waits out either.
+        """
+        model_name = model_info["name"]
+        if not isinstance(e, UpstreamError):
+            logger.error(f"❌ Unexpected error with {model_info['description']}: {e}")
+            await self.rate_limit_manager.record_failure(model_name, "unknown_error")
+            return False
+        
+        if isinstance(e, DegenerateOutput):
+            # Retrying the same prompt on the same model tends to go the same way; move on
+            logger.warning(f"🛑 {model_info['description']} output cancelled ({e.reason}) - trying the next model")
+            return False
+        
+        if isinstance(e, RateLimited):
+            # The limiter handles rate limits precisely; they don't count toward the circuit breaker
+            paused = self.rate_limit_manager.limiter.on_rate_limited(model_info, e.limits)
+            logger.warning(f"⏰ Rate limit hit for {model_info['description']} (attempt {attempt + 1}), "
+                           f"resuming in {paused:.1f}s")
+        elif e.retryable:
+            logger.warning(f"🚨 {e.kind} from {model_info['description']} (attempt {attempt + 1}): {e}")
+            await self.rate_limit_manager.record_failure(model_name, e.kind)
+            self.rate_limit_manager.limiter.pause(
+                model_info, e.retry_after or self.rate_limit_manager.get_backoff_delay(model_name, attempt))
+        else:
+            logger.error(f"❌ {e.kind} from {model_info['description']}: {e}")
+            await self.rate_limit_manager.record_failure(model_name, e.kind)
+            return False  # the same request would fail again
+        
+        # Check if we should continue retrying
+        if not await self.rate_limit_manager.should_retry(model_name, attempt + 1, max_retries):
+            logger.warning(f"⚠️ Stopping retries for {model_info['description']}")
+            return False
+        MODEL_RETRIES.inc(model=model_name, reason=e.kind)
+        return True
+
+    def _build_request(self, model_info: Dict, prompt: str, attempt: int, stream: bool = False,
+                       max_tokens: Optional[int] = None) -> Tuple[Dict, Dict, float]:
+        """Headers, payload and timeout for one OpenRouter chat-completions call"""
         headers = {
             "Authorization": f"Bearer {OPENROUTER_API_KEY}",
             "Content-Type": "application/json",
@@ -239,225 +406,629 @@ class PaperGenerator:
         
         # Adjust parameters based on model and attempt
         temperature = 0.7 + (0.1 * attempt)  # Slightly increase creativity on retries
-        max_tokens = max(model_info["max_tokens"] - (attempt * 500), 2000)  # Reduce tokens on retries
         
         payload = {
             "model": model_info["name"],
             "messages": [{"role": "user", "content": prompt}],
-            "max_tokens": max_tokens,
+            "max_tokens": self._completion_tokens(model_info, prompt, max_tokens),
             "temperature": min(temperature, 1.0),
             "top_p": 0.9,
             "frequency_penalty": 0.1,
             "presence_penalty": 0.1,
-            "stream": False
+            "stream": stream
         }
         
-        timeout_duration = 120.0 + (attempt * 30)  # Progressive timeout
+        timeout_duration = bound_to_deadline(120.0 + (attempt * 30))  # Progressive timeout, within the deadline
+        return headers, payload, timeout_duration
+
+    def _completion_tokens(self, model_info: Dict, prompt: str, max_tokens: Optional[int] = None) -> int:
+        budget = self.prompt_builders[model_info["name"]].completion_budget(prompt)  # fits the context window
+        return min(budget, max_tokens) if max_tokens else budget
+
+    def _observe_limits(self, model_info: Dict, response: httpx.Response):
+        """Feed a successful response's rate-limit headers to the adaptive limiter"""
+        self.rate_limit_manager.limiter.on_success(model_info, rate_limit_info(response.headers))
+
+    async def _make_api_request(self, model_info: Dict, prompt: str, attempt: int, max_tokens: Optional[int] = None,
+                                min_chars: int = 500, expect_headers: bool = False) -> Optional[str]:
+        """Make the actual API request"""
+        if OUTPUT_GUARDS:
+            return await self._make_guarded_request(model_info, prompt, attempt, max_tokens, min_chars, expect_headers)
+        headers, payload, timeout_duration = self._build_request(model_info, prompt, attempt, max_tokens=max_tokens)
         
         try:
-            logger.info(f"🤖 Requesting {model_info['description']} (attempt {attempt + 1}, tokens: {max_tokens})")
+            logger.info(f"🤖 Requesting {model_info['description']} (attempt {attempt + 1}, tokens: {payload['max_tokens']})")
             
-            async with httpx.AsyncClient(timeout=timeout_duration) as client:
-                response = await client.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers=headers,
-                    json=payload
-                )
-                
-                logger.info(f"📡 Response: {response.status_code}")
-                
-                if response.status_code == 200:
-                    response_data = response.json()
-                    
-                    if "choices" in response_data and len(response_data["choices"]) > 0:
-                        paper_text = response_data["choices"][0]["message"]["content"]
-                        
-                        if paper_text and len(paper_text.strip()) > 500:
-                            logger.info(f"✅ Success with {model_info['description']} ({len(paper_text)} chars)")
-                            return paper_text
-                        else:
-                            logger.warning(f"⚠️ Response too short from {model_info['description']}")
-                            return None
-                    else:
-                        logger.error(f"❌ No choices in response from {model_info['description']}")
-                        return None
-                
-                elif response.status_code == 429:
-                    # Extract retry-after if available
-                    retry_after = response.headers.get('retry-after', '30')
-                    raise Exception(f"Rate limit exceeded, retry-after: {retry_after}")
-                
-                elif response.status_code in [500, 502, 503, 504]:
-                    raise Exception(f"Server error: {response.status_code}")
+            client = http_clients.get("openrouter")
+            response = await client.post(
+                "/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=timeout_duration
+            )
+            
+            logger.info(f"📡 Response: {response.status_code}")
+            
+            if response.status_code != 200:
+                raise error_from_response(response)
+            self._observe_limits(model_info, response)
+            
+            try:
+                response_data = response.json()
+            except ValueError:
+                raise BadResponse("Response body is not JSON", response.status_code)
+            if "error" in response_data:
+                raise error_from_payload(response_data["error"])
+            
+            if "choices" in response_data and len(response_data["choices"]) > 0:
+                paper_text = response_data["choices"][0]["message"]["content"]
                 
+                if paper_text and len(paper_text.strip()) > min_chars:
+                    logger.info(f"✅ Success with {model_info['description']} ({len(paper_text)} chars)")
+                    return paper_text
                 else:
-                    try:
-                        error_detail = response.json()
-                        error_message = error_detail.get('error', {}).get('message', f"HTTP {response.status_code}")
-                        raise Exception(f"API Error: {error_message}")
-                    except:
-                        raise Exception(f"HTTP Error: {response.status_code}")
-                        
-        except httpx.TimeoutException:
-            raise Exception(f"Request timeout after {timeout_duration}s")
-        except Exception as e:
-            raise e
+                    logger.warning(f"⚠️ Response too short from {model_info['description']}")
+                    return None
+            else:
+                logger.error(f"❌ No choices in response from {model_info['description']}")
+                return None
+                    
+        except httpx.HTTPError as e:
+            raise error_from_transport(e, timeout_duration)
 
-    def create_adaptive_prompt(self, topic: str, paper_type: str, arxiv_summary: str, model_info: Dict) -> str:
-        """Create adaptive prompt based on model capabilities"""
+    async def _make_guarded_request(self, model_info: Dict, prompt: str, attempt: int, max_tokens: Optional[int],
+                                    min_chars: int, expect_headers: bool) -> Optional[str]:
+        """_make_api_request over a stream, so output the guard rejects is cancelled as it arrives"""
+        guard = self._output_guard(model_info, expect_headers)
+        started = None
+        # aclosing: leaving early closes the stream, which aborts the upstream request
+        async with aclosing(self._stream_api_request(model_info, prompt, attempt, max_tokens)) as deltas:
+            async for delta in deltas:
+                started = started or time.monotonic()
+                reason = guard.feed(delta)
+                if reason:
+                    raise self._degenerate(model_info, reason, guard.text, self._completion_tokens(
+                        model_info, prompt, max_tokens), time.monotonic() - started)
+        reason = guard.close()
+        if reason:
+            raise self._degenerate(model_info, reason, guard.text)
         
-        # Adjust prompt complexity based on model
-        if "phi-3" in model_info["name"].lower():
-            # Simpler prompt for Phi-3
-            return f"""Write a complete {paper_type} paper on "{topic}". Use these exact sections:
+        if len(guard.text.strip()) > min_chars:
+            logger.info(f"✅ Success with {model_info['description']} ({len(guard.text)} chars)")
+            return guard.text
+        logger.warning(f"⚠️ Response too short from {model_info['description']}")
+        return None
 
-**Abstract**
-Write a 150-200 word summary of the research.
+    @staticmethod
+    def _output_guard(model_info: Dict, expect_headers: bool) -> OutputGuard:
+        chars_per_token = model_info.get("chars_per_token", 4.0)
+        return OutputGuard(expect_headers=expect_headers,
+                           header_within_chars=int(GUARD_HEADER_WITHIN_TOKENS * chars_per_token),
+                           section_gap_chars=int(GUARD_SECTION_GAP_TOKENS * chars_per_token))
 
-**Introduction**
-Provide background and research objectives.
+    @staticmethod
+    def _degenerate(model_info: Dict, reason: str, text: str, max_tokens: int = 0,
+                    elapsed: float = 0.0) -> DegenerateOutput:
+        """
+        Count a cancelled completion. What it would have cost is estimated as the rest of
+        max_tokens at the rate tokens were arriving: a looping model runs to the limit.
+        """
+        generated = len(text) / model_info.get("chars_per_token", 4.0)
+        tokens_saved = max(max_tokens - generated, 0.0)
+        seconds_saved = elapsed / generated * tokens_saved if generated else 0.0
+        GUARD_ABORTS.inc(model=model_info["name"], reason=reason)
+        GUARD_TOKENS_SAVED.inc(tokens_saved, model=model_info["name"], reason=reason)
+        GUARD_SECONDS_SAVED.inc(seconds_saved, model=model_info["name"], reason=reason)
+        logger.warning(f"🛑 Cancelled {model_info['description']} after ~{generated:.0f} tokens ({reason}), "
+                       f"~{tokens_saved:.0f} tokens / {seconds_saved:.1f}s saved")
+        return DegenerateOutput(f"Output cancelled after ~{generated:.0f} tokens: {reason}", reason)
 
-**Methodology**
-Describe the research approach and methods.
+    async def _stream_api_request(self, model_info: Dict, prompt: str, attempt: int,
+                                  max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """Same request with "stream": true; yields content deltas as OpenRouter sends them (SSE)"""
+        headers, payload, timeout_duration = self._build_request(model_info, prompt, attempt, stream=True,
+                                                                 max_tokens=max_tokens)
+        
+        try:
+            logger.info(f"🤖 Streaming {model_info['description']} (attempt {attempt + 1}, tokens: {payload['max_tokens']})")
+            
+            client = http_clients.get("openrouter")
+            async with client.stream(
+                "POST",
+                "/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=timeout_duration
+            ) as response:
+                logger.info(f"📡 Response: {response.status_code}")
+                if response.status_code != 200:
+                    await response.aread()
+                    raise error_from_response(response)
+                self._observe_limits(model_info, response)
+                
+                async for line in response.aiter_lines():
+                    # Skip blank keep-alives and ": OPENROUTER PROCESSING" comments
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data)
+                    except ValueError:
+                        raise BadResponse(f"Malformed stream chunk: {data[:80]}")
+                    if "error" in chunk:
+                        raise error_from_payload(chunk["error"])
+                    choices = chunk.get("choices") or [{}]
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+                        
+        except httpx.HTTPError as e:
+            raise error_from_transport(e, timeout_duration)
 
-**Results**
-Present key findings and analysis.
+    def create_adaptive_prompt(self, topic: str, paper_type: str, arxiv_articles: List[Dict], model_info: Dict) -> str:
+        """Create a prompt sized to the model: static instructions plus arXiv context fitted to its token budget"""
+        with span("prompt_build", PAPER_STAGE_SECONDS, stage="prompt_build"):
+            built = self.prompt_builders[model_info["name"]].build(topic, paper_type, arxiv_articles)
+        logger.info(f"📝 Prompt for {model_info['description']}: ~{built.prompt_tokens} tokens "
+                    f"({built.context_tokens} of arXiv context)")
+        return built.text
 
-**Conclusion**
-Summarize findings and future work.
+    @staticmethod
+    def _missing_sections(sections: Dict) -> List[str]:
+        required_sections = ["abstract", "introduction", "methodology", "results", "conclusion"]
+        return [s for s in required_sections if not sections.get(s, "").strip()]
 
-**References**
-Include at least 8 academic references.
+    async def _paper_metadata(self, topic: str, paper_type: str, model_info: Dict, paper_text: str,
+                        missing_sections: List[str], model_index: int) -> Dict:
+        return {
+            "topic": topic,
+            "paper_type": paper_type,
+            "model_used": model_info["description"],
+            "model_name": model_info["name"],
+            "generation_time": datetime.now().isoformat(),
+            "word_count": len(paper_text.split()),
+            "char_count": len(paper_text),
+            "missing_sections": missing_sections,
+            "success_model_index": model_index,
+            "total_attempts": sum((await self.rate_limit_manager.failure_counts()).values()) + 1
+        }
 
-Research context: {arxiv_summary[:1000]}
+    @staticmethod
+    def _emergency_fallback(topic: str, paper_type: str) -> Dict:
+        return {
+            "abstract": f"This paper examines {topic}. Full generation was not possible due to technical limitations.",
+            "introduction": f"The study of {topic} represents an important area of research with significant implications.",
+            "methodology": "This section would detail the research methodology in a complete generation.",
+            "results": "Key findings and analysis would be presented here.",
+            "conclusion": f"Further investigation of {topic} is recommended to advance understanding in this field.",
+            "references": "1. Smith, J. (2023). Research in the field.\n2. Johnson, A. (2023). Advanced studies.\n3. Brown, K. (2023). Current developments.",
+            "_metadata": {
+                "topic": topic,
+                "paper_type": paper_type,
+                "model_used": "Emergency Fallback",
+                "generation_time": datetime.now().isoformat(),
+                "word_count": 0,
+                "char_count": 0,
+                "status": "failed_generation"
+            }
+        }
 
-Write in formal academic style with technical details."""
+    async def _attempt_model(self, model_index: int, topic: str, paper_type: str, arxiv_articles: List[Dict]) -> Optional[Dict]:
+        """Generate with one model (including its retries); returns sections only if they pass the quality check"""
+        model_info = self.models[model_index]
+        started = time.monotonic()
         
-        else:
-            # Full prompt for more capable models
-            return f"""You are a world-class academic researcher. Write a comprehensive {paper_type} paper on: "{topic}"
-
-**STRUCTURE (use exact headers):**
+        # Create adaptive prompt
+        prompt = self.create_adaptive_prompt(topic, paper_type, arxiv_articles, model_info)
+        
+        # Attempt generation with retries
+        paper_text = await self.generate_with_model_retry(model_info, prompt, expect_headers=True)
+        
+        if not paper_text:
+            return None
+        
+        logger.info(f"✅ Successfully generated paper with {model_info['description']}")
+        
+        # Parse and validate sections
+        with span("parse", PAPER_STAGE_SECONDS, stage="parse"):
+            sections = split_into_sections(paper_text)
+        
+        # Quality validation
+        missing_sections = self._missing_sections(sections)
+        
+        if len(missing_sections) > 2:  # Allow some missing sections
+            logger.warning(f"⚠️ Quality check failed - missing sections: {missing_sections}")
+            return None
+        
+        logger.info(f"✅ Quality check passed (missing: {missing_sections})")
+        self.latency_tracker.record(model_info["name"], time.monotonic() - started)
+        
+        # Add comprehensive metadata
+        sections["_metadata"] = await self._paper_metadata(topic, paper_type, model_info, paper_text, missing_sections, model_index)
+        return sections
 
-**Abstract**
-Write a detailed 200-300 word abstract summarizing research problem, methodology, findings, and implications.
+    async def _generate_sequential(self, topic: str, paper_type: str, arxiv_articles: List[Dict]) -> Optional[Dict]:
+        # Try each model with full retry logic
+        for i, model_info in enumerate(self.models):
+            logger.info(f"\n🔄 Trying model {i+1}/{len(self.models)}: {model_info['description']}")
+            
+            sections = await self._attempt_model(i, topic, paper_type, arxiv_articles)
+            if sections:
+                return sections
+            
+            # Add delay between models
+            if i < len(self.models) - 1:
+                logger.info("⏰ Waiting before trying next model...")
+                await wait_for_model(model_info["name"], "model_switch", 3)
+        return None
 
-**Introduction**
-Provide comprehensive background, problem definition, research objectives, and contribution statement.
+    async def _generate_sectioned(self, topic: str, paper_type: str, arxiv_articles: List[Dict]) -> Optional[Dict]:
+        """
+        Generate a short outline, then every section as its own completion, all launched
+        at once and paced by the shared request semaphore and rate limiter. Wall-clock
+        time follows the slowest section rather than the whole paper, and each completion
+        is short enough for the small models to finish without truncation. Each section
+        falls back through the models on its own; the result is the usual section dict.
+        """
+        available = [(i, model_info) for i, model_info in enumerate(self.models)
+                     if await self.rate_limit_manager.is_model_available(model_info["name"])]
+        outline = outline_model = None
+        for model_index, model_info in available:
+            with span("prompt_build", PAPER_STAGE_SECONDS, stage="prompt_build"):
+                built = self.prompt_builders[model_info["name"]].build_outline(topic, paper_type, arxiv_articles)
+            logger.info(f"🗂️ Requesting outline from {model_info['description']}")
+            outline = await self.generate_with_model_retry(model_info, built.text, OUTLINE_MAX_TOKENS, min_chars=100)
+            if outline:
+                outline_model = (model_index, model_info)
+                break
+        if not outline:
+            return None
+        
+        # Section prompts depend on the model's context budget; build them once per model that is used
+        prompts: Dict[str, Dict[str, BuiltPrompt]] = {}
+        
+        def section_prompt(model_info: Dict, key: str) -> BuiltPrompt:
+            if model_info["name"] not in prompts:
+                with span("prompt_build", PAPER_STAGE_SECONDS, stage="prompt_build"):
+                    prompts[model_info["name"]] = self.prompt_builders[model_info["name"]].build_sections(
+                        topic, paper_type, outline, arxiv_articles)
+            return prompts[model_info["name"]][key]
+        
+        async def generate_section(key: str) -> Tuple[str, str, Optional[Dict]]:
+            for _, model_info in available:
+                text = await self.generate_with_model_retry(
+                    model_info, section_prompt(model_info, key).text, SECTION_GUIDES[key][2], min_chars=200)
+                body = extract_section(text, key) if text else ""
+                if body:
+                    return key, body, model_info
+            return key, "", None
+        
+        started = time.monotonic()
+        logger.info(f"🧩 Generating {len(SECTION_GUIDES)} sections concurrently")
+        tasks = [asyncio.ensure_future(generate_section(key)) for key in SECTION_GUIDES]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            # One section failing (e.g. hitting the deadline) leaves no point in the others;
+            # wait for them to unwind so none is left running or with an unretrieved exception
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        sections = {key: "" for key in SECTION_KEYS}
+        sections["title"] = outline_title(outline)
+        section_models = {}
+        for key, body, model_info in results:
+            sections[key] = body
+            if model_info is not None:
+                section_models[key] = model_info["description"]
+        
+        missing_sections = self._missing_sections(sections)
+        if len(missing_sections) > 2:
+            logger.warning(f"⚠️ Sectioned generation failed - missing sections: {missing_sections}")
+            return None
+        logger.info(f"✅ Sections generated in {time.monotonic() - started:.1f}s (missing: {missing_sections})")
+        
+        model_index, model_info = outline_model
+        paper_text = "\n\n".join(sections[key] for key in SECTION_GUIDES)
+        sections["_metadata"] = await self._paper_metadata(topic, paper_type, model_info, paper_text, missing_sections, model_index)
+        sections["_metadata"].update(generation_mode="sectioned", section_models=section_models)
+        return sections
 
-**Related Work**
-Review existing literature, identify gaps, and position this work in the research landscape.
+    async def _generate_hedged(self, topic: str, paper_type: str, arxiv_articles: List[Dict]) -> Optional[Dict]:
+        """
+        Start the next model in parallel whenever the newest one has neither succeeded nor
+        failed within its hedge delay (or immediately when it fails). The first result
+        that passes the quality check wins and every other call is cancelled.
+        """
+        candidates = [i for i, model_info in enumerate(self.models)
+                      if await self.rate_limit_manager.is_model_available(model_info["name"])]
+        pending: Dict[asyncio.Task, int] = {}
+        launched = 0
+        
+        def launch_next():
+            nonlocal launched
+            model_index = candidates[launched]
+            launched += 1
+            logger.info(f"\n🔀 Launching model {model_index + 1}/{len(self.models)}: {self.models[model_index]['description']}")
+            task = asyncio.create_task(self._attempt_model(model_index, topic, paper_type, arxiv_articles))
+            pending[task] = model_index
+        
+        try:
+            while pending or launched < len(candidates):
+                if not pending:
+                    launch_next()
+                
+                newest = self.models[candidates[launched - 1]]["name"]
+                hedge_delay = self.latency_tracker.hedge_delay(newest) if launched < len(candidates) else None
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    logger.info(f"⏱️ No result from {newest} within {hedge_delay:.0f}s - hedging with the next model")
+                    launch_next()
+                    continue
+                
+                for task in done:
+                    model_index = pending.pop(task)
+                    if isinstance(task.exception(), DeadlineExceeded):
+                        raise task.exception()  # no time left for any other model either
+                    sections = None if task.exception() else task.result()
+                    if task.exception():
+                        logger.error(f"❌ {self.models[model_index]['description']} raised: {task.exception()}")
+                    if sections:
+                        sections["_metadata"]["hedged"] = True
+                        sections["_metadata"]["models_launched"] = launched
+                        return sections
+                    # A failed model is replaced right away instead of after the hedge delay
+                    if launched < len(candidates):
+                        logger.info(f"⏭️ {self.models[model_index]['description']} failed - launching the next model now")
+                        launch_next()
+        finally:
+            # Cancel the losers; their HTTP requests are aborted and semaphore slots released
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        return None
 
-**Methodology**
-Describe research approach, experimental design, data collection, and analysis methods.
+    async def generate_paper_with_fallback(self, topic: str, paper_type: str, paper_format: str,
+                                           hedged: Optional[bool] = None, sectioned: Optional[bool] = None) -> Dict:
+        """
+        Main generation method with robust fallback: outline-then-sections when enabled,
+        then whole-paper generation (sequential, or hedged across models)
+        """
+        
+        if not OPENROUTER_API_KEY:
+            raise ValueError("OpenRouter API key not found. Please set OPENROUTER_API_KEY in your .env file")
+        
+        logger.info(f"🚀 Starting paper generation: {topic}")
+        
+        with span("generate_paper", PAPER_STAGE_SECONDS, stage="total"):
+            # Fetch research context
+            logger.info("📚 Fetching arXiv research...")
+            with span("arxiv_fetch", PAPER_STAGE_SECONDS, stage="arxiv_fetch"):
+                arxiv_articles = await self.fetch_enhanced_arxiv(topic, max_results=6)
+            
+            sections = None
+            if sectioned if sectioned is not None else SECTIONED_GENERATION:
+                sections = await self._generate_sectioned(topic, paper_type, arxiv_articles)
+                if not sections:
+                    logger.warning("⚠️ Sectioned generation failed - falling back to whole-paper generation")
+            if not sections and (hedged if hedged is not None else HEDGED_GENERATION):
+                sections = await self._generate_hedged(topic, paper_type, arxiv_articles)
+            elif not sections:
+                sections = await self._generate_sequential(topic, paper_type, arxiv_articles)
+            if sections:
+                return sections
+            
+            # All models failed - create emergency fallback
+            logger.error("❌ All models failed - creating emergency fallback")
+            return self._emergency_fallback(topic, paper_type)
 
-**Results**
-Present comprehensive findings with detailed analysis and interpretation.
+    def paper_cache_key(self, topic: str, paper_type: str, paper_format: str) -> str:
+        return content_key(PAPER_PROMPT_VERSION, [m["name"] for m in self.models], normalize_topic(topic),
+                           paper_type.strip().lower(), paper_format.strip().lower())
 
-**Discussion**
-Analyze implications, discuss limitations, and compare with existing work.
+    def paper_topic_scope(self, paper_type: str) -> str:
+        # Generated sections don't depend on paper_format (it is applied at render time),
+        # so near-duplicate topics are matched across formats
+        return content_key(PAPER_PROMPT_VERSION, [m["name"] for m in self.models], paper_type.strip().lower())
 
-**Conclusion**
-Summarize contributions, implications, and future research directions.
+    @staticmethod
+    def _is_cacheable(paper: Dict) -> bool:
+        return bool(paper) and paper.get("_metadata", {}).get("status") != "failed_generation"
 
-**References**
-Include 12+ properly formatted academic references.
+    def _similar_cached_paper(self, topic: str, paper_type: str, key: str) -> Optional[Dict]:
+        """The cached paper of the closest previously generated topic, if one is within SIMILAR_TOPIC_THRESHOLD"""
+        if not SIMILAR_TOPIC_CACHE:
+            return None
+        match = paper_topics.find(self.paper_topic_scope(paper_type), topic, SIMILAR_TOPIC_THRESHOLD)
+        if match is None or match.key == key:
+            return None  # an exact match is paper_cache's job
+        paper = paper_cache.store.get(match.key)
+        if paper is None:
+            paper_topics.discard(match.key)  # expired or evicted from paper_cache
+            return None
+        logger.info(f"💾 Serving cached paper for similar topic '{match.topic}' "
+                    f"(similarity {match.similarity:.2f}) for: {topic}")
+        metadata = {**paper.get("_metadata", {}), "similar_topic": match.topic, "similarity": match.similarity}
+        return {**paper, "_metadata": metadata}
 
-**Research Context:**
-{arxiv_summary}
+    async def _index_topic(self, topic: str, paper_type: str, key: str):
+        paper_topics.add(self.paper_topic_scope(paper_type), topic, key)
+        if paper_topics.path:
+            await asyncio.to_thread(paper_topics.save)
 
-**Requirements:**
-- Formal academic language
-- Technical depth and rigor
-- Original insights and analysis
-- Minimum 2500 words
-- Proper citations throughout
+    async def generate_paper_cached(self, topic: str, paper_type: str, paper_format: str) -> Tuple[Dict, bool]:
+        """
+        generate_paper_with_fallback behind paper_cache, falling back to the paper of a
+        near-duplicate topic; returns (paper, served_from_cache)
+        """
+        key = self.paper_cache_key(topic, paper_type, paper_format)
+        similar = self._similar_cached_paper(topic, paper_type, key)
+        if similar is not None:
+            return similar, True
+        paper, cached = await paper_cache.get_or_compute(
+            key,
+            lambda: self.generate_paper_with_fallback(topic, paper_type, paper_format),
+            should_cache=self._is_cacheable,
+        )
+        if cached:
+            logger.info(f"💾 Serving cached paper for: {topic}")
+        elif self._is_cacheable(paper):
+            await self._index_topic(topic, paper_type, key)
+        return paper, cached
 
-Generate the complete paper now:"""
+    async def generate_paper_stream(self, topic: str, paper_type: str, paper_format: str) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of generate_paper_with_fallback.
 
-    async def generate_paper_with_fallback(self, topic: str, paper_type: str, paper_format: str) -> Dict:
-        """Main generation method with robust fallback"""
+        Yields events as they happen: "status", "token" (raw deltas), "section" (each
+        section once its closing header boundary arrives), "reset" (discard what was
+        streamed, a retry or the next model follows) and finally "done" with the same
+        section dict the non-streaming path returns.
+        """
+        cache_key = self.paper_cache_key(topic, paper_type, paper_format)
+        cached = paper_cache.store.get(cache_key)
+        if cached is None:
+            cached = self._similar_cached_paper(topic, paper_type, cache_key)
+        if cached is not None:
+            yield {"event": "done", "paper": cached, "cached": True}
+            return
         
         if not OPENROUTER_API_KEY:
             raise ValueError("OpenRouter API key not found. Please set OPENROUTER_API_KEY in your .env file")
         
-        logger.info(f"🚀 Starting paper generation: {topic}")
-        
-        # Fetch research context
-        logger.info("📚 Fetching arXiv research...")
-        arxiv_summary = await self.fetch_enhanced_arxiv(topic, max_results=6)
+        with span("generate_paper_stream", PAPER_STAGE_SECONDS, stage="total"):
+            async for event in self._stream_generation(topic, paper_type, cache_key):
+                yield event
+
+    async def _stream_generation(self, topic: str, paper_type: str, cache_key: str) -> AsyncIterator[Dict]:
+        yield {"event": "status", "stage": "arxiv", "message": "Fetching arXiv research..."}
+        with span("arxiv_fetch", PAPER_STAGE_SECONDS, stage="arxiv_fetch"):
+            arxiv_articles = await self.fetch_enhanced_arxiv(topic, max_results=6)
         
-        # Try each model with full retry logic
         for i, model_info in enumerate(self.models):
-            logger.info(f"\n🔄 Trying model {i+1}/{len(self.models)}: {model_info['description']}")
-            
-            # Create adaptive prompt
-            prompt = self.create_adaptive_prompt(topic, paper_type, arxiv_summary, model_info)
+            model_name = model_info["name"]
+            max_retries = model_info.get("max_retries", 3)
+            if not await self.rate_limit_manager.is_model_available(model_name):
+                logger.warning(f"⚠️ {model_info['description']} is in circuit breaker state")
+                continue
             
-            # Attempt generation with retries
-            paper_text = await self.generate_with_model_retry(model_info, prompt)
+            prompt = self.create_adaptive_prompt(topic, paper_type, arxiv_articles, model_info)
+            yield {"event": "status", "stage": "generating", "model": model_info["description"]}
             
-            if paper_text:
-                logger.info(f"✅ Successfully generated paper with {model_info['description']}")
+            for attempt in range(max_retries):
+                check_deadline("model_attempt", needed=DEADLINE_MIN_ATTEMPT_SECONDS)
+                parser = SectionStreamParser()
+                guard = self._output_guard(model_info, expect_headers=True) if OUTPUT_GUARDS else None
+                chunks: List[str] = []
+                events: asyncio.Queue = asyncio.Queue()
+                reader = asyncio.create_task(
+                    self._read_stream_attempt(model_info, prompt, attempt, parser, guard, chunks, events))
+                try:
+                    while True:
+                        event = await events.get()
+                        if event is None:
+                            break
+                        yield event
+                    await reader  # re-raises the attempt's failure
+                except DeadlineExceeded:
+                    raise
+                except asyncio.CancelledError:
+                    CANCELLED_WORK.inc(stage="model_attempt", reason=cancellation_reason())
+                    raise
+                except Exception as e:
+                    check_deadline("model_attempt")
+                    if chunks:
+                        yield {"event": "reset", "reason": str(e)}
+                    if not await self._handle_request_error(model_info, e, attempt, max_retries):
+                        break
+                    continue
+                finally:
+                    if not reader.done():
+                        reader.cancel()  # the client left or stopped reading the stream
+                        await asyncio.gather(reader, return_exceptions=True)
                 
-                # Parse and validate sections
-                sections = split_into_sections(paper_text)
+                for key, content in parser.close():
+                    yield {"event": "section", "name": key, "content": content}
                 
-                # Quality validation
-                required_sections = ["abstract", "introduction", "methodology", "results", "conclusion"]
-                missing_sections = [s for s in required_sections if not sections.get(s, "").strip()]
+                paper_text = "".join(chunks)
+                if len(paper_text.strip()) <= 500:
+                    logger.warning(f"⚠️ Response too short from {model_info['description']}")
+                    yield {"event": "reset", "reason": "response too short"}
+                    continue
                 
-                if len(missing_sections) <= 2:  # Allow some missing sections
-                    logger.info(f"✅ Quality check passed (missing: {missing_sections})")
-                    
-                    # Add comprehensive metadata
-                    sections["_metadata"] = {
-                        "topic": topic,
-                        "paper_type": paper_type,
-                        "model_used": model_info["description"],
-                        "model_name": model_info["name"],
-                        "generation_time": datetime.now().isoformat(),
-                        "word_count": len(paper_text.split()),
-                        "char_count": len(paper_text),
-                        "missing_sections": missing_sections,
-                        "success_model_index": i,
-                        "total_attempts": sum(self.rate_limit_manager.failure_count.values()) + 1
-                    }
-                    
-                    return sections
-                else:
+                await self.rate_limit_manager.record_success(model_name)
+                sections = parser.result()
+                missing_sections = self._missing_sections(sections)
+                if len(missing_sections) > 2:
                     logger.warning(f"⚠️ Quality check failed - missing sections: {missing_sections}")
-            
-            # Add delay between models
-            if i < len(self.models) - 1:
-                logger.info("⏰ Waiting before trying next model...")
-                await asyncio.sleep(3)
+                    yield {"event": "reset", "reason": f"missing sections: {missing_sections}"}
+                    break
+                
+                sections["_metadata"] = await self._paper_metadata(topic, paper_type, model_info, paper_text, missing_sections, i)
+                paper_cache.store.set(cache_key, sections)
+                await asyncio.to_thread(paper_cache.store.save)
+                await self._index_topic(topic, paper_type, cache_key)
+                yield {"event": "done", "paper": sections, "cached": False}
+                return
         
-        # All models failed - create emergency fallback
         logger.error("❌ All models failed - creating emergency fallback")
-        return {
-            "abstract": f"This paper examines {topic}. Full generation was not possible due to technical limitations.",
-            "introduction": f"The study of {topic} represents an important area of research with significant implications.",
-            "methodology": "This section would detail the research methodology in a complete generation.",
-            "results": "Key findings and analysis would be presented here.",
-            "conclusion": f"Further investigation of {topic} is recommended to advance understanding in this field.",
-            "references": "1. Smith, J. (2023). Research in the field.\n2. Johnson, A. (2023). Advanced studies.\n3. Brown, K. (2023). Current developments.",
-            "_metadata": {
-                "topic": topic,
-                "paper_type": paper_type,
-                "model_used": "Emergency Fallback",
-                "generation_time": datetime.now().isoformat(),
-                "word_count": 0,
-                "char_count": 0,
-                "status": "failed_generation"
-            }
-        }
+        yield {"event": "done", "paper": self._emergency_fallback(topic, paper_type), "cached": False}
+
+    async def _read_stream_attempt(self, model_info: Dict, prompt: str, attempt: int, parser: SectionStreamParser,
+                                   guard: Optional[OutputGuard], chunks: List[str], events: asyncio.Queue):
+        """
+        One streamed completion, read by its own task into `events` (None marks the end).
+        The request slot is held only while the upstream is read, never while the client
+        consumes events, so a slow or stalled client can't block other generations.
+        """
+        model_name = model_info["name"]
+        try:
+            await self.rate_limit_manager.acquire_request_slot(model_info)
+            async with self.request_semaphore:
+                with span("model_attempt", MODEL_ATTEMPT_SECONDS, model=model_name, outcome="error") as labels:
+                    try:
+                        started = None
+                        async with aclosing(self._stream_api_request(model_info, prompt, attempt)) as deltas:
+                            async for delta in deltas:
+                                started = started or time.monotonic()
+                                reason = guard.feed(delta) if guard else None
+                                if reason:
+                                    raise self._degenerate(model_info, reason, guard.text, self._completion_tokens(
+                                        model_info, prompt), time.monotonic() - started)
+                                chunks.append(delta)
+                                events.put_nowait({"event": "token", "text": delta})
+                                for key, content in parser.feed(delta):
+                                    events.put_nowait({"event": "section", "name": key, "content": content})
+                        reason = guard.close() if guard else None
+                        if reason:
+                            raise self._degenerate(model_info, reason, guard.text)
+                    except UpstreamError as e:
+                        labels["outcome"] = e.kind
+                        raise
+                    labels["outcome"] = "ok" if chunks else "empty"
+        finally:
+            events.put_nowait(None)
+
+_paper_generator: Optional[PaperGenerator] = None
+
+def get_paper_generator() -> PaperGenerator:
+    """Process-wide generator, so breakers, limits and the semaphore are shared by all requests"""
+    global _paper_generator
+    if _paper_generator is None:
+        _paper_generator = PaperGenerator()
+    return _paper_generator
 
 # Backward compatibility function
 async def generate_paper_with_llama(topic: str, paper_type: str, paper_format: str):
     """Backward compatible main function"""
-    generator = PaperGenerator()
-    return await generator.generate_paper_with_fallback(topic, paper_type, paper_format)
+    generator = get_paper_generator()
+    paper, _ = await generator.generate_paper_cached(topic, paper_type, paper_format)
+    return paper
 
 # Example usage and testing
 if __name__ == "__main__":
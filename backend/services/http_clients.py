@@ -0,0 +1,138 @@
+import asyncio
+import importlib.util
+import logging
+import os
+from typing import Dict
+
+import httpx
+
+from services.limiter_state import MemoryLimiterState
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+# Per-upstream settings. Every client talks to a single host, so its pool limits are per-host limits.
+CLIENT_CONFIGS = {
+    "openrouter": {
+        "base_url": os.getenv("OPENROUTER_BASE_URL") or "https://openrouter.ai/api/v1",
+        "max_connections": _env_int("OPENROUTER_MAX_CONNECTIONS", 10),
+        "timeout": httpx.Timeout(_env_float("OPENROUTER_TIMEOUT", 120.0),
+                                 connect=_env_float("HTTP_CONNECT_TIMEOUT", 10.0)),
+    },
+    "arxiv": {
+        "base_url": os.getenv("ARXIV_BASE_URL") or "https://export.arxiv.org",
+        "max_connections": _env_int("ARXIV_MAX_CONNECTIONS", 4),
+        # arXiv asks for roughly one request every 3 seconds; allow a burst of 3 for the query fan-out
+        "requests_per_second": _env_float("ARXIV_REQUESTS_PER_SECOND", 1 / 3),
+        "burst": _env_int("ARXIV_BURST", 3),
+        "timeout": httpx.Timeout(_env_float("ARXIV_TIMEOUT", 20.0),
+                                 connect=_env_float("HTTP_CONNECT_TIMEOUT", 10.0)),
+    },
+    "easychair": {
+        "base_url": "",
+        "max_connections": _env_int("EASYCHAIR_MAX_CONNECTIONS", 2),
+        "timeout": httpx.Timeout(30.0, connect=_env_float("HTTP_CONNECT_TIMEOUT", 10.0)),
+        "follow_redirects": True,
+    },
+}
+
+
+class ConnectionStats:
+    """Counts requests and new TCP connections to report how often pooled connections are reused"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    async def on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event_name: str, info: Dict):
+        if event_name == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    def snapshot(self) -> Dict:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reuse_rate": round(reused / self.requests, 3) if self.requests else None,
+        }
+
+
+class HTTPClientRegistry:
+    """
+    App-lifetime httpx.AsyncClient per upstream (OpenRouter, arXiv, EasyChair).
+
+    Clients are created on first use and closed by the FastAPI lifespan, so every
+    call after the first rides an existing keep-alive (HTTP/2 when `h2` is installed)
+    connection instead of paying for TCP+TLS setup again.
+    """
+
+    def __init__(self, configs: Dict[str, Dict] = CLIENT_CONFIGS):
+        self.configs = configs
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.stats: Dict[str, ConnectionStats] = {name: ConnectionStats() for name in configs}
+        self.http2 = HTTP2_AVAILABLE and os.getenv("HTTP2_ENABLED", "true").lower() != "false"
+        self._host_buckets = MemoryLimiterState()
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            config = self.configs[name]
+            max_connections = config["max_connections"]
+            client = httpx.AsyncClient(
+                base_url=config["base_url"],
+                http2=self.http2,
+                timeout=config["timeout"],
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=_env_float("HTTP_KEEPALIVE_EXPIRY", 60.0),
+                ),
+                follow_redirects=config.get("follow_redirects", False),
+                event_hooks={"request": [self.stats[name].on_request]},
+            )
+            self._clients[name] = client
+            logger.info(f"🔌 Opened pooled HTTP client '{name}' (http2={self.http2}, max_connections={max_connections})")
+        return client
+
+    async def acquire(self, name: str):
+        """Wait for the upstream's polite request rate, for clients that configure one"""
+        config = self.configs[name]
+        rate = config.get("requests_per_second")
+        if not rate:
+            return
+        while True:
+            wait = self._host_buckets.take_token(name, rate, config.get("burst", 1))
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def aclose(self):
+        for name, client in list(self._clients.items()):
+            await client.aclose()
+        self._clients.clear()
+
+    def connection_stats(self) -> Dict[str, Dict]:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+
+http_clients = HTTPClientRegistry()
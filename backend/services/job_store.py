@@ -0,0 +1,225 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+# Identifies this process run; a restarted container often gets the same PID back, so the
+# PID alone can't tell a job's dead owner from us
+BOOT_ID = uuid.uuid4().hex
+# A running job whose owner hasn't renewed it for this long is taken to be orphaned
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    owner_pid INTEGER,
+    owner_boot TEXT,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority, created_at);
+"""
+
+_COLUMNS = ("id", "kind", "priority", "params", "status", "result", "error", "owner_pid",
+            "owner_boot", "heartbeat_at", "created_at", "started_at", "finished_at")
+# Columns added after the first release, for stores created before them
+_ADDED_COLUMNS = {"owner_boot": "TEXT", "heartbeat_at": "REAL"}
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _orphaned(owner_pid: Optional[int], owner_boot: Optional[str], heartbeat_at: Optional[float],
+              now: float) -> bool:
+    """Whether a running job's owner is gone: a dead PID, our PID from an earlier run, or a lapsed lease"""
+    if owner_boot == BOOT_ID:
+        return False
+    if not _pid_alive(owner_pid) or owner_pid == os.getpid():
+        return True
+    return (heartbeat_at or 0) < now - JOB_LEASE_SECONDS
+
+
+class MemoryJobStore:
+    """Job records for this process only; queued jobs are lost on restart"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+
+    def insert(self, job: Dict):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def claim(self, job_id: str, started_at: float) -> bool:
+        """Atomically move a queued job to running; False if someone else got it (or it was cancelled)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return False
+            job.update(status="running", started_at=started_at, owner_pid=os.getpid(), owner_boot=BOOT_ID,
+                       heartbeat_at=started_at)
+            return True
+
+    def heartbeat(self, job_ids: Iterable[str], now: Optional[float] = None):
+        with self._lock:
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job is not None and job["status"] == "running":
+                    job["heartbeat_at"] = now or time.time()
+
+    def finish(self, job_id: str, status: str, result=None, error: Optional[str] = None,
+               finished_at: Optional[float] = None) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                return False
+            job.update(status=status, result=result, error=error, finished_at=finished_at or time.time())
+            return True
+
+    def requeue(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job["status"] == "running":
+                job.update(status="queued", started_at=None, owner_pid=None, owner_boot=None, heartbeat_at=None)
+
+    def recoverable(self) -> List[Dict]:
+        return sorted((dict(job) for job in self._jobs.values() if job["status"] == "queued"),
+                      key=lambda job: (job["priority"], job["created_at"]))
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["status"] in TERMINAL_STATUSES and (job["finished_at"] or 0) < older_than]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+
+class SQLiteJobStore:
+    """
+    Job records in a local SQLite file, so queued and interrupted jobs survive a
+    restart and every uvicorn worker on the host can report on any job.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    @staticmethod
+    def _decode(row) -> Dict:
+        job = dict(zip(_COLUMNS, row))
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def insert(self, job: Dict):
+        row = dict(job, params=json.dumps(job["params"]),
+                   result=json.dumps(job["result"]) if job.get("result") is not None else None)
+        with closing(self._connect()) as conn:
+            conn.execute(f"INSERT INTO jobs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                         [row.get(column) for column in _COLUMNS])
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def claim(self, job_id: str, started_at: float) -> bool:
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, owner_pid = ?, owner_boot = ?, heartbeat_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (started_at, os.getpid(), BOOT_ID, started_at, job_id),
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_ids: Iterable[str], now: Optional[float] = None):
+        """Renew the lease on running jobs this process owns"""
+        with closing(self._connect()) as conn:
+            conn.executemany("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running' AND owner_boot = ?",
+                             [(now or time.time(), job_id, BOOT_ID) for job_id in job_ids])
+
+    def finish(self, job_id: str, status: str, result=None, error: Optional[str] = None,
+               finished_at: Optional[float] = None) -> bool:
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                f"WHERE id = ? AND status NOT IN ({', '.join('?' * len(TERMINAL_STATUSES))})",
+                (status, json.dumps(result) if result is not None else None, error,
+                 finished_at or time.time(), job_id, *TERMINAL_STATUSES),
+            )
+            return cursor.rowcount == 1
+
+    def requeue(self, job_id: str):
+        with closing(self._connect()) as conn:
+            conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL, owner_pid = NULL, owner_boot = NULL, "
+                         "heartbeat_at = NULL WHERE id = ? AND status = 'running'", (job_id,))
+
+    def recoverable(self) -> List[Dict]:
+        """Queued jobs plus running jobs whose owner is gone (reset to queued), oldest first"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            orphans = [job_id for job_id, pid, boot, heartbeat_at in conn.execute(
+                "SELECT id, owner_pid, owner_boot, heartbeat_at FROM jobs WHERE status = 'running'")
+                if _orphaned(pid, boot, heartbeat_at, now)]
+            conn.executemany("UPDATE jobs SET status = 'queued', started_at = NULL, owner_pid = NULL, "
+                             "owner_boot = NULL, heartbeat_at = NULL WHERE id = ?",
+                             [(job_id,) for job_id in orphans])
+            rows = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE status = 'queued' "
+                                "ORDER BY priority, created_at").fetchall()
+            conn.execute("COMMIT")
+        return [self._decode(row) for row in rows]
+
+    def purge(self, older_than: float) -> int:
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(TERMINAL_STATUSES))}) AND finished_at < ?",
+                (*TERMINAL_STATUSES, older_than),
+            )
+            return cursor.rowcount
+
+
+def create_job_store():
+    """SQLite-backed at JOB_STORE_PATH (default data/jobs.sqlite3); JOB_STORE_PATH=memory keeps jobs in-process"""
+    path = os.getenv("JOB_STORE_PATH") or os.path.join("data", "jobs.sqlite3")
+    return MemoryJobStore() if path == "memory" else SQLiteJobStore(path)
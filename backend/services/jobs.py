@@ -0,0 +1,252 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from services.job_store import JOB_LEASE_SECONDS, TERMINAL_STATUSES, create_job_store
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+# Share of max_depth each priority may fill, so low-priority work is shed first under load
+ADMISSION_LIMITS = {0: 1.0, 1: 0.9, 2: 0.5}
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", os.getenv("MAX_CONCURRENT_LLM_REQUESTS", "2")))
+JOB_QUEUE_MAX_DEPTH = int(os.getenv("JOB_QUEUE_MAX_DEPTH", "100"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 86400)))
+WATCH_POLL_SECONDS = 2.0
+
+
+class QueueFullError(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _percentile(samples, pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))], 3)
+
+
+class JobQueue:
+    """
+    Priority job queue drained by a fixed pool of asyncio workers.
+
+    Job records live in a JobStore (SQLite by default) so queued jobs are picked up
+    again after a restart; the in-process heap only orders job ids. Submission is
+    rejected with QueueFullError once the queue is past the priority's admission limit.
+    """
+
+    def __init__(self, store=None, workers: int = JOB_WORKERS, max_depth: int = JOB_QUEUE_MAX_DEPTH,
+                 retention: float = JOB_RETENTION_SECONDS):
+        self.store = store if store is not None else create_job_store()
+        self.workers = workers
+        self.max_depth = max_depth
+        self.retention = retention
+        self._handlers: Dict[str, Callable[[Dict], Awaitable[Dict]]] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._queued: Dict[str, tuple] = {}  # job id -> (priority, seq), for depth and position
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_requested = set()
+        self._watchers: Dict[str, List[asyncio.Queue]] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self.counters = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "recovered": 0}
+        self.wait_seconds = deque(maxlen=500)
+        self.run_seconds = deque(maxlen=500)
+
+    def register(self, kind: str, handler: Callable[[Dict], Awaitable[Dict]]):
+        self._handlers[kind] = handler
+
+    @property
+    def depth(self) -> int:
+        return len(self._queued)
+
+    def _enqueue(self, job: Dict):
+        entry = (job["priority"], next(self._seq))
+        self._queued[job["id"]] = entry
+        self._queue.put_nowait((*entry, job["id"]))
+
+    async def start(self):
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        purged = await asyncio.to_thread(self.store.purge, time.time() - self.retention)
+        for job in await asyncio.to_thread(self.store.recoverable):
+            self._enqueue(job)
+            self.counters["recovered"] += 1
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._worker_tasks.append(asyncio.create_task(self._heartbeat()))
+        logger.info(f"🧵 Job queue started: {self.workers} workers, {self.depth} recovered jobs, {purged} purged")
+
+    async def stop(self):
+        """Stop the workers; interrupted jobs go back to 'queued' in the store and resume on next start"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(self, kind: str, params: Dict, priority: str = "normal") -> Dict:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Priority must be one of {', '.join(PRIORITIES)}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        level = PRIORITIES[priority]
+        if self.depth >= self.max_depth * ADMISSION_LIMITS[level]:
+            self.counters["rejected"] += 1
+            raise QueueFullError(f"Job queue is full ({self.depth} queued)", self._retry_after())
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "priority": level,
+            "params": params,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        await asyncio.to_thread(self.store.insert, job)
+        self._enqueue(job)
+        self.counters["submitted"] += 1
+        logger.info(f"📥 Job {job['id']} queued ({kind}, {priority}, depth {self.depth})")
+        return self.describe(job)
+
+    def _retry_after(self) -> float:
+        run_p50 = _percentile(self.run_seconds, 50) or 60.0
+        return round(run_p50 * max(self.depth, 1) / max(self.workers, 1), 1)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        return self.describe(job) if job else None
+
+    def describe(self, job: Dict) -> Dict:
+        """Public view of a job record, with its queue position while queued in this process"""
+        view = {key: job.get(key) for key in ("id", "kind", "status", "params", "result", "error",
+                                             "created_at", "started_at", "finished_at")}
+        view["priority"] = next((name for name, level in PRIORITIES.items() if level == job["priority"]), "normal")
+        if job["status"] == "queued" and job["id"] in self._queued:
+            mine = self._queued[job["id"]]
+            view["queue_position"] = sum(1 for entry in self._queued.values() if entry < mine)
+        return view
+
+    async def cancel(self, job_id: str) -> Optional[Dict]:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            return None
+        if job["status"] not in TERMINAL_STATUSES:
+            task = self._running.get(job_id)
+            if task is not None:
+                self._cancel_requested.add(job_id)
+                task.cancel()  # the worker records the cancellation
+            elif await asyncio.to_thread(self.store.finish, job_id, "cancelled"):
+                self._queued.pop(job_id, None)
+                self.counters["cancelled"] += 1
+                self._notify(job_id)
+        return await self.get(job_id)
+
+    async def watch(self, job_id: str) -> AsyncIterator[Dict]:
+        """Yield the job on every state change until it finishes"""
+        updates: asyncio.Queue = asyncio.Queue()
+        self._watchers.setdefault(job_id, []).append(updates)
+        try:
+            last_status = None
+            while True:
+                job = await self.get(job_id)
+                if job is None:
+                    return
+                if job["status"] != last_status:
+                    last_status = job["status"]
+                    yield job
+                if job["status"] in TERMINAL_STATUSES:
+                    return
+                try:
+                    # Jobs owned by another worker process never notify us; fall back to polling
+                    await asyncio.wait_for(updates.get(), timeout=WATCH_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._watchers[job_id].remove(updates)
+            if not self._watchers[job_id]:
+                del self._watchers[job_id]
+
+    def _notify(self, job_id: str):
+        for updates in self._watchers.get(job_id, []):
+            updates.put_nowait(job_id)
+
+    async def _worker(self):
+        while True:
+            _, _, job_id = await self._queue.get()
+            if self._queued.pop(job_id, None) is None:
+                continue  # cancelled while queued
+            started_at = time.time()
+            if not await asyncio.to_thread(self.store.claim, job_id, started_at):
+                continue  # claimed by another process, or cancelled
+            job = await asyncio.to_thread(self.store.get, job_id)
+            self.wait_seconds.append(started_at - job["created_at"])
+            self._notify(job_id)
+            await self._run(job, started_at)
+
+    async def _heartbeat(self):
+        """Renew the store lease on running jobs, so other processes don't requeue them as orphans"""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 4)
+            if self._running:
+                try:
+                    await asyncio.to_thread(self.store.heartbeat, list(self._running))
+                except Exception as e:
+                    logger.warning(f"⚠️ Job heartbeat failed: {e}")
+
+    async def _run(self, job: Dict, started_at: float):
+        job_id = job["id"]
+        task = asyncio.create_task(self._handlers[job["kind"]](job["params"]))
+        self._running[job_id] = task
+        try:
+            result = await task
+            status, error = "succeeded", None
+        except asyncio.CancelledError:
+            if job_id not in self._cancel_requested:
+                # The worker itself is shutting down; hand the job back for the next start
+                task.cancel()
+                self.store.requeue(job_id)
+                raise
+            result, status, error = None, "cancelled", "Cancelled by request"
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} failed: {e}")
+            result, status, error = None, "failed", str(e)
+        finally:
+            self._running.pop(job_id, None)
+            self._cancel_requested.discard(job_id)
+
+        self.run_seconds.append(time.time() - started_at)
+        await asyncio.to_thread(self.store.finish, job_id, status, result, error)
+        self.counters[status] += 1
+        logger.info(f"✅ Job {job_id} {status} in {time.time() - started_at:.1f}s")
+        self._notify(job_id)
+
+    def metrics(self) -> Dict:
+        by_priority = {name: sum(1 for level, _ in self._queued.values() if level == value)
+                       for name, value in PRIORITIES.items()}
+        return {
+            "workers": self.workers,
+            "max_depth": self.max_depth,
+            "depth": self.depth,
+            "depth_by_priority": by_priority,
+            "running": len(self._running),
+            **self.counters,
+            "wait_seconds": {"p50": _percentile(self.wait_seconds, 50), "p95": _percentile(self.wait_seconds, 95)},
+            "run_seconds": {"p50": _percentile(self.run_seconds, 50), "p95": _percentile(self.run_seconds, 95)},
+        }
+
+
+job_queue = JobQueue()
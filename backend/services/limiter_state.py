@@ -0,0 +1,163 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_limits (
+    model TEXT PRIMARY KEY,
+    failure_count INTEGER NOT NULL DEFAULT 0,
+    breaker_reset_time REAL,
+    breaker_reason TEXT,
+    bucket_tokens REAL,
+    bucket_updated REAL
+);
+"""
+
+
+def _refill(tokens: Optional[float], updated: Optional[float], now: float,
+            rate_per_second: float, capacity: float) -> float:
+    if tokens is None or updated is None:
+        return capacity
+    return min(capacity, tokens + (now - updated) * rate_per_second)
+
+
+class MemoryLimiterState:
+    """Rate-limit and circuit-breaker state shared by everything in this process"""
+
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.failure_count: Dict[str, int] = {}
+        self.circuit_breaker: Dict[str, Dict] = {}
+        self._buckets: Dict[str, tuple] = {}
+
+    def get_breaker(self, model: str) -> Optional[Dict]:
+        return self.circuit_breaker.get(model)
+
+    def open_breaker(self, model: str, reset_time: float, reason: str):
+        self.circuit_breaker[model] = {'reset_time': reset_time, 'reason': reason}
+
+    def close_breaker(self, model: str):
+        self.circuit_breaker.pop(model, None)
+        self.failure_count[model] = 0
+
+    def increment_failures(self, model: str) -> int:
+        with self._lock:
+            self.failure_count[model] = self.failure_count.get(model, 0) + 1
+            return self.failure_count[model]
+
+    def failure_counts(self) -> Dict[str, int]:
+        return dict(self.failure_count)
+
+    def take_token(self, model: str, rate_per_second: float, capacity: float) -> float:
+        """Take one token from the model's bucket; returns 0 if granted, else seconds until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(model, (None, None))
+            tokens = _refill(tokens, updated, now, rate_per_second, capacity)
+            if tokens >= 1:
+                self._buckets[model] = (tokens - 1, now)
+                return 0.0
+            self._buckets[model] = (tokens, now)
+            return (1 - tokens) / rate_per_second
+
+
+class SQLiteLimiterState:
+    """
+    The same state kept in a local SQLite file, so every uvicorn worker on the host
+    shares one view of breakers, failure counts and token buckets. Calls can wait up
+    to the busy timeout on another worker's write lock, so async code goes through
+    call_state() rather than calling them on the event loop.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; writes take an explicit BEGIN IMMEDIATE so read-modify-write is atomic across processes
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _row(self, conn: sqlite3.Connection, model: str):
+        conn.execute("INSERT OR IGNORE INTO model_limits (model) VALUES (?)", (model,))
+        return conn.execute(
+            "SELECT failure_count, breaker_reset_time, breaker_reason, bucket_tokens, bucket_updated "
+            "FROM model_limits WHERE model = ?", (model,)
+        ).fetchone()
+
+    def get_breaker(self, model: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT breaker_reset_time, breaker_reason FROM model_limits WHERE model = ?", (model,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return {'reset_time': row[0], 'reason': row[1]}
+
+    def open_breaker(self, model: str, reset_time: float, reason: str):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._row(conn, model)
+            conn.execute("UPDATE model_limits SET breaker_reset_time = ?, breaker_reason = ? WHERE model = ?",
+                         (reset_time, reason, model))
+            conn.execute("COMMIT")
+
+    def close_breaker(self, model: str):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE model_limits SET breaker_reset_time = NULL, breaker_reason = NULL, failure_count = 0 "
+                "WHERE model = ?", (model,)
+            )
+
+    def increment_failures(self, model: str) -> int:
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            count = self._row(conn, model)[0] + 1
+            conn.execute("UPDATE model_limits SET failure_count = ? WHERE model = ?", (count, model))
+            conn.execute("COMMIT")
+        return count
+
+    def failure_counts(self) -> Dict[str, int]:
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT model, failure_count FROM model_limits"))
+
+    def take_token(self, model: str, rate_per_second: float, capacity: float) -> float:
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            _, _, _, tokens, updated = self._row(conn, model)
+            now = time.time()  # wall clock: monotonic clocks are not comparable across processes
+            tokens = _refill(tokens, updated, now, rate_per_second, capacity)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate_per_second
+            conn.execute("UPDATE model_limits SET bucket_tokens = ?, bucket_updated = ? WHERE model = ?",
+                         (tokens, now, model))
+            conn.execute("COMMIT")
+        return wait
+
+
+async def call_state(state, method: str, *args):
+    """Call a limiter-state method from async code, in a worker thread when the backend blocks"""
+    if state.blocking:
+        return await asyncio.to_thread(getattr(state, method), *args)
+    return getattr(state, method)(*args)
+
+
+def create_limiter_state():
+    """SQLite-backed when RATE_LIMIT_STATE_PATH is set (cross-worker), in-memory otherwise"""
+    path = os.getenv("RATE_LIMIT_STATE_PATH")
+    return SQLiteLimiterState(path) if path else MemoryLimiterState()
@@ -0,0 +1,213 @@
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+# Seconds; spans fast in-process stages (prompt build, parse) through multi-minute generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+LabelValues = Tuple[str, ...]
+
+
+class MetricFamily(NamedTuple):
+    """One metric as exposed at scrape time: samples are (name suffix, labels, value)"""
+    name: str
+    type: str
+    documentation: str
+    samples: List[Tuple[str, Dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            items = list(self._values.items())
+        return MetricFamily(self.name, self.type, self.documentation,
+                            [("_total", self._labels(key), value) for key, value in items])
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            items = list(self._values.items())
+        return MetricFamily(self.name, self.type, self.documentation,
+                            [("", self._labels(key), value) for key, value in items])
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List] = {}  # key -> [per-bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1  # the last slot is the +Inf-only bucket
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self) -> MetricFamily:
+        samples = []
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                samples.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append(("_sum", labels, series[-2]))
+            samples.append(("_count", labels, series[-1]))
+        return MetricFamily(self.name, self.type, self.documentation, samples)
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics in the Prometheus text exposition format.
+
+    Counters, gauges and histograms are updated in place; collectors are callables
+    run at scrape time for values that already live elsewhere (cache hit counts,
+    queue depth), so they are read rather than tracked twice.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        self._collectors.append(collector)
+
+    def collect(self) -> Iterator[MetricFamily]:
+        for metric in list(self._metrics.values()):
+            yield metric.collect()
+        for collector in list(self._collectors):
+            yield from collector()
+
+    def render(self) -> str:
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} {family.type}")
+            for suffix, labels, value in family.samples:
+                label_text = ",".join(f'{name}="{_escape(str(v))}"' for name, v in labels.items())
+                lines.append(f"{family.name}{suffix}{{{label_text}}} {_format_value(value)}" if label_text
+                             else f"{family.name}{suffix} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Pipeline metrics, defined here so every module records into the same series
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time to serve an HTTP request, by route template",
+    ("method", "route", "status"))
+PAPER_STAGE_SECONDS = registry.histogram(
+    "paper_stage_seconds", "Paper generation time by stage: arxiv_fetch, prompt_build, parse, total",
+    ("stage",))
+MODEL_ATTEMPT_SECONDS = registry.histogram(
+    "model_attempt_seconds", "Duration of each OpenRouter call, by model and outcome", ("model", "outcome"))
+MODEL_RETRIES = registry.counter(
+    "model_retries", "Model calls that failed and were retried, by reason", ("model", "reason"))
+MODEL_WAIT_SECONDS = registry.counter(
+    "model_wait_seconds", "Seconds spent waiting before model calls (token_bucket, retry_after, window_exhausted, backoff, model_switch)",
+    ("model", "reason"))
+GUARD_ABORTS = registry.counter(
+    "generation_guard_aborts", "Completions cancelled by output guards, by model and reason (repetition, refusal, missing_headers)",
+    ("model", "reason"))
+GUARD_TOKENS_SAVED = registry.counter(
+    "generation_guard_tokens_saved", "Estimated output tokens not generated because a guard cancelled the completion",
+    ("model", "reason"))
+GUARD_SECONDS_SAVED = registry.counter(
+    "generation_guard_seconds_saved", "Estimated generation seconds saved by cancelled completions, at their observed token rate",
+    ("model", "reason"))
+CANCELLED_WORK = registry.counter(
+    "cancelled_work", "Work abandoned before it finished, by stage and reason (deadline, disconnect, cancelled)",
+    ("stage", "reason"))
+QUESTION_TITLES = registry.counter(
+    "question_titles", "Job titles answered with interview questions, by source (cache, batch, single)", ("source",))
+CIRCUIT_BREAKER_TRIPS = registry.counter(
+    "circuit_breaker_trips", "Times a model's circuit breaker opened", ("model", "reason"))
+SCRAPES = registry.counter("easychair_scrapes", "EasyChair scrapes by outcome", ("outcome",))
+SCRAPE_ROWS = registry.counter("easychair_scrape_rows", "Conference rows parsed from EasyChair")
+SCRAPE_LAST_ROWS = registry.gauge("easychair_scrape_last_rows", "Conference rows in the latest successful scrape")
+SCRAPE_STAGE_SECONDS = registry.histogram(
+    "easychair_scrape_stage_seconds", "EasyChair scrape time by stage: fetch, parse, publish", ("stage",))
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from services.deadline import (DeadlineExceeded, SharedDeadline, check_deadline, current_deadline,
+                               deadline_remaining, shared_context)
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one in-flight task.
+
+    The first caller for a key starts `fn()` as a detached task; later callers attach to
+    it until it finishes. Waiters only wait on the task, so a caller that is cancelled
+    (e.g. its client disconnected) or runs out of its own deadline only stops waiting. With
+    cancel_when_abandoned=True the shared task is cancelled once its last waiter leaves;
+    otherwise it runs to completion so its result can still be cached.
+
+    The shared task keeps the starting caller's context (its trace) but not its request
+    deadline: it runs under a SharedDeadline, the latest among its current waiters', so a
+    caller with a short X-Request-Timeout can't fail the others with DeadlineExceeded.
+    """
+
+    def __init__(self, name: str, cancel_when_abandoned: bool = False):
+        self.name = name
+        self.cancel_when_abandoned = cancel_when_abandoned
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._deadlines: Dict[Hashable, SharedDeadline] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, shared) where shared means another caller started the work"""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            deadline = SharedDeadline()
+            task = shared_context(deadline).run(asyncio.create_task, fn())
+            task.add_done_callback(lambda t, key=key: self._finished(key, t))
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            self._deadlines[key] = deadline
+            self.started += 1
+
+        shared_deadline, waiter_deadline = self._deadlines[key], current_deadline()
+        shared_deadline.join(waiter_deadline)
+        self._waiters[key] += 1
+        try:
+            return await self._wait(task), shared
+        except (asyncio.CancelledError, DeadlineExceeded):
+            if not task.done() and self._waiters.get(key) == 1:
+                self.abandoned += 1
+                if self.cancel_when_abandoned:
+                    logger.info(f"🛑 {self.name}: last waiter for {key!r} left, cancelling")
+                    task.cancel()
+            raise
+        finally:
+            shared_deadline.leave(waiter_deadline)
+            if key in self._waiters and self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    async def _wait(self, task: asyncio.Task) -> Any:
+        """The task's result, waiting no longer than this caller's own deadline"""
+        while not task.done():
+            await asyncio.wait({task}, timeout=deadline_remaining())
+            if not task.done():
+                check_deadline(f"{self.name}_wait")  # the loop may wake a hair early
+        return task.result()
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+            self._deadlines.pop(key, None)
+        # Mark the exception as retrieved; waiters (if any) re-raise it themselves
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
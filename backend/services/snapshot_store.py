@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.getenv("CONFERENCE_STORE_PATH") or os.path.join("data", "conferences.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scrapes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    taken_at REAL NOT NULL,
+    conference_count INTEGER NOT NULL,
+    inserted INTEGER NOT NULL,
+    updated INTEGER NOT NULL,
+    removed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scrapes_taken_at ON scrapes (taken_at);
+
+-- Append-only log: one row per conference that changed in a scrape
+CREATE TABLE IF NOT EXISTS changes (
+    scrape_id INTEGER NOT NULL REFERENCES scrapes (id),
+    key TEXT NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'remove')),
+    position INTEGER,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS changes_scrape ON changes (scrape_id);
+CREATE INDEX IF NOT EXISTS changes_key_scrape ON changes (key, scrape_id);
+
+-- Materialized latest state, so startup never replays history
+CREATE TABLE IF NOT EXISTS current (
+    key TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def conference_key(conference: Dict) -> str:
+    """Stable identity for a conference: its CFP link, or acronym+name when the link is missing"""
+    link = conference.get("link") or ""
+    if link.startswith(("http://", "https://")) and not link.endswith("N/A"):
+        return link
+    return f"{conference.get('acronym', '')}|{conference.get('name', '')}"
+
+
+def _encode(conference: Dict) -> str:
+    return json.dumps(conference, sort_keys=True, separators=(",", ":"))
+
+
+class ConferenceSnapshotStore:
+    """
+    SQLite-backed change log of EasyChair scrapes, keyed by conference link.
+
+    Each scrape records only inserts, updates and removals against the previous
+    state. The `current` table always holds the latest state, and any historical
+    view is rebuilt by taking the newest change per key up to that scrape.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()  # one writer at a time; readers use their own connections
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            # Created on first use so importing the module never touches the filesystem
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+            self._initialized = True
+        return sqlite3.connect(self.path, timeout=30)
+
+    def record_scrape(self, conferences: List[Dict], taken_at: Optional[float] = None) -> Dict:
+        """Diff a fresh scrape against the current state and append the changes"""
+        taken_at = taken_at or time.time()
+        incoming: Dict[str, Tuple[int, str]] = {}
+        for position, conference in enumerate(conferences):
+            incoming.setdefault(conference_key(conference), (position, _encode(conference)))
+
+        with self._lock, closing(self._connect()) as conn, conn:
+            previous = {key: (position, data) for key, position, data
+                        in conn.execute("SELECT key, position, data FROM current")}
+
+            inserts = [(key, pos, data) for key, (pos, data) in incoming.items() if key not in previous]
+            updates = [(key, pos, data) for key, (pos, data) in incoming.items()
+                       if key in previous and previous[key][1] != data]
+            removals = [key for key in previous if key not in incoming]
+
+            cursor = conn.execute(
+                "INSERT INTO scrapes (taken_at, conference_count, inserted, updated, removed) VALUES (?, ?, ?, ?, ?)",
+                (taken_at, len(incoming), len(inserts), len(updates), len(removals)),
+            )
+            scrape_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO changes (scrape_id, key, op, position, data) VALUES (?, ?, ?, ?, ?)",
+                [(scrape_id, key, "insert", pos, data) for key, pos, data in inserts]
+                + [(scrape_id, key, "update", pos, data) for key, pos, data in updates]
+                + [(scrape_id, key, "remove", None, None) for key in removals],
+            )
+
+            conn.executemany(
+                "INSERT INTO current (key, position, data, first_seen, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(key, pos, data, taken_at, taken_at) for key, pos, data in inserts],
+            )
+            conn.executemany(
+                "UPDATE current SET data = ?, position = ?, updated_at = ? WHERE key = ?",
+                [(data, pos, taken_at, key) for key, pos, data in updates],
+            )
+            conn.executemany("DELETE FROM current WHERE key = ?", [(key,) for key in removals])
+            # Page order shifts every scrape; keep it current without logging it as a change
+            conn.executemany(
+                "UPDATE current SET position = ? WHERE key = ? AND position != ?",
+                [(pos, key, pos) for key, (pos, _) in incoming.items()],
+            )
+
+        summary = {"scrape_id": scrape_id, "inserted": len(inserts), "updated": len(updates), "removed": len(removals)}
+        logger.info(f"💾 Recorded scrape {scrape_id}: +{len(inserts)} ~{len(updates)} -{len(removals)}")
+        return summary
+
+    def load_latest(self) -> Tuple[List[Dict], Optional[float], int]:
+        """Latest conference list, when it was scraped and the scrape id; independent of history length"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT id, taken_at FROM scrapes ORDER BY id DESC LIMIT 1").fetchone()
+            if row is None:
+                return [], None, 0
+            conferences = [json.loads(data) for (data,) in
+                           conn.execute("SELECT data FROM current ORDER BY position")]
+        return conferences, row[1], row[0]
+
+    def _scrape_at(self, conn: sqlite3.Connection, at: float) -> Optional[int]:
+        row = conn.execute("SELECT MAX(id) FROM scrapes WHERE taken_at <= ?", (at,)).fetchone()
+        return row[0]
+
+    def load_as_of(self, at: float) -> List[Dict]:
+        """Rebuild the conference list as it stood at epoch time `at`"""
+        with closing(self._connect()) as conn:
+            scrape_id = self._scrape_at(conn, at)
+            if scrape_id is None:
+                return []
+            rows = conn.execute(
+                """
+                SELECT c.op, c.data FROM changes c
+                JOIN (SELECT key, MAX(rowid) AS last FROM changes WHERE scrape_id <= ? GROUP BY key) latest
+                  ON c.rowid = latest.last
+                WHERE c.op != 'remove'
+                ORDER BY c.position
+                """,
+                (scrape_id,),
+            ).fetchall()
+        return [json.loads(data) for _, data in rows]
+
+    def changes_since(self, since: float) -> Dict[str, List]:
+        """Net changes after epoch time `since`: what appeared, changed or disappeared"""
+        with closing(self._connect()) as conn:
+            baseline = self._scrape_at(conn, since) or 0
+            rows = conn.execute(
+                """
+                SELECT c.key, c.data, c.op,
+                       (SELECT p.op FROM changes p WHERE p.key = c.key AND p.scrape_id <= ?
+                        ORDER BY p.rowid DESC LIMIT 1) AS baseline_op
+                FROM changes c
+                JOIN (SELECT key, MAX(rowid) AS last FROM changes WHERE scrape_id > ? GROUP BY key) latest
+                  ON c.rowid = latest.last
+                ORDER BY c.rowid
+                """,
+                (baseline, baseline),
+            ).fetchall()
+
+        result: Dict[str, List] = {"new": [], "updated": [], "removed": []}
+        for key, data, op, baseline_op in rows:
+            existed = baseline_op is not None and baseline_op != "remove"
+            if op == "remove":
+                if existed:
+                    result["removed"].append(key)
+            elif existed:
+                result["updated"].append(json.loads(data))
+            else:
+                result["new"].append(json.loads(data))
+        return result
+
+    def history(self, limit: int = 50) -> List[Dict]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, taken_at, conference_count, inserted, updated, removed FROM scrapes ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {"scrape_id": r[0], "taken_at": r[1], "conference_count": r[2],
+             "inserted": r[3], "updated": r[4], "removed": r[5]}
+            for r in rows
+        ]
+
+
+def _from_legacy_dump(entry: Dict) -> Dict:
+    """Map the old title/url/deadline/date/category dump format onto the scraper's schema"""
+    # The dumps store a single "category" string; accept a "categories" list too
+    topics = entry.get("category") or entry.get("categories") or ["N/A"]
+    if isinstance(topics, str):
+        topics = [topics]
+    return {
+        "acronym": "N/A",
+        "name": entry.get("title") or "N/A",
+        "link": entry.get("url") or "N/A",
+        "location": entry.get("location") or "N/A",
+        "submission_deadline": entry.get("deadline") or "N/A",
+        "start_date": entry.get("date") or "N/A",
+        "topics": topics,
+    }
+
+
+def import_legacy_dumps(store: ConferenceSnapshotStore, paths: List[str]) -> List[Dict]:
+    """Replay timestamped conferences_YYYYmmdd_HHMMSS.json dumps into the store, oldest first"""
+    stamped = []
+    for path in paths:
+        match = re.search(r"(\d{8}_\d{6})", os.path.basename(path))
+        taken_at = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").timestamp() if match else os.path.getmtime(path)
+        stamped.append((taken_at, path))
+
+    summaries = []
+    for taken_at, path in sorted(stamped):
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        summaries.append(store.record_scrape([_from_legacy_dump(entry) for entry in entries], taken_at))
+    return summaries
+
+
+if __name__ == "__main__":
+    # python -m services.snapshot_store data/conferences_*.json
+    logging.basicConfig(level=logging.INFO)
+    for summary in import_legacy_dumps(ConferenceSnapshotStore(), sys.argv[1:]):
+        print(summary)
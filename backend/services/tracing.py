@@ -0,0 +1,159 @@
+import contextvars
+import logging
+import os
+import random
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from services.metrics import HTTP_REQUEST_SECONDS, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Share of requests traced without asking; a request can always opt in with the X-Trace header
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+TRACE_HEADER = b"x-trace"
+
+
+class Trace:
+    """Spans recorded while serving one request, with offsets relative to its start"""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.attributes: Dict[str, object] = {}
+        self.spans: List[Dict] = []
+
+    def add_span(self, name: str, started: float, attributes: Dict, error: Optional[str] = None):
+        span = {
+            "name": name,
+            "start_ms": round((started - self._t0) * 1000, 2),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "attributes": attributes,
+        }
+        if error:
+            span["error"] = error
+        self.spans.append(span)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 2)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+        }
+
+
+class TraceBuffer:
+    """The most recent finished traces, oldest evicted first"""
+
+    def __init__(self, max_traces: int = TRACE_BUFFER_SIZE):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()
+
+    def add(self, trace: Trace):
+        self._traces[trace.id] = trace
+        while len(self._traces) > self.max_traces:
+            self._traces.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[Dict]:
+        trace = self._traces.get(trace_id)
+        return trace.to_dict() if trace else None
+
+    def recent(self, limit: int = 20) -> List[Dict]:
+        traces = list(self._traces.values())[-limit:]
+        return [{"id": t.id, "name": t.name, "started_at": t.started_at, "duration_ms": t.duration_ms,
+                 "spans": len(t.spans)} for t in reversed(traces)]
+
+
+trace_buffer = TraceBuffer()
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, histogram: Optional[Histogram] = None, **labels) -> Iterator[Dict]:
+    """
+    Time a block: observe it in histogram (if given) and add it to the request's
+    trace (if it has one). Yields the labels dict so the block can fill in labels
+    known only at the end, e.g. labels["outcome"] = "ok".
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield labels
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        if histogram is not None:
+            histogram.observe(time.perf_counter() - started, **labels)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(name, started, dict(labels), error)
+
+
+def _wants_trace(scope) -> bool:
+    for name, value in scope.get("headers") or ():
+        if name == TRACE_HEADER:
+            return value.lower() in (b"1", b"true", b"yes")
+    return TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+
+
+class ObservabilityMiddleware:
+    """
+    ASGI middleware recording http_request_duration_seconds for every request and,
+    for sampled or X-Trace requests, a span trace returned as X-Trace-Id. It wraps
+    the whole response, so streamed endpoints are timed to their last byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}") if _wants_trace(scope) else None
+        token = _current_trace.set(trace)
+        status = 500
+
+        async def send_with_trace(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trace is not None:
+                    message.setdefault("headers", [])
+                    message["headers"] = [*message["headers"], (b"x-trace-id", trace.id.encode("ascii"))]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            # Label by route template, not the raw path, to keep the series count bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope["method"], route=route,
+                                         status=status)
+            if trace is not None:
+                trace.finish()
+                trace.attributes.update(route=route, status=status)
+                trace_buffer.add(trace)
+                logger.info(f"🧭 Trace {trace.id}: {trace.name} {status} in {trace.duration_ms:.0f} ms, "
+                            f"{len(trace.spans)} spans")
+            _current_trace.reset(token)
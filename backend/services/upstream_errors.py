@@ -0,0 +1,153 @@
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping, NamedTuple, Optional
+
+import httpx
+
+
+class UpstreamError(Exception):
+    """
+    A failed call to an upstream API (OpenRouter). `kind` names the failure for
+    logs and metrics; `retryable` says whether the same request may succeed later.
+    """
+
+    kind = "error"
+    retryable = False
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None,
+                 limits: Optional["RateLimitInfo"] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.limits = limits
+
+
+class RateLimited(UpstreamError):
+    kind = "rate_limit"
+    retryable = True
+
+
+class ServerError(UpstreamError):
+    kind = "server_error"
+    retryable = True
+
+
+class UpstreamTimeout(UpstreamError):
+    kind = "timeout"
+    retryable = True
+
+
+class UpstreamConnectionError(UpstreamError):
+    kind = "connection"
+    retryable = True
+
+
+class ClientError(UpstreamError):
+    """4xx other than 429: bad request, auth, unknown model. Retrying won't help."""
+    kind = "client_error"
+
+
+class BadResponse(UpstreamError):
+    """A 200 whose body isn't a usable completion"""
+    kind = "bad_response"
+    retryable = True
+
+
+class DegenerateOutput(UpstreamError):
+    """
+    A completion cancelled mid-stream because it was clearly unusable (a loop, a refusal,
+    no section headers). It says more about the prompt on this model than about the
+    model's health, so it is neither retried on the same model nor counted by the breaker.
+    """
+    kind = "degenerate"
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class RateLimitInfo(NamedTuple):
+    limit: Optional[int]
+    remaining: Optional[int]
+    reset_at: Optional[float]  # epoch seconds
+    retry_after: Optional[float]  # seconds
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Retry-After as seconds from now; accepts delta-seconds or an HTTP date"""
+    seconds = _number(value)
+    if seconds is not None:
+        return max(seconds, 0.0)
+    if not value:
+        return None
+    try:
+        moment = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(moment - (now if now is not None else time.time()), 0.0)
+
+
+def _reset_epoch(value: Optional[str], now: float) -> Optional[float]:
+    reset = _number(value)
+    if reset is None:
+        return None
+    if reset > 1e11:  # OpenRouter sends epoch milliseconds
+        return reset / 1000
+    if reset > 1e9:  # epoch seconds
+        return reset
+    return now + reset  # seconds until reset
+
+
+def rate_limit_info(headers: Mapping[str, str], now: Optional[float] = None) -> RateLimitInfo:
+    """Retry-After and X-RateLimit-{Limit,Remaining,Reset} from a response"""
+    now = now if now is not None else time.time()
+    limit = _number(headers.get("x-ratelimit-limit"))
+    remaining = _number(headers.get("x-ratelimit-remaining"))
+    return RateLimitInfo(
+        int(limit) if limit is not None else None,
+        int(remaining) if remaining is not None else None,
+        _reset_epoch(headers.get("x-ratelimit-reset"), now),
+        parse_retry_after(headers.get("retry-after"), now),
+    )
+
+
+def error_for_status(status_code: int, message: str, limits: Optional[RateLimitInfo] = None) -> UpstreamError:
+    retry_after = limits.retry_after if limits else None
+    if status_code == 429:
+        return RateLimited(message, status_code, retry_after, limits)
+    if status_code >= 500 or status_code in (408, 409):
+        return ServerError(message, status_code, retry_after, limits)
+    return ClientError(message, status_code, retry_after, limits)
+
+
+def error_from_response(response: httpx.Response) -> UpstreamError:
+    """Typed error for a non-200 response, with the upstream's message and rate-limit headers"""
+    try:
+        error = response.json().get("error") or {}
+        message = error.get("message") if isinstance(error, dict) else str(error)
+    except ValueError:
+        message = None
+    return error_for_status(response.status_code, message or f"HTTP {response.status_code}",
+                            rate_limit_info(response.headers))
+
+
+def error_from_payload(error) -> UpstreamError:
+    """Typed error for an {"error": ...} object inside a 200 body or SSE chunk"""
+    if not isinstance(error, dict):
+        return BadResponse(str(error))
+    code = error.get("code")
+    message = str(error.get("message", error))
+    return error_for_status(code, message) if isinstance(code, int) else BadResponse(message)
+
+
+def error_from_transport(e: httpx.HTTPError, timeout: float) -> UpstreamError:
+    if isinstance(e, httpx.TimeoutException):
+        return UpstreamTimeout(f"Request timeout after {timeout}s")
+    return UpstreamConnectionError(f"Connection error: {e}")
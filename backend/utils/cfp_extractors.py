@@ -0,0 +1,277 @@
+"""
+Pluggable extraction backends for the EasyChair CFP listing.
+
+Every backend takes the raw page HTML and returns the same list of conference
+dicts (acronym, name, link, location, submission_deadline, start_date, topics)
+as the original BeautifulSoup implementation:
+
+- ``bs4``: full BeautifulSoup tree + CSS select (reference implementation)
+- ``stream``: stdlib ``html.parser`` event stream that only materializes ``tr.green`` rows
+- ``lxml``: libxml2 tree + XPath, used when lxml is installed
+"""
+import logging
+import os
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # optional fast path
+    lxml_html = None
+
+
+def _absolute_link(link: str) -> str:
+    # Prepend base URL if the link is relative (e.g., /cfp/...)
+    if link and not link.startswith(('http://', 'https://')):
+        link = f"https://easychair.org{link}"
+    return link
+
+
+def _conference(acronym, link, name, location, submission_deadline, start_date, topics) -> Dict:
+    return {
+        "acronym": acronym,
+        "name": name,
+        "link": _absolute_link(link),
+        "location": location,
+        "submission_deadline": submission_deadline,
+        "start_date": start_date,
+        "topics": topics if topics else ["N/A"],  # Ensure it's always a list, even if empty
+    }
+
+
+def extract_bs4(html: str) -> List[Dict]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    conferences = []
+
+    # 'table#ec\\:table1' targets the table with id 'ec:table1'; 'tr.green' rows are individual conferences.
+    conference_entries = soup.select('table#ec\\:table1 tbody tr.green')
+    logger.info(f"Found {len(conference_entries)} potential conference entries in total.")
+
+    for i, entry in enumerate(conference_entries):
+        cols = entry.find_all('td')
+
+        # Basic validation: Ensure the row has enough columns to extract all expected data
+        if len(cols) < 6:
+            logger.warning(f"Skipping row {i+1} due to insufficient columns ({len(cols)} found). Expected at least 6.")
+            continue
+
+        acronym_link_tag = cols[0].find('a')
+        acronym = acronym_link_tag.text.strip() if acronym_link_tag else "N/A"
+        link = acronym_link_tag['href'] if acronym_link_tag and 'href' in acronym_link_tag.attrs else "N/A"
+
+        submission_deadline_span = cols[3].find('span', class_='cfp_date')
+        start_date_span = cols[4].find('span', class_='cfp_date')
+
+        # Topics are links containing spans with the 'tag' class
+        topics = []
+        for topic_link in cols[5].find_all('a'):
+            topic_span = topic_link.find('span', class_='tag')
+            if topic_span:
+                topics.append(topic_span.text.strip())
+
+        conferences.append(_conference(
+            acronym, link,
+            cols[1].text.strip(),
+            cols[2].text.strip(),
+            submission_deadline_span.text.strip() if submission_deadline_span else "N/A",
+            start_date_span.text.strip() if start_date_span else "N/A",
+            topics,
+        ))
+
+    return conferences
+
+
+class _Cell:
+    __slots__ = ("text", "anchors", "cfp_date")
+
+    def __init__(self):
+        self.text = []
+        self.anchors = []  # [href, text parts, first span.tag text parts or None]
+        self.cfp_date = None  # text parts of the first span.cfp_date
+
+
+class _CFPRowParser(HTMLParser):
+    """
+    Event-driven scan of table#ec:table1; only rows with class 'green' are built.
+    </td> and </tr> are optional in HTML, so a row also ends at the next <tr>, at the
+    end of its tbody or table, or at close(), and a cell at the next <td>.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: List[List[_Cell]] = []
+        self._table_depth = 0  # >0 while inside the target table (counts nested tables)
+        self._in_tbody = False
+        self._row: Optional[List[_Cell]] = None
+        self._cell: Optional[_Cell] = None
+        self._sinks: List[list] = []  # text buffers for open <a>/<span> elements in the cell
+        self._open: List[str] = []
+
+    def _end_row(self):
+        if self._row is not None:
+            self.rows.append(self._row)
+        self._row = self._cell = None
+
+    def close(self):
+        super().close()
+        self._end_row()
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            if self._table_depth:
+                self._table_depth += 1
+            elif dict(attrs).get("id") == "ec:table1":
+                self._table_depth = 1
+            return
+        if self._table_depth != 1:
+            return
+        if tag == "tbody":
+            self._in_tbody = True
+        elif tag == "tr" and self._in_tbody:
+            self._end_row()
+            classes = (dict(attrs).get("class") or "").split()
+            self._row = [] if "green" in classes else None
+        elif self._row is None:
+            return
+        elif tag == "td":
+            self._cell = _Cell()
+            self._row.append(self._cell)
+            self._sinks, self._open = [], []
+        elif self._cell is not None and tag in ("a", "span"):
+            attributes = dict(attrs)
+            cell = self._cell
+            sink = []
+            if tag == "a":
+                cell.anchors.append([attributes.get("href"), sink, None])
+            else:
+                classes = (attributes.get("class") or "").split()
+                if "cfp_date" in classes and cell.cfp_date is None:
+                    cell.cfp_date = sink
+                if "tag" in classes and "a" in self._open:
+                    anchor = cell.anchors[-1]
+                    if anchor[2] is None:
+                        anchor[2] = sink
+            self._sinks.append(sink)
+            self._open.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag == "table" and self._table_depth:
+            self._table_depth -= 1
+            if not self._table_depth:
+                self._end_row()
+                self._in_tbody = False
+            return
+        if self._table_depth != 1:
+            return
+        if tag == "tbody":
+            self._end_row()
+            self._in_tbody = False
+        elif tag == "tr":
+            self._end_row()
+        elif tag == "td":
+            self._cell = None
+        elif tag in ("a", "span") and tag in self._open:
+            # Close the innermost matching element (tolerates sloppy nesting)
+            index = len(self._open) - 1 - self._open[::-1].index(tag)
+            del self._open[index:]
+            del self._sinks[index:]
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.text.append(data)
+            for sink in self._sinks:
+                sink.append(data)
+
+
+def extract_stream(html: str) -> List[Dict]:
+    parser = _CFPRowParser()
+    parser.feed(html)
+    parser.close()
+    logger.info(f"Found {len(parser.rows)} potential conference entries in total.")
+
+    conferences = []
+    for i, cols in enumerate(parser.rows):
+        if len(cols) < 6:
+            logger.warning(f"Skipping row {i+1} due to insufficient columns ({len(cols)} found). Expected at least 6.")
+            continue
+
+        first_anchor = cols[0].anchors[0] if cols[0].anchors else None
+        acronym = "".join(first_anchor[1]).strip() if first_anchor else "N/A"
+        link = first_anchor[0] if first_anchor and first_anchor[0] is not None else "N/A"
+
+        conferences.append(_conference(
+            acronym, link,
+            "".join(cols[1].text).strip(),
+            "".join(cols[2].text).strip(),
+            "".join(cols[3].cfp_date).strip() if cols[3].cfp_date is not None else "N/A",
+            "".join(cols[4].cfp_date).strip() if cols[4].cfp_date is not None else "N/A",
+            ["".join(anchor[2]).strip() for anchor in cols[5].anchors if anchor[2] is not None],
+        ))
+    return conferences
+
+
+_GREEN_ROWS = ("//table[@id='ec:table1']//tbody//tr"
+               "[contains(concat(' ', normalize-space(@class), ' '), ' green ')]")
+_HAS_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+
+
+def extract_lxml(html: str) -> List[Dict]:
+    if lxml_html is None:
+        raise RuntimeError("The 'lxml' CFP extractor requires lxml to be installed")
+
+    root = lxml_html.fromstring(html)
+    conference_entries = root.xpath(_GREEN_ROWS)
+    logger.info(f"Found {len(conference_entries)} potential conference entries in total.")
+
+    def first_text(col, cls):
+        spans = col.xpath(f".//span[{_HAS_CLASS.format(cls)}]")
+        return spans[0].text_content().strip() if spans else "N/A"
+
+    conferences = []
+    for i, entry in enumerate(conference_entries):
+        cols = entry.xpath(".//td")
+        if len(cols) < 6:
+            logger.warning(f"Skipping row {i+1} due to insufficient columns ({len(cols)} found). Expected at least 6.")
+            continue
+
+        anchors = cols[0].xpath(".//a")
+        acronym = anchors[0].text_content().strip() if anchors else "N/A"
+        link = anchors[0].get("href", "N/A") if anchors else "N/A"
+
+        topics = []
+        for topic_link in cols[5].xpath(".//a"):
+            tag_spans = topic_link.xpath(f".//span[{_HAS_CLASS.format('tag')}]")
+            if tag_spans:
+                topics.append(tag_spans[0].text_content().strip())
+
+        conferences.append(_conference(
+            acronym, link,
+            cols[1].text_content().strip(),
+            cols[2].text_content().strip(),
+            first_text(cols[3], "cfp_date"),
+            first_text(cols[4], "cfp_date"),
+            topics,
+        ))
+    return conferences
+
+
+EXTRACTORS: Dict[str, Callable[[str], List[Dict]]] = {
+    "bs4": extract_bs4,
+    "stream": extract_stream,
+}
+if lxml_html is not None:
+    EXTRACTORS["lxml"] = extract_lxml
+
+DEFAULT_EXTRACTOR = os.getenv("EASYCHAIR_EXTRACTOR") or ("lxml" if lxml_html is not None else "stream")
+
+
+def get_extractor(name: Optional[str] = None) -> Callable[[str], List[Dict]]:
+    name = name or DEFAULT_EXTRACTOR
+    if name not in EXTRACTORS:
+        logger.warning(f"⚠️ Unknown or unavailable CFP extractor '{name}', falling back to 'stream'")
+        name = "stream"
+    return EXTRACTORS[name]
@@ -1,9 +1,324 @@
+import html
+import io
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from utils.parser import split_into_sections
+
+OUTPUTS = ("latex", "html", "markdown")
+MEDIA_TYPES = {"latex": "application/x-latex", "html": "text/html", "markdown": "text/markdown"}
+
+# Body sections in document order; abstract and references have their own slots
+BODY_SECTIONS = [
+    ("introduction", "Introduction"),
+    ("related_work", "Related Work"),
+    ("methodology", "Methodology"),
+    ("results", "Results"),
+    ("discussion", "Discussion"),
+    ("conclusion", "Conclusion"),
+]
+
+_ROMAN = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X", "XI", "XII"]
+
+VENUES: Dict[str, Dict] = {
+    "ieee": {
+        "name": "IEEE",
+        "numbering": lambda n: f"{_ROMAN[n - 1]}.",
+        "uppercase_headings": True,
+        "reference_label": lambda n: f"[{n}]",
+        "latex": r"""\documentclass[conference]{IEEEtran}
+\usepackage[utf8]{inputenc}
+\usepackage{cite}
+\begin{document}
+\title{<<title>>}
+\author{\IEEEauthorblockN{<<authors>>}}
+\maketitle
+\begin{abstract}
+<<abstract>>\end{abstract}
+\begin{IEEEkeywords}
+<<keywords>>
+\end{IEEEkeywords}
+<<body>>\begin{thebibliography}{99}
+<<references>>\end{thebibliography}
+\end{document}
+""",
+        "css": "body{font-family:'Times New Roman',serif;font-size:10pt;max-width:7.5in;margin:auto}"
+               "main{column-count:2;column-gap:0.25in}h1{text-align:center;font-size:24pt}"
+               "h2{font-size:10pt;text-align:center;font-variant:small-caps}p{text-align:justify;text-indent:1em}",
+    },
+    "springer": {
+        "name": "Springer",
+        "numbering": lambda n: f"{n}",
+        "uppercase_headings": False,
+        "reference_label": lambda n: f"{n}.",
+        "latex": r"""\documentclass[runningheads]{llncs}
+\usepackage[utf8]{inputenc}
+\begin{document}
+\title{<<title>>}
+\author{<<authors>>}
+\institute{}
+\maketitle
+\begin{abstract}
+<<abstract>>
+\keywords{<<keywords>>}
+\end{abstract}
+<<body>>\begin{thebibliography}{99}
+<<references>>\end{thebibliography}
+\end{document}
+""",
+        "css": "body{font-family:'Computer Modern',Georgia,serif;font-size:10pt;max-width:12.2cm;margin:auto}"
+               "h1{text-align:center;font-size:14pt}h2{font-size:12pt}p{text-align:justify}",
+    },
+    "elsevier": {
+        "name": "Elsevier",
+        "numbering": lambda n: f"{n}.",
+        "uppercase_headings": False,
+        "reference_label": lambda n: f"[{n}]",
+        "latex": r"""\documentclass[preprint,12pt]{elsarticle}
+\usepackage[utf8]{inputenc}
+\begin{document}
+\begin{frontmatter}
+\title{<<title>>}
+\author{<<authors>>}
+\begin{abstract}
+<<abstract>>\end{abstract}
+\begin{keyword}
+<<keywords>>
+\end{keyword}
+\end{frontmatter}
+<<body>>\begin{thebibliography}{99}
+<<references>>\end{thebibliography}
+\end{document}
+""",
+        "css": "body{font-family:Charter,Georgia,serif;font-size:12pt;max-width:16cm;margin:auto}"
+               "h1{font-size:18pt}h2{font-size:13pt}p{text-align:justify}",
+    },
+    # Formats without a dedicated template (acm, apa, ...) render as a plain article
+    "generic": {
+        "name": "Article",
+        "numbering": lambda n: f"{n}.",
+        "uppercase_headings": False,
+        "reference_label": lambda n: f"{n}.",
+        "latex": r"""\documentclass[11pt]{article}
+\usepackage[utf8]{inputenc}
+\begin{document}
+\title{<<title>>}
+\author{<<authors>>}
+\maketitle
+\begin{abstract}
+<<abstract>>\end{abstract}
+\noindent\textbf{Keywords:} <<keywords>>
+
+<<body>>\begin{thebibliography}{99}
+<<references>>\end{thebibliography}
+\end{document}
+""",
+        "css": "body{font-family:Georgia,serif;font-size:11pt;max-width:40em;margin:auto}h1{text-align:center}",
+    },
+}
+
+_HTML_DOCUMENT = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title><<title>></title>
+<style><<css>></style></head>
+<body class="paper <<venue>>">
+<header><h1><<title>></h1><p class="authors"><<authors>></p></header>
+<section class="abstract"><h2>Abstract</h2>
+<<abstract>><p class="keywords"><strong>Keywords:</strong> <<keywords>></p></section>
+<main>
+<<body>><section class="references"><h2><<references_heading>></h2>
+<ol>
+<<references>></ol></section>
+</main>
+</body></html>
+"""
+
+_MARKDOWN_DOCUMENT = """# <<title>>
+
+*<<authors>>*
+
+**Abstract.** <<abstract>>**Keywords:** <<keywords>>
+
+<<body>>## <<references_heading>>
+
+<<references>>"""
+
+# Per output: section heading, paragraph wrapper, reference entry
+_BLOCKS = {
+    "latex": ("\\section{<<heading>>}\n", "<<text>>\n\n", "\\bibitem{ref<<n>>} <<text>>\n"),
+    "html": ("<section><h2><<number>> <<heading>></h2>\n", "<p><<text>></p>\n", "<li><<text>></li>\n"),
+    "markdown": ("## <<number>> <<heading>>\n\n", "<<text>>\n\n", "<<label>> <<text>>\n\n"),
+}
+_SECTION_CLOSE = {"latex": "", "html": "</section>\n", "markdown": ""}
+
+_SLOT = re.compile(r"<<(\w+)>>")
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+_REFERENCE_NUMBER = re.compile(r"^\s*(?:\[\d+\]|\d+[.)])\s*")
+_LATEX_ESCAPES = str.maketrans({
+    "\\": r"\textbackslash{}", "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#", "_": r"\_",
+    "{": r"\{", "}": r"\}", "~": r"\textasciitilde{}", "^": r"\textasciicircum{}",
+})
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_INLINE = {
+    "latex": lambda text: _BOLD.sub(r"\\textbf{\1}", text.translate(_LATEX_ESCAPES)),
+    "html": lambda text: _BOLD.sub(r"<strong>\1</strong>", html.escape(text, quote=False)),
+    "markdown": lambda text: text,
+}
+
+Template = Tuple[Tuple[bool, str], ...]  # (is_slot, literal text or slot name)
+
+
+def _compile(source: str) -> Template:
+    parts, pos = [], 0
+    for match in _SLOT.finditer(source):
+        if match.start() > pos:
+            parts.append((False, source[pos:match.start()]))
+        parts.append((True, match.group(1)))
+        pos = match.end()
+    if pos < len(source):
+        parts.append((False, source[pos:]))
+    return tuple(parts)
+
+
+class CompiledTemplates(NamedTuple):
+    venue: str
+    output: str
+    document: Template
+    heading: Template
+    paragraph: Template
+    reference: Template
+    section_close: str
+
+
+def resolve_venue(paper_format: str) -> str:
+    key = (paper_format or "").strip().lower()
+    return key if key in VENUES else "generic"
+
+
+@lru_cache(maxsize=None)
+def get_templates(venue: str, output: str) -> CompiledTemplates:
+    """Compiled templates for a venue/output pair, built once per process"""
+    if output not in OUTPUTS:
+        raise ValueError(f"Output must be one of {', '.join(OUTPUTS)}")
+    document = {"latex": VENUES[venue]["latex"], "html": _HTML_DOCUMENT, "markdown": _MARKDOWN_DOCUMENT}[output]
+    heading, paragraph, reference = _BLOCKS[output]
+    return CompiledTemplates(venue, output, _compile(document), _compile(heading), _compile(paragraph),
+                             _compile(reference), _SECTION_CLOSE[output])
+
+
+def _fill(template: Template, values: Dict[str, str]) -> Iterator[str]:
+    for is_slot, text in template:
+        yield values[text] if is_slot else text
+
+
+def _paragraphs(text: str) -> Iterator[str]:
+    pos = 0
+    text = text.strip()
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        yield text[pos:match.start()]
+        pos = match.end()
+    if pos < len(text):
+        yield text[pos:]
+
+
+class _Renderer:
+    def __init__(self, paper: Dict, templates: CompiledTemplates, authors: Optional[Sequence[str]] = None):
+        self.paper = paper
+        self.t = templates
+        self.venue = VENUES[templates.venue]
+        self.inline = _INLINE[templates.output]
+        metadata = paper.get("_metadata") or {}
+        self.authors = authors or paper.get("authors") or ["Anonymous Author"]
+        self.keywords = paper.get("keywords") or metadata.get("topic") or paper.get("title") or ""
+
+    def render(self) -> Iterator[str]:
+        for is_slot, text in self.t.document:
+            if not is_slot:
+                yield text
+            else:
+                yield from getattr(self, f"_slot_{text}")()
+
+    def _slot_title(self):
+        yield self.inline(self.paper.get("title") or "Untitled")
+
+    def _slot_authors(self):
+        separator = r" \and " if self.t.output == "latex" and self.t.venue != "ieee" else ", "
+        yield separator.join(self.inline(author) for author in self.authors)
+
+    def _slot_keywords(self):
+        yield self.inline(self.keywords)
+
+    def _slot_css(self):
+        yield self.venue["css"]
+
+    def _slot_venue(self):
+        yield self.t.venue
+
+    def _slot_references_heading(self):
+        yield "REFERENCES" if self.venue["uppercase_headings"] else "References"
+
+    def _text(self, text: str) -> Iterator[str]:
+        for paragraph in _paragraphs(text):
+            yield from _fill(self.t.paragraph, {"text": self.inline(paragraph)})
+
+    def _slot_abstract(self):
+        yield from self._text(self.paper.get("abstract") or "")
+
+    def _slot_body(self):
+        number = 0
+        for key, heading in BODY_SECTIONS:
+            content = self.paper.get(key) or ""
+            if not content.strip():
+                continue
+            number += 1
+            if self.venue["uppercase_headings"] and self.t.output != "latex":
+                heading = heading.upper()
+            yield from _fill(self.t.heading, {"heading": heading, "number": self.venue["numbering"](number)})
+            yield from self._text(content)
+            yield self.t.section_close
+
+    def _slot_references(self):
+        n = 0
+        for line in (self.paper.get("references") or "").splitlines():
+            line = _REFERENCE_NUMBER.sub("", line).strip()
+            if not line:
+                continue
+            n += 1
+            yield from _fill(self.t.reference, {"n": str(n), "label": self.venue["reference_label"](n),
+                                                "text": self.inline(line)})
+
+
+def iter_render(paper: Dict, paper_format: str, output: str = "latex",
+                authors: Optional[Sequence[str]] = None) -> Iterator[str]:
+    """Render a section dict as a chunk stream; nothing larger than one paragraph is built"""
+    return _Renderer(paper, get_templates(resolve_venue(paper_format), output), authors).render()
+
+
+def render_to(paper: Dict, paper_format: str, output: str, write: Callable[[str], object],
+              authors: Optional[Sequence[str]] = None) -> int:
+    """Stream a rendered paper into write (e.g. a file's write method); returns characters written"""
+    written = 0
+    for chunk in iter_render(paper, paper_format, output, authors):
+        write(chunk)
+        written += len(chunk)
+    return written
+
+
+def render(paper: Dict, paper_format: str, output: str = "latex", authors: Optional[Sequence[str]] = None) -> str:
+    buffer = io.StringIO()
+    render_to(paper, paper_format, output, buffer.write, authors)
+    return buffer.getvalue()
+
+
+def render_batch(papers: Iterable[Dict], paper_format: str, output: str = "latex") -> List[str]:
+    """
+    Convenience wrapper: render() for each paper. Templates are already compiled once per
+    process, and the rest of the work (escaping, paragraph splitting) is per paper, so a
+    batch costs the same as a render() loop.
+    """
+    return [render(paper, paper_format, output) for paper in papers]
+
+
 def apply_formatting(paper_content: str, paper_format: str) -> str:
-    if paper_format.lower() == "ieee":
-        return f"📘 IEEE FORMATTED:\n\n{paper_content}"
-    elif paper_format.lower() == "springer":
-        return f"📕 Springer FORMAT:\n\n{paper_content}"
-    elif paper_format.lower() == "elsevier":
-        return f"📗 Elsevier FORMAT:\n\n{paper_content}"
-    else:
-        return f"📄 {paper_format.upper()} FORMAT:\n\n{paper_content}"
\ No newline at end of file
+    """Format raw paper text for a venue as Markdown (kept for older callers)"""
+    return render(split_into_sections(paper_content), paper_format, "markdown")
@@ -0,0 +1,97 @@
+import re
+from typing import Optional
+
+from utils.parser import DEFAULT_GRAMMAR, HeaderGrammar
+
+# Reasons OutputGuard gives for giving up on a completion
+REPETITION = "repetition"
+REFUSAL = "refusal"
+MISSING_HEADERS = "missing_headers"
+
+# A refusal opens the response; matching only the start keeps papers that discuss refusals safe
+_REFUSAL = re.compile(
+    r"\W*(?:I[’']?m sorry|I am sorry|I apologi[sz]e|Sorry,|Unfortunately,? I|As an AI\b"
+    r"|I (?:can[’']?t|cannot|can not|am unable to|am not able to|won[’']?t|must decline)"
+    r"|I[’']?m (?:unable|not able) to)",
+    re.IGNORECASE)
+
+
+class OutputGuard:
+    """
+    Incremental checks on a completion as it streams in, so output that is clearly
+    unusable can be cancelled instead of paid for in full.
+
+    feed() takes each delta and returns a reason once the text is:
+    - REPETITION: the last `probe_chars` characters occur `min_repeats` times in the
+      last `window_chars` (a model stuck in a loop, of any period up to window/repeats)
+    - REFUSAL: it opens with an apology or refusal and no section header follows
+      within `refusal_chars`
+    - MISSING_HEADERS (with expect_headers): no section header in the first
+      `header_within_chars`, or none for `section_gap_chars` after the last one
+      (the references section is exempt, nothing follows it)
+    close() runs the checks that need the whole text, for completions that end early.
+    Checks run every `check_every` characters, so the cost per delta is an append.
+    """
+
+    def __init__(self, expect_headers: bool = False, header_within_chars: int = 1200,
+                 section_gap_chars: int = 10000, refusal_chars: int = 500, probe_chars: int = 160,
+                 window_chars: int = 8000, min_repeats: int = 3, check_every: int = 256,
+                 grammar: HeaderGrammar = DEFAULT_GRAMMAR):
+        self.expect_headers = expect_headers
+        self.header_within_chars = header_within_chars
+        self.section_gap_chars = section_gap_chars
+        self.refusal_chars = refusal_chars
+        self.probe_chars = probe_chars
+        self.window_chars = window_chars
+        self.min_repeats = min_repeats
+        self.check_every = check_every
+        self.grammar = grammar
+        self.text = ""
+        self.headers = 0
+        self._checked = 0
+        self._scanned = 0  # start of the first line not yet scanned for headers
+        self._last_header_at = 0
+        self._last_key: Optional[str] = None
+        self._refusal: Optional[bool] = None
+
+    def feed(self, delta: str) -> Optional[str]:
+        self.text += delta
+        if len(self.text) - self._checked < self.check_every:
+            return None
+        self._checked = len(self.text)
+        return self._check(final=False)
+
+    def close(self) -> Optional[str]:
+        return self._check(final=True)
+
+    def _scan_headers(self, final: bool):
+        end = len(self.text) if final else self.text.rfind("\n", self._scanned) + 1
+        if end <= self._scanned:
+            return
+        for start, _, key in self.grammar.headers(self.text, self._scanned, end):
+            self.headers += 1
+            self._last_header_at = start
+            self._last_key = key
+        self._scanned = end
+
+    def _check(self, final: bool) -> Optional[str]:
+        text = self.text
+        self._scan_headers(final)
+
+        if self._refusal is None and (final or len(text) >= self.refusal_chars):
+            self._refusal = bool(_REFUSAL.match(text, 0, self.refusal_chars)) and not self.headers
+        if self._refusal:
+            return REFUSAL
+
+        if len(text) >= self.probe_chars * self.min_repeats:
+            probe = text[-self.probe_chars:]
+            if text.count(probe, max(len(text) - self.window_chars, 0)) >= self.min_repeats:
+                return REPETITION
+
+        if self.expect_headers and not final:
+            if not self.headers and len(text) > self.header_within_chars:
+                return MISSING_HEADERS
+            if (self.headers and self._last_key != "references"
+                    and len(text) - self._last_header_at > self.section_gap_chars):
+                return MISSING_HEADERS
+        return None
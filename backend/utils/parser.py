@@ -1,79 +1,259 @@
+import logging
 import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
-def split_into_sections(paper: str) -> dict:
-    section_titles = [
-        "Abstract", "Introduction", "Related Work", "Methodology", "Results", "Conclusion", "References"
-    ]
-
-    # Pattern to match headers like **Abstract**, **Introduction**, etc.
-    # It looks for two asterisks, then the title, then two more asterisks,
-    # followed by optional spaces/colon/dash and a newline.
-    # The `(?m)` flag makes `^` and `$` match start/end of lines (multiline mode).
-    # `\s*[:\-]?\s*` allows for optional colon/dash and spaces.
-    # `\n` ensures it ends with a newline, making sure we match distinct headers.
-    pattern = r"(?m)^\*\*(" + "|".join(section_titles) + r")\*\*\s*[:\-]?\s*\n"
-
-    matches = list(re.finditer(pattern, paper))
-
-    result = {}
-    
-    # Define all expected keys to ensure they are always present, even if empty
-    section_keys = [
-        "title",
-        "abstract", "introduction", "related_work", "methodology",
-        "results", "conclusion", "references"
-    ]
-    
-    # Initialize all sections to empty string
-    for key in section_keys:
-        result[key] = ""
-
-    # Heuristic for title extraction: The first non-header line before any sections.
-    # Or assume the first block before the first header is the title.
-    first_header_start = matches[0].start() if matches else len(paper)
-    potential_title_content = paper[0:first_header_start].strip()
-    
-    # If the potential title content is short and doesn't look like a full abstract,
-    # consider it the title. Otherwise, it might be abstract if no proper header found first.
-    if potential_title_content and len(potential_title_content) < 200: # Heuristic
-        # Simple title cleanup: take the first line that doesn't start with **
-        first_line_match = re.match(r"^(.*?)\n", potential_title_content)
-        if first_line_match:
-            result["title"] = first_line_match.group(1).strip()
-        else:
-            result["title"] = potential_title_content # If only one line
-    else:
-        result["title"] = "Generated Research Paper" # Default if no clear title is found early
-
-    if not matches:
-        print("❌ No explicit section headers matched. Assigning ALL content to abstract as fallback.")
-        result["abstract"] = paper.strip() # In this case, the whole thing is the abstract
+logger = logging.getLogger(__name__)
+
+# Section key -> header spellings the models actually produce (matched case-insensitively)
+SECTION_ALIASES: Dict[str, Sequence[str]] = {
+    "abstract": ("Abstract",),
+    "introduction": ("Introduction",),
+    "related_work": ("Related Work", "Literature Review", "Background and Related Work"),
+    "methodology": ("Methodology", "Methods", "Method"),
+    "results": ("Results", "Results and Discussion", "Experiments and Results"),
+    "discussion": ("Discussion",),
+    "conclusion": ("Conclusion", "Conclusions", "Conclusion and Future Work"),
+    "references": ("References", "Bibliography"),
+}
+SECTION_TITLES = [aliases[0] for aliases in SECTION_ALIASES.values()]
+SECTION_KEYS = ["title"] + list(SECTION_ALIASES)
+HEADER_STYLES = ("bold", "markdown", "numbered", "plain")
+# "plain" would take any body line that happens to read "Method" or "Results" for a header
+DEFAULT_HEADER_STYLES = ("bold", "markdown", "numbered")
+DEFAULT_TITLE = "Generated Research Paper"
+
+_NON_SPACE = re.compile(r"\S")
+_OUTLINE_TITLE = re.compile(r"^[ \t#*_]*title[ \t*_]*:[ \t*_\"]*(?P<title>.+?)[ \t*_\"]*$", re.IGNORECASE | re.MULTILINE)
+
+
+class SectionSpan(NamedTuple):
+    """A section's location in the source text; start/end bound its stripped content"""
+    key: str
+    header_start: int
+    start: int
+    end: int
+
+
+class HeaderGrammar:
+    """
+    Compiled section-header grammar.
+
+    A header is a line holding only a known section title, optionally decorated in
+    any of the enabled styles: **bold** (or __bold__), markdown `#`..`######`, and a
+    numbered prefix ("2.", "2)", "IV."). Styles combine, e.g. "## 3. Methodology" or
+    "**2. Related Work:**". "plain" also accepts an undecorated title line; it is off by
+    default. Build one per configuration and reuse it.
+    """
+
+    def __init__(self, aliases: Dict[str, Sequence[str]] = SECTION_ALIASES,
+                 styles: Iterable[str] = DEFAULT_HEADER_STYLES):
+        styles = set(styles)
+        unknown = styles - set(HEADER_STYLES)
+        if unknown:
+            raise ValueError(f"Unknown header styles: {sorted(unknown)}")
+        self.styles = frozenset(styles)
+        self.keys = list(aliases)
+        self._key_by_title = {title.lower(): key for key, titles in aliases.items() for title in titles}
+        # Longest first so "Results and Discussion" wins over "Results"
+        titles = sorted(self._key_by_title, key=len, reverse=True)
+        title = "|".join(re.escape(t).replace(r"\ ", r"[ \t]+") for t in titles)
+
+        hashes = r"(?:\#{1,6}[ \t]*)?" if "markdown" in styles else ""
+        bold_open = r"(?P<bold>\*\*|__)?[ \t]*" if "bold" in styles else ""
+        bold_close = r"(?(bold)(?:[ \t]*:)?[ \t]*(?:\*\*|__))" if "bold" in styles else ""
+        number = r"(?:(?:\d{1,2}|[IVX]{1,5})[.)]?[ \t]+)?" if "numbered" in styles else ""
+        decorations = [d for style, d in (("markdown", r"\#"), ("bold", r"\*\*|__"),
+                                          ("numbered", r"(?:\d{1,2}|[IVX]{1,5})[.)]?[ \t]")) if style in styles]
+        # Without "plain", some decoration has to open the line
+        decorated = "" if "plain" in styles else rf"(?=[ \t]*(?:{'|'.join(decorations) or '(?!)'}))"
+        line = rf"{decorated}[ \t]*{hashes}{bold_open}{number}(?P<title>{title}){bold_close}[ \t]*[:\-]?[ \t\r]*(?=\n|\Z)"
+        self.line_pattern = re.compile(line, re.IGNORECASE)
+        # Anchoring on a literal newline lets the regex engine skip to candidate lines
+        # instead of testing ^ at every position
+        self._after_newline = re.compile("\n" + line, re.IGNORECASE)
+
+    def key_for(self, title: str) -> str:
+        return self._key_by_title[" ".join(title.lower().split())]
+
+    def headers(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> Iterator[Tuple[int, int, str]]:
+        """Yield (header_start, content_start, key) for each header line in text[pos:endpos]; pos must start a line"""
+        endpos = len(text) if endpos is None else endpos
+        match = self.line_pattern.match(text, pos, endpos)
+        if match:
+            yield pos, _skip_newline(text, match.end(), endpos), self.key_for(match.group("title"))
+            pos = match.end()
+        for match in self._after_newline.finditer(text, pos, endpos):
+            yield match.start() + 1, _skip_newline(text, match.end(), endpos), self.key_for(match.group("title"))
+
+    def spans(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> Tuple[int, List[SectionSpan]]:
+        """
+        One pass over text: returns (end of the preamble, section spans). Spans are
+        offsets into text, so callers slice only the sections they need.
+        """
+        endpos = len(text) if endpos is None else endpos
+        spans: List[SectionSpan] = []
+        preamble_end = endpos
+        key = header_start = content_start = None
+        for start, content, title_key in self.headers(text, pos, endpos):
+            if key is None:
+                preamble_end = start
+            else:
+                spans.append(SectionSpan(key, header_start, *_trim(text, content_start, start)))
+            key, header_start, content_start = title_key, start, content
+        if key is not None:
+            spans.append(SectionSpan(key, header_start, *_trim(text, content_start, endpos)))
+        return preamble_end, spans
+
+
+DEFAULT_GRAMMAR = HeaderGrammar()
+
+
+def _skip_newline(text: str, pos: int, endpos: int) -> int:
+    return pos + 1 if pos < endpos and text[pos] == "\n" else pos
+
+
+def _trim(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Offsets of text[start:end].strip() without building the slice"""
+    first = _NON_SPACE.search(text, start, end)
+    if first is None:
+        return start, start
+    end -= 1
+    while text[end].isspace():
+        end -= 1
+    return first.start(), end + 1
+
+
+def _join(existing: str, content: str) -> str:
+    """A section's text when its key appears again (e.g. "Methodology" then "Methods"): both parts, in order"""
+    return f"{existing}\n\n{content}" if existing and content else existing or content
+
+
+def _extract_title(text: str, start: int, end: int) -> str:
+    # A short block before the first header is the title; use its first line
+    start, end = _trim(text, start, end)
+    if start == end or end - start >= 200:
+        return DEFAULT_TITLE
+    newline = text.find("\n", start, end)
+    return text[start:newline if newline != -1 else end].strip()
+
+
+def split_into_sections(paper: str, grammar: HeaderGrammar = DEFAULT_GRAMMAR) -> Dict[str, str]:
+    """Split a generated paper into the SECTION_KEYS dict (missing sections are empty strings)"""
+    preamble_end, spans = grammar.spans(paper)
+    result = {key: "" for key in SECTION_KEYS}
+    result["title"] = _extract_title(paper, 0, preamble_end)
+
+    if not spans:
+        logger.warning("❌ No explicit section headers matched. Assigning ALL content to abstract as fallback.")
+        start, end = _trim(paper, 0, len(paper))
+        result["abstract"] = paper[start:end]
         return result
 
-    # Iterate through matches to extract content for each found section
-    for i, match in enumerate(matches):
-        # Extract the title string (e.g., "Abstract", "Introduction")
-        title_raw = match.group(1) # Using group(1) to get the text inside the ( ) from the pattern
-        
-        # Convert to snake_case for dictionary keys
-        # Specific mapping for consistency with frontend interface
-        if title_raw.lower() == "related work":
-            title_key = "related_work"
-        elif title_raw.lower() == "results": # This will catch "Results" and "Results and Discussion"
-            title_key = "results"
-        else:
-            title_key = title_raw.lower().replace(" ", "_").replace("-", "_")
-        
-        start = match.end()
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(paper)
-        
-        content = paper[start:end].strip()
-        
-        if title_key in result:
-            result[title_key] = content
-        else:
-            print(f"⚠️ Warning: Unrecognized section key '{title_key}' from raw title '{title_raw}'. Content not assigned to a specific field.")
-
-    print("✅ Parsed Sections:", [key for key, value in result.items() if value]) # Only print non-empty keys for brevity
-    
-    return result
\ No newline at end of file
+    for span in spans:
+        result[span.key] = _join(result[span.key], paper[span.start:span.end])
+    logger.debug(f"✅ Parsed sections: {[span.key for span in spans]}")
+    return result
+
+
+def extract_section(text: str, key: str, grammar: HeaderGrammar = DEFAULT_GRAMMAR) -> str:
+    """
+    Body of a completion asked for a single section: the content under that section's
+    header if the model echoed one, otherwise everything before the first header.
+    Any other sections the model ran on into are dropped.
+    """
+    preamble_end, spans = grammar.spans(text)
+    bodies = [text[span.start:span.end] for span in spans if span.key == key]
+    if bodies:
+        return "\n\n".join(body for body in bodies if body)
+    start, end = _trim(text, 0, preamble_end)
+    return text[start:end]
+
+
+def outline_title(outline: str, grammar: HeaderGrammar = DEFAULT_GRAMMAR) -> str:
+    """The "Title: ..." line of a generated outline, else its first line when that is short"""
+    match = _OUTLINE_TITLE.search(outline)
+    if match:
+        return match.group("title")
+    preamble_end, _ = grammar.spans(outline)
+    return _extract_title(outline, 0, preamble_end)
+
+
+class SectionStreamParser:
+    """
+    Incremental split_into_sections for streamed LLM output.
+
+    feed() takes text deltas and returns the (key, content) pairs of sections whose
+    end has been seen, i.e. the next header line arrived. Only complete lines are
+    scanned, each exactly once; text of the section in progress is kept as a list of
+    pieces and joined once when it closes. close() flushes the last section, result()
+    gives the same dict split_into_sections would, and spans holds each section's
+    offsets in the concatenated stream.
+    """
+
+    def __init__(self, grammar: HeaderGrammar = DEFAULT_GRAMMAR):
+        self.grammar = grammar
+        self._pending: List[str] = []  # chunks of the trailing incomplete line
+        self._pending_offset = 0  # stream offset of the incomplete line
+        self._pieces: List[str] = []  # text of the section in progress
+        self._current_key: Optional[str] = None  # None until the first header
+        self._header_start = 0
+        self._content_offset = 0
+        self.sections: Dict[str, str] = {key: "" for key in SECTION_KEYS}
+        self.spans: List[SectionSpan] = []
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        self._pending.append(chunk)
+        if "\n" not in chunk:
+            return []  # no line completed; nothing to scan yet
+        text = "".join(self._pending)
+        cut = text.rfind("\n") + 1
+        self._pending = [text[cut:]]
+        completed = self._scan(text, cut)
+        self._pending_offset += cut
+        return completed
+
+    def _scan(self, text: str, end: int) -> List[Tuple[str, str]]:
+        completed = []
+        base = self._pending_offset
+        pos = 0
+        for start, content, key in self.grammar.headers(text, 0, end):
+            self._pieces.append(text[pos:start])
+            completed.append(self._close_current())
+            self._current_key = key
+            self._header_start = base + start
+            self._content_offset = base + content
+            pos = content
+        self._pieces.append(text[pos:end])
+        return completed
+
+    def _close_current(self) -> Tuple[str, str]:
+        text = "".join(self._pieces)
+        self._pieces = []
+        if self._current_key is None:
+            self.sections["title"] = _extract_title(text, 0, len(text))
+            return "title", self.sections["title"]
+        start, end = _trim(text, 0, len(text))
+        content = text[start:end]
+        self.sections[self._current_key] = _join(self.sections[self._current_key], content)
+        self.spans.append(SectionSpan(self._current_key, self._header_start,
+                                      self._content_offset + start, self._content_offset + end))
+        return self._current_key, content
+
+    def close(self) -> List[Tuple[str, str]]:
+        text = "".join(self._pending)
+        completed = self._scan(text, len(text))
+        self._pending_offset += len(text)
+        self._pending = []
+        if self._current_key is None:
+            # Same fallback as split_into_sections: everything is the abstract
+            text = "".join(self._pieces)
+            self._pieces = []
+            self.sections["title"] = _extract_title(text, 0, len(text))
+            start, end = _trim(text, 0, len(text))
+            self.sections["abstract"] = text[start:end]
+            return [("title", self.sections["title"]), ("abstract", self.sections["abstract"])]
+        completed.append(self._close_current())
+        return completed
+
+    def result(self) -> Dict[str, str]:
+        return dict(self.sections)
@@ -0,0 +1,272 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from utils.topic_index import tokenize
+
+DEFAULT_CHARS_PER_TOKEN = 4.0
+NO_CONTEXT = "No recent papers found on arXiv for this topic."
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were we with "
+    "our their these those which using based via into over under than then also can may such".split()
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9])")
+
+# The instruction block is identical for every request of a style, so it goes first: its token
+# count is computed once per model, and providers that cache prompt prefixes can reuse it.
+STATIC_PREFIXES = {
+    "full": """You are a world-class academic researcher. Write a comprehensive paper of the type and on the topic given at the end.
+
+**STRUCTURE (use exact headers):**
+
+**Abstract**
+Write a detailed 200-300 word abstract summarizing research problem, methodology, findings, and implications.
+
+**Introduction**
+Provide comprehensive background, problem definition, research objectives, and contribution statement.
+
+**Related Work**
+Review existing literature, identify gaps, and position this work in the research landscape.
+
+**Methodology**
+Describe research approach, experimental design, data collection, and analysis methods.
+
+**Results**
+Present comprehensive findings with detailed analysis and interpretation.
+
+**Discussion**
+Analyze implications, discuss limitations, and compare with existing work.
+
+**Conclusion**
+Summarize contributions, implications, and future research directions.
+
+**References**
+Include 12+ properly formatted academic references.
+
+**Requirements:**
+- Formal academic language
+- Technical depth and rigor
+- Original insights and analysis
+- Minimum 2500 words
+- Proper citations throughout
+""",
+    "compact": """Write a complete paper of the type and on the topic given at the end. Use these exact sections:
+
+**Abstract**
+Write a 150-200 word summary of the research.
+
+**Introduction**
+Provide background and research objectives.
+
+**Methodology**
+Describe the research approach and methods.
+
+**Results**
+Present key findings and analysis.
+
+**Conclusion**
+Summarize findings and future work.
+
+**References**
+Include at least 8 academic references.
+
+Write in formal academic style with technical details.
+""",
+}
+
+_REQUEST_TEMPLATE = """
+**Topic:** "{topic}"
+**Paper type:** {paper_type}
+
+**Research Context:**
+{context}
+
+Generate the complete paper now:"""
+
+
+# Outline-then-sections mode: a short outline first, then every section as its own completion.
+# The shared part (topic, outline, context) opens each section prompt so it is a common prefix.
+_OUTLINE_TEMPLATE = """You are a world-class academic researcher planning a paper of the type and on the topic given below.
+
+**Topic:** "{topic}"
+**Paper type:** {paper_type}
+
+**Research Context:**
+{context}
+
+Write a concise outline. First line: "Title: " followed by the paper title. Then, for each of
+Abstract, Introduction, Related Work, Methodology, Results, Discussion, Conclusion and References,
+give the section name and 2-3 bullet points with its key content. Keep the outline under 400 words."""
+
+_SECTION_TEMPLATE = """You are a world-class academic researcher writing one section of the paper outlined below.
+
+**Topic:** "{topic}"
+**Paper type:** {paper_type}
+
+**Outline:**
+{outline}
+
+**Research Context:**
+{context}
+
+Write only the **{header}** section: {guide}. Use formal academic language with technical depth,
+stay consistent with the outline, and do not repeat the section header or write any other section."""
+
+# Section key -> (header, what to write, completion token cap)
+SECTION_GUIDES: Dict[str, Tuple[str, str, int]] = {
+    "abstract": ("Abstract", "a 200-300 word abstract summarizing the research problem, methodology, "
+                             "findings and implications", 600),
+    "introduction": ("Introduction", "background, problem definition, research objectives and a "
+                                     "contribution statement", 1200),
+    "related_work": ("Related Work", "a review of existing literature that identifies gaps and positions "
+                                     "this work", 1200),
+    "methodology": ("Methodology", "the research approach, experimental design, data collection and "
+                                   "analysis methods", 1400),
+    "results": ("Results", "comprehensive findings with detailed analysis and interpretation", 1400),
+    "discussion": ("Discussion", "implications, limitations and comparison with existing work", 1000),
+    "conclusion": ("Conclusion", "contributions, implications and future research directions", 600),
+    "references": ("References", "12 or more properly formatted academic references, one per line", 1200),
+}
+OUTLINE_MAX_TOKENS = 700
+
+
+def estimate_tokens(text: str, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN) -> int:
+    """Cheap token estimate; chars_per_token is calibrated per model family in the model config"""
+    return math.ceil(len(text) / chars_per_token)
+
+
+def _terms(text: str) -> List[str]:
+    return [token for token in tokenize(text) if token not in _STOPWORDS and len(token) > 1]
+
+
+def rank_articles(topic: str, articles: Sequence[Dict]) -> List[Tuple[float, Dict]]:
+    """Articles by TF-IDF cosine similarity to the topic (title counted twice), best first"""
+    documents = [Counter(_terms(f"{a['title']} {a['title']} {a.get('summary', '')}")) for a in articles]
+    n = len(documents)
+    document_frequency = Counter(term for doc in documents for term in doc)
+    idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+    query = Counter(_terms(topic))
+    query_vector = {term: count * idf.get(term, math.log(1 + n) + 1) for term, count in query.items()}
+    query_norm = math.sqrt(sum(w * w for w in query_vector.values())) or 1.0
+
+    ranked = []
+    for doc, article in zip(documents, articles):
+        vector = {term: count * idf[term] for term, count in doc.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        score = sum(weight * vector.get(term, 0.0) for term, weight in query_vector.items()) / (norm * query_norm)
+        ranked.append((score, article))
+    ranked.sort(key=lambda pair: pair[0], reverse=True)
+    return ranked
+
+
+def compress_summary(summary: str, topic_terms: set, max_sentences: int) -> str:
+    """Keep the abstract's sentences that overlap the topic most, in their original order"""
+    sentences = [s.strip() for s in _SENTENCE_END.split(" ".join(summary.split())) if s.strip()]
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+    scored = sorted(range(len(sentences)),
+                    key=lambda i: (-len(topic_terms.intersection(_terms(sentences[i]))), i))
+    keep = sorted(scored[:max_sentences])
+    return " ".join(sentences[i] for i in keep)
+
+
+def _format_article(article: Dict, summary: str) -> str:
+    return f"• **{article['title']}** ({article.get('published') or 'Recent'})\n  {summary}"
+
+
+def fit_context(topic: str, articles: Sequence[Dict], budget_tokens: int,
+                chars_per_token: float = DEFAULT_CHARS_PER_TOKEN, max_sentences: int = 2) -> str:
+    """
+    Most relevant articles first, each compressed to its top sentences, until the
+    token budget is used up. An article that doesn't fit is cut down to its title;
+    articles sharing no terms with the topic are dropped.
+    """
+    if not articles or budget_tokens <= 0:
+        return NO_CONTEXT
+    topic_terms = set(_terms(topic))
+    entries: List[str] = []
+    used = 0
+    for score, article in rank_articles(topic, articles):
+        if score <= 0 and entries:
+            break  # the rest share no terms with the topic
+        for summary in (compress_summary(article.get("summary", ""), topic_terms, max_sentences), None):
+            entry = _format_article(article, summary) if summary else f"• **{article['title']}**"
+            cost = estimate_tokens(entry, chars_per_token) + 1
+            if used + cost <= budget_tokens:
+                entries.append(entry)
+                used += cost
+                break
+        if used >= budget_tokens:
+            break
+    return "\n\n".join(entries) if entries else NO_CONTEXT
+
+
+class BuiltPrompt(NamedTuple):
+    text: str
+    prompt_tokens: int
+    context_tokens: int
+
+
+class PromptBuilder:
+    """
+    Builds generation prompts that fit a model's context window.
+
+    The arXiv context gets whatever the model's context_budget leaves after the
+    static prefix and the request, capped so prompt + max_tokens fits context_window.
+    """
+
+    SAFETY_MARGIN = 256
+
+    def __init__(self, model_info: Dict):
+        self.style = model_info.get("prompt_style", "full")
+        self.chars_per_token = model_info.get("chars_per_token", DEFAULT_CHARS_PER_TOKEN)
+        self.context_window = model_info.get("context_window", 8192)
+        self.max_output_tokens = model_info["max_tokens"]
+        self.context_budget = model_info.get("context_budget", 1500)
+        self.prefix = STATIC_PREFIXES[self.style]
+        self.prefix_tokens = estimate_tokens(self.prefix, self.chars_per_token)
+
+    def build(self, topic: str, paper_type: str, articles: Sequence[Dict]) -> BuiltPrompt:
+        request_tokens = estimate_tokens(_REQUEST_TEMPLATE.format(topic=topic, paper_type=paper_type, context=""),
+                                         self.chars_per_token)
+        room = self.context_window - self.max_output_tokens - self.prefix_tokens - request_tokens - self.SAFETY_MARGIN
+        budget = max(0, min(self.context_budget, room))
+        context = fit_context(topic, articles, budget, self.chars_per_token)
+        text = self.prefix + _REQUEST_TEMPLATE.format(topic=topic, paper_type=paper_type, context=context)
+        context_tokens = estimate_tokens(context, self.chars_per_token)
+        return BuiltPrompt(text, self.prefix_tokens + request_tokens + context_tokens, context_tokens)
+
+    def _context(self, topic: str, articles: Sequence[Dict], fixed_text: str, output_tokens: int) -> str:
+        room = (self.context_window - output_tokens - estimate_tokens(fixed_text, self.chars_per_token)
+                - self.SAFETY_MARGIN)
+        return fit_context(topic, articles, max(0, min(self.context_budget, room)), self.chars_per_token)
+
+    def build_outline(self, topic: str, paper_type: str, articles: Sequence[Dict]) -> BuiltPrompt:
+        fixed = _OUTLINE_TEMPLATE.format(topic=topic, paper_type=paper_type, context="")
+        context = self._context(topic, articles, fixed, OUTLINE_MAX_TOKENS)
+        text = _OUTLINE_TEMPLATE.format(topic=topic, paper_type=paper_type, context=context)
+        return BuiltPrompt(text, estimate_tokens(text, self.chars_per_token),
+                           estimate_tokens(context, self.chars_per_token))
+
+    def build_sections(self, topic: str, paper_type: str, outline: str,
+                       articles: Sequence[Dict]) -> Dict[str, BuiltPrompt]:
+        """One prompt per SECTION_GUIDES entry, all sharing the same outline and arXiv context"""
+        longest_guide = max(SECTION_GUIDES.values(), key=lambda guide: len(guide[1]))
+        fixed = _SECTION_TEMPLATE.format(topic=topic, paper_type=paper_type, outline=outline, context="",
+                                         header=longest_guide[0], guide=longest_guide[1])
+        context = self._context(topic, articles, fixed, max(guide[2] for guide in SECTION_GUIDES.values()))
+        context_tokens = estimate_tokens(context, self.chars_per_token)
+        prompts = {}
+        for key, (header, guide, _) in SECTION_GUIDES.items():
+            text = _SECTION_TEMPLATE.format(topic=topic, paper_type=paper_type, outline=outline,
+                                            context=context, header=header, guide=guide)
+            prompts[key] = BuiltPrompt(text, estimate_tokens(text, self.chars_per_token), context_tokens)
+        return prompts
+
+    def completion_budget(self, prompt: str) -> int:
+        """max_tokens that still fits the context window with this prompt"""
+        prompt_tokens = estimate_tokens(prompt, self.chars_per_token)
+        return max(256, min(self.max_output_tokens, self.context_window - prompt_tokens - self.SAFETY_MARGIN))
@@ -0,0 +1,181 @@
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Common abbreviations used in the ConferenceFinder domain list and in EasyChair topics
+SYNONYMS = {
+    "ai": ["artificial intelligence"],
+    "ml": ["machine learning"],
+    "dl": ["deep learning"],
+    "nlp": ["natural language processing"],
+    "cv": ["computer vision"],
+    "iot": ["internet of things"],
+    "hci": ["human computer interaction"],
+    "se": ["software engineering"],
+    "ir": ["information retrieval"],
+    "db": ["databases"],
+    "hpc": ["high performance computing"],
+}
+
+# Expand both ways so "Artificial Intelligence" also finds topics tagged "AI"
+_EXPANSIONS: Dict[str, List[str]] = defaultdict(list)
+for _short, _longs in SYNONYMS.items():
+    for _long in _longs:
+        _EXPANSIONS[_short].append(_long)
+        _EXPANSIONS[_long].append(_short)
+
+# Match quality weights used when ranking conferences
+EXACT, PREFIX, SUBSTRING, FUZZY = 1.0, 0.8, 0.6, 0.5
+# Shorter query tokens only match exactly, so "ai" can't prefix-match "air"
+MIN_PARTIAL_CHARS = 3
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _ngrams(token: str, n: int = 3) -> Set[str]:
+    padded = f"^{token}$"
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def _within_edit_distance(a: str, b: str, limit: int) -> bool:
+    """Banded Levenshtein check; bails out as soon as the distance exceeds `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+class TopicIndex:
+    """
+    Inverted index from normalized topic tokens to conferences.
+
+    Distinct topic strings are indexed once; each query token is resolved against the
+    token vocabulary (exact, prefix, trigram substring, then edit-distance fallback),
+    so filtering cost follows the number of matching topics rather than the catalog size.
+    Synonym expansions ("ai" <-> "artificial intelligence") only match exactly.
+    """
+
+    def __init__(self, conferences: Iterable[Dict]):
+        self.topic_conferences: List[List[int]] = []  # topic id -> conference ids
+        self.topic_tokens: List[Tuple[str, ...]] = []
+        self.postings: Dict[str, Set[int]] = defaultdict(set)  # token -> topic ids
+        topic_ids: Dict[str, int] = {}
+
+        for conf_id, conf in enumerate(conferences):
+            for topic in conf.get("topics", []):
+                if topic == "N/A":
+                    continue
+                normalized = " ".join(tokenize(topic))
+                if not normalized:
+                    continue
+                topic_id = topic_ids.get(normalized)
+                if topic_id is None:
+                    topic_id = topic_ids[normalized] = len(self.topic_tokens)
+                    self.topic_tokens.append(tuple(normalized.split()))
+                    self.topic_conferences.append([])
+                    for token in self.topic_tokens[topic_id]:
+                        self.postings[token].add(topic_id)
+                if not self.topic_conferences[topic_id] or self.topic_conferences[topic_id][-1] != conf_id:
+                    self.topic_conferences[topic_id].append(conf_id)
+
+        self.vocabulary = sorted(self.postings)
+        self.trigrams: Dict[str, Set[str]] = defaultdict(set)
+        for token in self.vocabulary:
+            for gram in _ngrams(token):
+                self.trigrams[gram].add(token)
+
+    def _expand_token(self, token: str, fuzzy: bool, exact: bool = False) -> Dict[str, float]:
+        """Resolve one query token to vocabulary tokens with a match weight"""
+        matches: Dict[str, float] = {}
+        if token in self.postings:
+            matches[token] = EXACT
+        if exact or len(token) < MIN_PARTIAL_CHARS:
+            return matches
+
+        # Prefix: contiguous run in the sorted vocabulary
+        i = bisect_left(self.vocabulary, token)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(token):
+            matches.setdefault(self.vocabulary[i], PREFIX)
+            i += 1
+
+        # Substring: intersect trigram postings (unpadded grams only), then verify
+        if len(token) >= 3:  # MIN_PARTIAL_CHARS may be lowered; trigrams need three
+            inner = [token[k:k + 3] for k in range(len(token) - 2)]
+            candidates = None
+            for gram in inner:
+                tokens = self.trigrams.get(gram, set())
+                candidates = tokens if candidates is None else candidates & tokens
+                if not candidates:
+                    break
+            for candidate in candidates or ():
+                if token in candidate:
+                    matches.setdefault(candidate, SUBSTRING)
+
+        # Typo tolerance only when nothing matched literally
+        if fuzzy and not matches and len(token) >= 4:
+            limit = 1 if len(token) < 8 else 2
+            candidates = set()
+            for gram in _ngrams(token):
+                candidates |= self.trigrams.get(gram, set())
+            for candidate in candidates:
+                if _within_edit_distance(token, candidate, limit):
+                    matches[candidate] = FUZZY
+        return matches
+
+    def _match_phrase(self, tokens: List[str], fuzzy: bool, exact: bool = False) -> Dict[int, float]:
+        """Topics containing every query token, with the weakest token match as the topic score"""
+        topic_scores: Dict[int, float] = {}
+        for position, token in enumerate(tokens):
+            token_topics: Dict[int, float] = {}
+            for vocab_token, weight in self._expand_token(token, fuzzy, exact).items():
+                for topic_id in self.postings[vocab_token]:
+                    if weight > token_topics.get(topic_id, 0.0):
+                        token_topics[topic_id] = weight
+            if position == 0:
+                topic_scores = token_topics
+            else:
+                topic_scores = {
+                    topic_id: min(score, token_topics[topic_id])
+                    for topic_id, score in topic_scores.items() if topic_id in token_topics
+                }
+            if not topic_scores:
+                break
+        return topic_scores
+
+    def search(self, query: str, fuzzy: bool = True) -> List[int]:
+        """Conference ids matching `query`, best first (ties keep catalog order)"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        # The user's own words may match partially; expansions they didn't type only exactly
+        phrases = [(tokens, False)]
+        joined = " ".join(tokens)
+        for synonym in _EXPANSIONS.get(joined, []):
+            phrases.append((tokenize(synonym), True))
+
+        topic_scores: Dict[int, float] = {}
+        for phrase, exact in phrases:
+            for topic_id, score in self._match_phrase(phrase, fuzzy, exact).items():
+                topic_scores[topic_id] = max(score, topic_scores.get(topic_id, 0.0))
+
+        # Rank conferences by how many (and how well) their topics match
+        conference_scores: Dict[int, float] = defaultdict(float)
+        for topic_id, score in topic_scores.items():
+            for conf_id in self.topic_conferences[topic_id]:
+                conference_scores[conf_id] += score
+        return sorted(conference_scores, key=lambda conf_id: (-conference_scores[conf_id], conf_id))
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import sys
+import threading
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from utils.topic_index import SYNONYMS, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Words that change how a topic reads but not what the paper would be about
+STOPWORDS = frozenset("""
+    a an and as at based by for from in into of on or the to towards toward using via with within
+    applying applied application approach approaches study role use
+""".split())
+
+# MinHash-LSH layout: NUM_BANDS bands of ROWS_PER_BAND hashes. Two topics with term-set
+# Jaccard J share a bucket with probability 1 - (1 - J**ROWS)**BANDS (0.96 at J=0.8,
+# 0.31 at J=0.5), so lookups mostly score true neighbours
+NUM_BANDS = 6
+# A match may lack only query terms this common among indexed topics ("learning", "system");
+# any rarer (high-IDF) term, e.g. "mental" vs "physical" health, has to be shared
+GENERIC_TERM_SHARE = 0.1
+ROWS_PER_BAND = 4
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_BANDS * ROWS_PER_BAND)]
+
+
+def _stem(token: str) -> str:
+    """Plural folding only; enough for "networks"/"network" without a stemmer dependency"""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def topic_terms(topic: str) -> Tuple[str, ...]:
+    """Content terms of a topic, sorted: abbreviations spelled out, stopwords dropped, plurals folded"""
+    terms = set()
+    for token in tokenize(topic):
+        for word in (tokenize(SYNONYMS[token][0]) if token in SYNONYMS else (token,)):
+            stem = _stem(word)
+            if word not in STOPWORDS and stem not in STOPWORDS:
+                terms.add(sys.intern(stem))  # interned: indexed topics share one copy per term
+    return tuple(sorted(terms))
+
+
+@lru_cache(maxsize=65536)
+def _term_signature(term: str) -> Tuple[int, ...]:
+    """The term's value under every MinHash permutation; terms recur, so this is computed once per term"""
+    h = int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "big")
+    return tuple((a * h + b) % _MERSENNE_PRIME for a, b in _PERMUTATIONS)
+
+
+def _band_keys(scope: str, terms: Tuple[str, ...]) -> List[int]:
+    signature = [min(values) for values in zip(*map(_term_signature, terms))]
+    return [hash((scope, band, *signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]))
+            for band in range(NUM_BANDS)]
+
+
+class SimilarMatch(NamedTuple):
+    topic: str
+    key: str
+    similarity: float
+
+
+class SimilarTopicIndex:
+    """
+    Near-duplicate lookup over previously generated topics.
+
+    Topics are reduced to content terms (topic_terms) and bucketed by MinHash-LSH, so a
+    lookup only scores the few entries that share a bucket with the query, however large
+    the index grows. Candidates are ranked by IDF-weighted Jaccard similarity: rare terms
+    ("climate", "genomics") decide a match, common ones ("learning", "system") barely count.
+    A candidate must also contain every query term rarer than GENERIC_TERM_SHARE, so
+    "mental health" never matches "physical health" however much else is shared.
+
+    Entries are (scope, topic, key): only topics in the same scope are compared, and the
+    key is whatever the caller stores the result under. Memory is bounded by
+    `max_entries` (least recently matched entries are evicted first) and `bucket_size`
+    (a bucket keeps its most recent entries). With a `path`, entries are loaded on
+    construction and written back by save().
+    """
+
+    def __init__(self, max_entries: int = 10000, bucket_size: int = 64, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.bucket_size = bucket_size
+        self.path = path
+        # id -> (scope, topic, key, terms), least recently matched first; plain tuples keep
+        # an entry to a few hundred bytes, and band keys are recomputed on removal instead of stored
+        self._entries: Dict[int, Tuple[str, str, str, Tuple[str, ...]]] = {}
+        self._ids_by_key: Dict[str, int] = {}
+        self._buckets: Dict[int, List[int]] = {}
+        self._document_frequency: Dict[str, int] = {}
+        self._idf_cache: Dict[str, float] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.lookups = 0
+        self.matches = 0
+        if path:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, scope: str, topic: str, key: str):
+        terms = topic_terms(topic)
+        if not terms:
+            return
+        buckets = _band_keys(scope, terms)
+        with self._lock:
+            previous = self._ids_by_key.get(key)
+            if previous is not None:
+                self._remove(previous)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (scope, topic, key, terms)
+            self._ids_by_key[key] = entry_id
+            self._idf_cache.clear()
+            for term in terms:
+                self._document_frequency[term] = self._document_frequency.get(term, 0) + 1
+            for bucket_key in buckets:
+                bucket = self._buckets.setdefault(bucket_key, [])
+                bucket.append(entry_id)
+                if len(bucket) > self.bucket_size:
+                    del bucket[0]
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, key: str):
+        """Forget the entry stored under `key` (e.g. its result expired)"""
+        with self._lock:
+            entry_id = self._ids_by_key.get(key)
+            if entry_id is not None:
+                self._remove(entry_id)
+
+    def _remove(self, entry_id: int):
+        scope, _, key, terms = self._entries.pop(entry_id)
+        if self._ids_by_key.get(key) == entry_id:
+            del self._ids_by_key[key]
+        self._idf_cache.clear()
+        for term in terms:
+            remaining = self._document_frequency[term] - 1
+            if remaining:
+                self._document_frequency[term] = remaining
+            else:
+                del self._document_frequency[term]
+        for bucket_key in _band_keys(scope, terms):
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None and entry_id in bucket:
+                bucket.remove(entry_id)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+    def _idf(self, term: str) -> float:
+        idf = self._idf_cache.get(term)
+        if idf is None:
+            idf = math.log((1 + len(self._entries)) / (1 + self._document_frequency.get(term, 0))) + 1.0
+            self._idf_cache[term] = idf
+        return idf
+
+    def find(self, scope: str, topic: str, threshold: float) -> Optional[SimilarMatch]:
+        """The most similar indexed topic in `scope` with similarity >= threshold, if any"""
+        terms = topic_terms(topic)
+        if not terms:
+            return None
+        buckets = _band_keys(scope, terms)
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for bucket_key in buckets:
+                candidates.update(self._buckets.get(bucket_key, ()))
+            # IDF-weighted Jaccard: weight of shared terms over weight of all terms in either topic
+            weights = {term: self._idf(term) for term in terms}
+            query_weight = sum(weights.values())
+            generic = GENERIC_TERM_SHARE * len(self._entries)
+            key_terms = {term for term in terms if self._document_frequency.get(term, 0) < generic}
+            idf_cache = self._idf_cache
+            best: Optional[Tuple[float, int]] = None
+            for entry_id in candidates:
+                entry_scope, _, _, entry_terms = self._entries[entry_id]
+                if entry_scope != scope:
+                    continue  # a hash collision across scopes
+                shared = extra = 0.0
+                for term in entry_terms:
+                    weight = weights.get(term)
+                    if weight is None:
+                        extra += idf_cache.get(term) or self._idf(term)
+                    else:
+                        shared += weight
+                similarity = shared / (query_weight + extra)
+                if (similarity >= threshold and (best is None or similarity > best[0])
+                        and key_terms.issubset(entry_terms)):
+                    best = (similarity, entry_id)
+            if best is None:
+                return None
+            self.matches += 1
+            entry = self._entries[best[1]] = self._entries.pop(best[1])  # most recently matched
+            return SimilarMatch(entry[1], entry[2], round(best[0], 3))
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "buckets": len(self._buckets),
+            "lookups": self.lookups,
+            "matches": self.matches,
+        }
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable topic index {self.path}: {e}")
+            return
+        for scope, topic, key in stored[-self.max_entries:]:
+            self.add(scope, topic, key)
+
+    def save(self):
+        """Write entries to disk atomically (least recently matched first); blocking, so call via to_thread"""
+        if not self.path:
+            return
+        with self._lock:
+            rows = [[scope, topic, key] for scope, topic, key, _ in self._entries.values()]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._save_lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(rows, f)
+            os.replace(tmp_path, self.path)
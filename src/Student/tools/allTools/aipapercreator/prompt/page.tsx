@@ -174,6 +174,7 @@ const handleGenerate = async () => {
         related_work: result.paper.related_work || "Related work not generated",
         methodology: result.paper.methodology || "Methodology not generated",
         results: result.paper.results || "Results not generated",
+        discussion: result.paper.discussion || "",
         conclusion: result.paper.conclusion || "Conclusion not generated",
         references: result.paper.references || "References not generated"
       },
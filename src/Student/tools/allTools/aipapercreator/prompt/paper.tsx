@@ -54,6 +54,7 @@ interface GeneratedPaperContent {
     related_work: string;
     methodology: string;
     results: string;
+    discussion: string;
     conclusion: string;
     references: string;
 }
@@ -91,6 +92,7 @@ const PaperView = () => {
         related_work: undefined,
         methodology: undefined,
         results: undefined,
+        discussion: undefined,
         conclusion: undefined,
         references: undefined,
     });
@@ -106,6 +108,7 @@ const PaperView = () => {
         related_work: null,
         methodology: null,
         results: null,
+        discussion: null,
         conclusion: null,
         references: null,
     });
@@ -124,6 +127,7 @@ const PaperView = () => {
                 related_work: parsedData.paper.related_work || "",
                 methodology: parsedData.paper.methodology || "",
                 results: parsedData.paper.results || "",
+                discussion: parsedData.paper.discussion || "",
                 conclusion: parsedData.paper.conclusion || "",
                 references: parsedData.paper.references || "",
             };
@@ -319,6 +323,8 @@ const PaperView = () => {
 
     const renderPaperContent = () => {
         if (!generatedContent || !config) return null;
+        // Older generations fold the discussion into results
+        const hasDiscussion = Boolean(generatedContent.discussion);
 
         return (
             <div className={`bg-white p-10 shadow-lg rounded-lg max-w-5xl mx-auto ${getFormatStyles()}`} style={columnRuleStyle}>
@@ -380,11 +386,12 @@ const PaperView = () => {
                     {renderSection("Introduction", "introduction", 1)}
                     {renderSection("Related Work", "related_work", 2)}
                     {renderSection("Methodology", "methodology", 3)}
-                    {renderSection("Results and Discussion", "results", 4)}
-                    {renderSection("Conclusion", "conclusion", 5)}
+                    {hasDiscussion ? renderSection("Results", "results", 4) : renderSection("Results and Discussion", "results", 4)}
+                    {hasDiscussion && renderSection("Discussion", "discussion", 5)}
+                    {renderSection("Conclusion", "conclusion", hasDiscussion ? 6 : 5)}
 
                     {/* References Section - NOW FULLY EDITABLE VIA renderSection */}
-                    {renderSection("References", "references", 6)}
+                    {renderSection("References", "references", hasDiscussion ? 7 : 6)}
 
                     {/* New input for adding formatted references directly to the text area */}
                     {isEditing && (
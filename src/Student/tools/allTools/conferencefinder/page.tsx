@@ -12,7 +12,7 @@ import {
   SelectValue,
 } from "@/components/ui/select";
 import { Lightbulb, Sparkles, Loader2, Search } from "lucide-react"; // Added Search icon for initial state
-import { useState } from "react";
+import { useRef, useState } from "react";
 import React from 'react';
 
 // Define interfaces for better type safety
@@ -21,11 +21,33 @@ interface Conference {
   name: string;
   link: string;
   location: string;
-  submission_deadline: string;
-  start_date: string;
+  submission_deadline: string | null; // ISO date (YYYY-MM-DD), null when EasyChair lists none
+  start_date: string | null;
   topics: string[];
 }
 
+interface ConferencePage {
+  items: Conference[];
+  total: number;
+  offset: number;
+  limit: number;
+  next_offset: number | null;
+  index_version: number;
+}
+
+interface ConferenceQuery {
+  domain: string;
+  paperType: string;
+  format: string;
+}
+
+const PAGE_SIZE = 20;
+
+const formatDate = (isoDate: string | null): string =>
+  isoDate
+    ? new Date(`${isoDate}T00:00:00`).toLocaleDateString(undefined, { year: "numeric", month: "short", day: "numeric" })
+    : "N/A";
+
 // Define static lists for dropdown options
 const domains: string[] = [
   "Artificial Intelligence", "Machine Learning", "Blockchain", "Cybersecurity",
@@ -53,6 +75,39 @@ export default function ConferenceFinder() {
   const [conferences, setConferences] = useState<Conference[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [hasSearched, setHasSearched] = useState<boolean>(false); // New state to track if a search has been performed
+  const [totalConferences, setTotalConferences] = useState<number>(0);
+  const [nextOffset, setNextOffset] = useState<number | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState<boolean>(false);
+  // The query behind the listed results; "Load more" pages through it, not the current dropdowns
+  const lastQuery = useRef<ConferenceQuery | null>(null);
+  // Snapshot the listed pages came from; offsets into a newer snapshot would skip or repeat rows
+  const indexVersion = useRef<number | null>(null);
+
+  /**
+   * Fetches one page of conferences (sorted by submission deadline) from the backend.
+   */
+  const fetchConferencePage = async (query: ConferenceQuery, offset: number): Promise<ConferencePage> => {
+    const queryParams = new URLSearchParams({
+      domain: query.domain,
+      paper_type: query.paperType,
+      format: query.format,
+      sort: "submission_deadline",
+      offset: String(offset),
+      limit: String(PAGE_SIZE),
+    }).toString();
+
+    const apiUrl = `http://13.61.153.223:8000/scrape/easychair?${queryParams}`;
+    console.log("Calling Backend API with URL:", apiUrl);
+
+    const response = await fetch(apiUrl);
+
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+    }
+
+    return response.json();
+  };
 
   /**
    * Handles the "Find My Conferences" button click.
@@ -65,32 +120,25 @@ export default function ConferenceFinder() {
       return;
     }
 
+    const query: ConferenceQuery = { domain, paperType, format };
+    lastQuery.current = query;
     setIsLoading(true);
+    indexVersion.current = null;
     setConferences([]);
+    setNextOffset(null);
     setError(null);
     setHasSearched(true); // Set to true once a search is initiated
 
     try {
-      const queryParams = new URLSearchParams({
-        domain: domain,
-        paper_type: paperType,
-        format: format,
-      }).toString();
-
-      const apiUrl = `http://13.61.153.223:8000/scrape/easychair?${queryParams}`;
-      console.log("Calling Backend API with URL:", apiUrl);
-
-      const response = await fetch(apiUrl);
-
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
-      }
-
-      const filteredConferences: Conference[] = await response.json();
-      setConferences(filteredConferences);
+      const page = await fetchConferencePage(query, 0);
+      if (lastQuery.current !== query) return; // superseded by a newer search
+      indexVersion.current = page.index_version;
+      setConferences(page.items);
+      setTotalConferences(page.total);
+      setNextOffset(page.next_offset);
 
     } catch (err: unknown) { // Changed 'any' to 'unknown' for stricter type checking
+      if (lastQuery.current !== query) return;
       console.error("Failed to fetch or process conferences:", err);
       let errorMsg = "Failed to load conferences. Please ensure your backend server is running and accessible.";
       if (err instanceof Error) {
@@ -100,7 +148,36 @@ export default function ConferenceFinder() {
       }
       setError(errorMsg);
     } finally {
-      setIsLoading(false);
+      if (lastQuery.current === query) setIsLoading(false);
+    }
+  };
+
+  /**
+   * Appends the next page of results to the list, or restarts from the first page
+   * if the backend re-scraped since the list was loaded.
+   */
+  const handleLoadMore = async (): Promise<void> => {
+    const query = lastQuery.current;
+    if (nextOffset === null || query === null) return;
+    setIsLoadingMore(true);
+    try {
+      let page = await fetchConferencePage(query, nextOffset);
+      if (lastQuery.current !== query) return; // a new search replaced the list meanwhile
+      if (page.index_version !== indexVersion.current) {
+        page = await fetchConferencePage(query, 0);
+        if (lastQuery.current !== query) return;
+        indexVersion.current = page.index_version;
+        setConferences(page.items);
+      } else {
+        setConferences((previous) => [...previous, ...page.items]);
+      }
+      setTotalConferences(page.total);
+      setNextOffset(page.next_offset);
+    } catch (err: unknown) {
+      console.error("Failed to load more conferences:", err);
+      setError(err instanceof Error ? `Failed to load more conferences: ${err.message}` : "Failed to load more conferences.");
+    } finally {
+      setIsLoadingMore(false);
     }
   };
 
@@ -257,7 +334,7 @@ export default function ConferenceFinder() {
             {!isLoading && !error && hasSearched && conferences.length > 0 && (
               <div className="space-y-6">
                 <h2 className="text-3xl font-bold text-gray-800 text-center">
-                  Found Conferences ({conferences.length})
+                  Found Conferences ({totalConferences})
                 </h2>
                 {conferences.map((conf, index) => (
                   <Card key={index} className="rounded-2xl shadow-md border bg-white p-4">
@@ -271,12 +348,26 @@ export default function ConferenceFinder() {
                     </CardHeader>
                     <CardContent className="p-0 text-gray-700 text-sm">
                       <p><strong>Location:</strong> {conf.location}</p>
-                      <p><strong>Submission Deadline:</strong> {conf.submission_deadline}</p>
-                      <p><strong>Start Date:</strong> {conf.start_date}</p>
+                      <p><strong>Submission Deadline:</strong> {formatDate(conf.submission_deadline)}</p>
+                      <p><strong>Start Date:</strong> {formatDate(conf.start_date)}</p>
                       <p><strong>Topics:</strong> {conf.topics.join(', ')}</p>
                     </CardContent>
                   </Card>
                 ))}
+                {nextOffset !== null && (
+                  <div className="flex justify-center">
+                    <Button variant="outline" disabled={isLoadingMore} onClick={handleLoadMore}>
+                      {isLoadingMore ? (
+                        <>
+                          <Loader2 className="mr-2 h-4 w-4 animate-spin" />
+                          Loading...
+                        </>
+                      ) : (
+                        `Load more (${conferences.length} of ${totalConferences})`
+                      )}
+                    </Button>
+                  </div>
+                )}
               </div>
             )}
 